@@ -17,13 +17,15 @@ setup(
         "cssutils==2.11.1",
         "mistune==3.0.2",
         "PyYAML==6.0.2",
+        "Pillow==10.4.0",
+        "pypdf==4.3.1",
         "PyQt6==6.7.0",
         "PyQt6-WebEngine==6.7.0",
         "pytest==8.3.3",
     ],
     entry_points={
         "console_scripts": [
-            "mc-assembler = src.gui.main_window:main",
+            "mc-assembler = src.cli:main",
         ]
     },
 )
\ No newline at end of file
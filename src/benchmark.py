@@ -0,0 +1,223 @@
+# Filename: src/benchmark.py
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import struct
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import yaml
+from .build_manifest import renderer_version
+from .build_profile import peak_rss_mb
+from .config import ConfigManager
+from .utils import compute_hash, discover_files, input_index
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_VERSION = 1
+DEFAULT_SCALES = (10, 100, 500, 2000)
+STAGES = ('discovery', 'markdown', 'css', 'layout', 'pdf_write', 'hash')
+
+WORDS = (
+    'policy directive autonomous systems readiness logistics procurement oversight doctrine '
+    'interoperability workforce training maintenance deployment assessment governance budget'
+).split()
+
+def _png_bytes(width: int, height: int, seed: int) -> bytes:
+    """A small valid RGB PNG written without Pillow, so corpus generation has no optional dependencies."""
+    rng = random.Random(seed)
+    rows = b''.join(b'\0' + bytes(rng.randrange(256) for _ in range(width * 3)) for _ in range(height))
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def generate_corpus(folder: str | Path, documents: int, seed: int = 0, images: int = 8) -> Path:
+    """Write a deterministic synthetic package: long headings, tables, image placeholders and page breaks."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    image_dir = folder / 'images'
+    image_dir.mkdir(exist_ok=True)
+    mapping = {}
+    for i in range(images):
+        (image_dir / f'figure{i}.png').write_bytes(_png_bytes(64, 48, seed + i))
+        mapping[f'figure{i}'] = f'images/figure{i}.png'
+    with open(folder / 'images.yaml', 'w', encoding='utf-8') as f:
+        yaml.safe_dump(mapping, f)
+
+    width = len(str(documents))
+    for d in range(documents):
+        parts = [f"# {_sentence(rng, 14)}\n"]
+        for s in range(rng.randint(2, 4)):
+            parts.append(f"## {d + 1}.{s + 1} {_sentence(rng, rng.randint(6, 18))}\n")
+            parts.extend(_sentence(rng, rng.randint(12, 30)) + '\n' for _ in range(rng.randint(2, 5)))
+            if rng.random() < 0.5:
+                parts.append('| Item | Owner | Budget | Status |\n|---|---|---|---|\n')
+                parts.extend(
+                    f"| {rng.choice(WORDS)} | {rng.choice(WORDS)} | ${rng.randint(1, 900)}M | {rng.choice(WORDS)} |\n"
+                    for _ in range(rng.randint(3, 12))
+                )
+            if images and rng.random() < 0.3:
+                parts.append(f"\n[[image:figure{rng.randrange(images)}]]\n")
+        if rng.random() < 0.4:
+            parts.append('\n<!-- PAGEBREAK -->\n')
+        (folder / f"{d + 1:0{width}d}-document.md").write_text('\n'.join(parts), encoding='utf-8')
+    return folder
+
+class StageTimer:
+    """Collects wall-clock seconds per named stage; repeated runs keep the fastest."""
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+        self.skipped: dict[str, str] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.seconds[name] = min(elapsed, self.seconds.get(name, elapsed))
+
+    def skip(self, name: str, reason: str):
+        self.skipped[name] = reason
+
+def _bench_once(folder: Path, config: ConfigManager, output_pdf: Path, timer: StageTimer, render: bool):
+    # Imported here so `bench --help` stays cheap
+    from .html_generator import HTMLGenerator
+
+    input_index.clear()
+    with timer.stage('discovery'):
+        files = discover_files(str(folder))
+
+    generator = HTMLGenerator(config)  # Fresh fragment cache: measures cold conversion
+    try:
+        with timer.stage('markdown'):
+            spool = generator.spool_html(str(folder))
+    finally:
+        generator.shutdown()
+    with spool:
+        _bench_render(spool, config, output_pdf, timer, render)
+        return len(files), spool.size
+
+def _bench_render(spool, config: ConfigManager, output_pdf: Path, timer: StageTimer, render: bool):
+    from .pdf_renderer import PDFRenderer, shared_font_config
+
+    renderer = PDFRenderer(config)
+    with timer.stage('css'):
+        css_content = renderer.get_render_css()
+
+    if not render:
+        for name in ('layout', 'pdf_write', 'hash'):
+            timer.skip(name, 'rendering disabled')
+        return
+    try:
+        from weasyprint import CSS, HTML
+    except Exception as e:  # ImportError, or OSError when pango/cairo are missing
+        for name in ('layout', 'pdf_write', 'hash'):
+            timer.skip(name, f"WeasyPrint unavailable: {e}")
+        return
+
+    with timer.stage('layout'):
+        stylesheet = CSS(string=css_content, font_config=shared_font_config())
+        document = HTML(file_obj=spool.reader(), encoding='utf-8').render(stylesheets=[stylesheet], font_config=shared_font_config())
+    with timer.stage('pdf_write'):
+        document.write_pdf(str(output_pdf))
+    with timer.stage('hash'):
+        compute_hash(output_pdf)
+
+def _bench_scale(documents: int, tmp: str, config_dict: dict, repeat: int, render: bool) -> dict:
+    """Benchmark one corpus size. Runs in a fresh process, so the peak RSS figures belong to this scale alone."""
+    tmp = Path(tmp)
+    config = ConfigManager.from_dict(config_dict)
+    folder = generate_corpus(tmp / f'corpus-{documents}', documents)
+    config.set('input_folder', str(folder))
+    timer = StageTimer()
+    html_bytes = 0
+    for _ in range(max(1, repeat)):
+        _, html_bytes = _bench_once(folder, config, tmp / f'out-{documents}.pdf', timer, render)
+    total = sum(timer.seconds.values())
+    entry = {
+        'documents': documents,
+        'html_bytes': html_bytes,
+        'stages': {name: round(timer.seconds[name], 4) for name in STAGES if name in timer.seconds},
+        'skipped': timer.skipped,
+        'total_seconds': round(total, 4),
+        'docs_per_second': round(documents / total, 1) if total else None,
+        'peak_rss_mb': peak_rss_mb(),
+        # Largest conversion pool worker (build.parallel_workers > 1); the pool is shut down before this point
+        'worker_peak_rss_mb': peak_rss_mb(children=True) if config.get('build.parallel_workers', 0) > 1 else None,
+    }
+    if 'hash' in timer.seconds:
+        size_mb = (tmp / f'out-{documents}.pdf').stat().st_size / (1024 * 1024)
+        entry['pdf_mb'] = round(size_mb, 2)
+        entry['hash_mb_per_second'] = round(size_mb / timer.seconds['hash'], 1) if timer.seconds['hash'] else None
+    return entry
+
+def run_benchmark(scales=DEFAULT_SCALES, repeat: int = 1, render: bool = True, workers: int = 0,
+                  work_dir: str | Path | None = None, progress=None) -> dict:
+    """Benchmark every build stage on synthetic corpora of each size and return a JSON-serialisable report.
+
+    Each scale runs in its own freshly spawned process: ru_maxrss is a
+    lifetime high-water mark, so sharing one process would report the
+    largest scale so far for every later one.
+    """
+    report = {
+        'benchmark_version': BENCHMARK_VERSION,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'renderer_version': renderer_version(),
+            'parallel_workers': workers,
+        },
+        'scales': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='mc-bench-', dir=work_dir) as tmp:
+        tmp = Path(tmp)
+        config = ConfigManager.from_dict(ConfigManager.DEFAULTS)
+        config.set('build.parallel_workers', workers)
+        config.set('build.cache_dir', str(tmp / 'cache'))
+        context = multiprocessing.get_context('spawn')
+        for documents in scales:
+            if progress:
+                progress(f"Benchmarking {documents} documents...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                entry = pool.submit(_bench_scale, documents, str(tmp), config.config, repeat, render).result()
+            report['scales'][str(documents)] = entry
+    return report
+
+def compare_reports(current: dict, baseline: dict, threshold: float = 0.25, min_seconds: float = 0.01) -> list[dict]:
+    """List stages that got slower than baseline by more than threshold (a fraction).
+
+    Stages faster than min_seconds in both runs are ignored as timer noise.
+    """
+    regressions = []
+    for scale, entry in current.get('scales', {}).items():
+        base_entry = baseline.get('scales', {}).get(scale)
+        if not base_entry:
+            continue
+        timings = dict(entry['stages'], total=entry['total_seconds'])
+        base_timings = dict(base_entry['stages'], total=base_entry['total_seconds'])
+        for stage, seconds in timings.items():
+            base_seconds = base_timings.get(stage)
+            if base_seconds is None or max(seconds, base_seconds) < min_seconds:
+                continue
+            ratio = seconds / base_seconds if base_seconds else float('inf')
+            if ratio > 1 + threshold:
+                regressions.append({
+                    'scale': scale, 'stage': stage,
+                    'baseline_seconds': base_seconds, 'current_seconds': seconds, 'ratio': round(ratio, 2),
+                })
+    return regressions
+
+def load_report(path: str | Path) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,173 @@
+# Filename: src/build_manifest.py
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from hashlib import sha256
+from importlib import metadata
+from pathlib import Path
+from urllib.parse import unquote
+from .image_assets import ImageManifest
+from .utils import compute_hash, discover_file_stats
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+# ![alt](path) and <img src="path">; targets with a scheme (https:, data:) are not local files
+IMAGE_LINK = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)|<img\b[^>]*\bsrc=["\']([^"\']+)', re.IGNORECASE)
+URL_SCHEME = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:')
+
+def manifest_path_for(output_file: str | Path) -> Path:
+    """Build manifests live next to the PDF: package.pdf -> package.pdf.manifest.json."""
+    output = Path(output_file)
+    return output.with_name(output.name + '.manifest.json')
+
+def load_build_manifest(output_file: str | Path) -> dict | None:
+    """Return the manifest stored with an existing output, or None if absent/unreadable."""
+    path = manifest_path_for(output_file)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('manifest_version') == MANIFEST_VERSION else None
+
+def renderer_version() -> str:
+    """Versions of everything that turns inputs into a PDF: the packages (read from metadata) and our own
+    renderer and segment formats, so changing either invalidates earlier builds."""
+    from .html_generator import CustomRenderer
+    from .segment_renderer import SEGMENT_FORMAT_VERSION
+    versions = []
+    for package in ('mistune', 'weasyprint', 'pypdf'):
+        try:
+            versions.append(f"{package}-{metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}-missing")
+    versions.append(f"custom-{CustomRenderer.VERSION}")
+    versions.append(f"segments-{SEGMENT_FORMAT_VERSION}")
+    return '/'.join(versions)
+
+def describe_file(path: Path, known_sha256: str | None = None, previous: dict | None = None,
+                  stat: tuple[int, int] | None = None) -> dict:
+    """Stat a file (unless its (size, mtime_ns) is given) and hash it, reusing previous['sha256'] when size and mtime are unchanged."""
+    if stat is None:
+        st = path.stat()
+        stat = (st.st_size, st.st_mtime_ns)
+    size, mtime_ns = stat
+    if known_sha256 is None and previous and previous.get('size') == size and previous.get('mtime_ns') == mtime_ns:
+        known_sha256 = previous.get('sha256')
+    return {
+        'path': path.as_posix(),
+        'sha256': known_sha256 or compute_hash(path),
+        'size': size,
+        'mtime_ns': mtime_ns,
+    }
+
+def linked_images(md_file: Path) -> list[str]:
+    """Local image files a document links to directly (![](path) or <img src>), resolved against its folder."""
+    found = {}
+    for match in IMAGE_LINK.finditer(md_file.read_text(encoding='utf-8')):
+        target = match.group(1) or match.group(2)
+        if URL_SCHEME.match(target):
+            continue
+        found.setdefault(Path(os.path.normpath(md_file.parent / unquote(target))).as_posix(), None)
+    return list(found)
+
+def describe_document(md_file: Path, previous: dict | None = None, stat: tuple[int, int] | None = None) -> dict:
+    """describe_file plus the images the document links to, reused from previous while its content is unchanged."""
+    entry = describe_file(md_file, previous=previous, stat=stat)
+    if previous and 'linked_images' in previous and previous.get('sha256') == entry['sha256']:
+        entry['linked_images'] = previous['linked_images']
+    else:
+        entry['linked_images'] = linked_images(md_file)
+    return entry
+
+def collect_inputs(input_folder: str, previous_manifest: dict | None = None) -> dict:
+    """Describe every Markdown file, mapped image and directly linked image, stat-first against the previous manifest.
+
+    Unchanged files (same size and mtime) are never re-read, so checking an
+    unchanged 500-file folder costs one stat per file, taken from the input
+    index's directory scan where it has a fresh one. Linked images are only
+    stat'ed: their size and mtime stand in for their content.
+    """
+    previous_docs = {d['path']: d for d in (previous_manifest or {}).get('documents', [])}
+    previous_images = (previous_manifest or {}).get('images', {})
+
+    documents = [
+        describe_document(md_file, previous=previous_docs.get(md_file.as_posix()), stat=stat)
+        for md_file, stat in discover_file_stats(input_folder)
+    ]
+    linked = {}
+    for path in sorted({path for document in documents for path in document['linked_images']}):
+        try:
+            stat = os.stat(path)
+            linked[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        except OSError:
+            linked[path] = {'missing': True}
+    images = ImageManifest(input_folder)
+    image_entries = {}
+    for placeholder in sorted(images.entries):
+        source = images.resolve(placeholder)
+        if source.is_file():
+            image_entries[placeholder] = describe_file(source, previous=previous_images.get(placeholder))
+        else:
+            image_entries[placeholder] = {'path': source.as_posix(), 'missing': True}
+    return {'documents': documents, 'images': image_entries, 'linked_images': linked}
+
+def input_fingerprint(inputs: dict, config: dict, css_content: str) -> str:
+    """Combine file order, content hashes, effective config, CSS and renderer versions into one hash."""
+    digest = sha256()
+    digest.update(renderer_version().encode('utf-8'))
+    for document in inputs['documents']:
+        digest.update(f"\0doc:{document['path']}:{document['sha256']}".encode('utf-8'))
+    for placeholder, image in inputs['images'].items():
+        digest.update(f"\0img:{placeholder}:{image.get('sha256', 'missing')}".encode('utf-8'))
+    for path, image in inputs.get('linked_images', {}).items():
+        digest.update(f"\0link:{path}:{image.get('size', 'missing')}:{image.get('mtime_ns', '')}".encode('utf-8'))
+    digest.update(b'\0config:' + json.dumps(config, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(b'\0css:' + css_content.encode('utf-8'))
+    return digest.hexdigest()
+
+def is_up_to_date(previous_manifest: dict | None, fingerprint: str, output_file: str | Path) -> bool:
+    """True when the stored fingerprint matches and the output file is untouched since it was built."""
+    if not previous_manifest or previous_manifest.get('fingerprint') != fingerprint:
+        return False
+    output = Path(output_file)
+    if not output.is_file():
+        return False
+    recorded = previous_manifest.get('output', {})
+    stat = output.stat()
+    return recorded.get('size') == stat.st_size and recorded.get('mtime_ns') == stat.st_mtime_ns
+
+def create_build_manifest(config: dict, inputs: dict, output_file: str, css_content: str,
+                          output_sha256: str | None = None, fingerprint: str | None = None) -> dict:
+    """Describe every build input and the output so tooling can diff builds cheaply.
+
+    Pass output_sha256 when the renderer already hashed the PDF to avoid a second pass.
+    """
+    config_json = json.dumps(config, sort_keys=True, default=str)
+    return {
+        'manifest_version': MANIFEST_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'renderer_version': renderer_version(),
+        'fingerprint': fingerprint or input_fingerprint(inputs, config, css_content),
+        'documents': inputs['documents'],
+        'images': inputs['images'],
+        'linked_images': inputs.get('linked_images', {}),
+        'config': json.loads(config_json),
+        'config_sha256': sha256(config_json.encode('utf-8')).hexdigest(),
+        'css_sha256': sha256(css_content.encode('utf-8')).hexdigest(),
+        'output': describe_file(Path(output_file), output_sha256),
+    }
+
+def write_build_manifest(manifest: dict, output_file: str | Path) -> Path:
+    """Write the manifest atomically next to the output PDF."""
+    path = manifest_path_for(output_file)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    tmp_path.replace(path)
+    logger.info(f"Build manifest written: {path}")
+    return path
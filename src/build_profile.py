@@ -0,0 +1,233 @@
+# Filename: src/build_profile.py
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 2
+
+# Share of build time per top-level stage, used until a previous report supplies real numbers
+DEFAULT_STAGE_WEIGHTS = {'prepare': 0.05, 'html': 0.3, 'render': 0.6, 'finish': 0.05}
+
+def report_path_for(output_file: str | Path) -> Path:
+    """Build reports live next to the PDF: package.pdf -> package.pdf.report.json."""
+    output = Path(output_file)
+    return output.with_name(output.name + '.report.json')
+
+def load_build_report(output_file: str | Path) -> dict | None:
+    try:
+        with open(report_path_for(output_file), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return report if report.get('report_version') == REPORT_VERSION else None
+
+def peak_rss_mb(children: bool = False) -> float | None:
+    """Peak resident set size of this process since it started, or with children=True of its largest
+    terminated child (e.g. a conversion pool worker). None where the resource module is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def format_eta(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    return f"{minutes}:{secs:02d}"
+
+class BuildProfile:
+    """Timed spans, per-document conversion times and cache counters for one build.
+
+    Top-level stages (prepare, html, render, finish) also drive progress: each
+    carries a weight taken from the previous build's report (or defaults), so
+    progress messages can show a real percentage and an ETA.
+    """
+
+    def __init__(self, progress_callback=None, percent_callback=None, history: dict | None = None):
+        self.progress_callback = progress_callback
+        self.percent_callback = percent_callback  # Called with an int 0-100
+        self.started = time.perf_counter()
+        self.start_peak_rss_mb = peak_rss_mb()  # In the GUI or render worker, the process may already have peaked
+        self.spans: list[dict] = []
+        self.documents: dict[str, float] = {}
+        self.cache: dict[str, dict] = {}
+        self.weights = dict(DEFAULT_STAGE_WEIGHTS)
+        self.expected_seconds = None
+        self.document_count = None
+        self._history_documents = None
+        if history and history.get('stages'):
+            total = sum(history['stages'].get(name, 0) for name in DEFAULT_STAGE_WEIGHTS)
+            if total > 0:
+                self.weights = {name: history['stages'].get(name, 0) / total for name in DEFAULT_STAGE_WEIGHTS}
+                self.expected_seconds = total
+                self._history_documents = history.get('documents') or None
+        self._stack: list[str] = []
+        self._stage = None
+        self._done_weight = 0.0
+        self._stage_fraction = 0.0
+        self._message = ''
+
+    def set_document_count(self, count: int):
+        """Scale the historical duration to this build's size."""
+        self.document_count = count
+        if self.expected_seconds and self._history_documents:
+            self.expected_seconds *= max(count, 1) / self._history_documents
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a block; nested spans record their parent."""
+        entry = {'name': name, 'parent': self._stack[-1] if self._stack else None,
+                 'start': round(time.perf_counter() - self.started, 4)}
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry['seconds'] = round(time.perf_counter() - start, 4)
+            self._stack.pop()
+            self.spans.append(entry)
+
+    @contextmanager
+    def stage(self, name: str, message: str):
+        """A top-level stage: a span that also advances the progress percentage."""
+        self._stage, self._stage_fraction, self._message = name, 0.0, message
+        self._report()
+        with self.span(name) as entry:
+            yield entry
+        self._done_weight += self.weights.get(name, 0)
+        self._stage, self._stage_fraction = None, 0.0
+
+    def advance(self, fraction: float, message: str | None = None):
+        """Report progress within the current stage (0.0-1.0)."""
+        self._stage_fraction = min(max(fraction, 0.0), 1.0)
+        if message:
+            self._message = message
+        self._report()
+
+    def message(self, text: str):
+        """Report a status message at the current progress; usable as a plain progress_callback."""
+        self._message = text
+        self._report()
+
+    def record_document(self, name: str, seconds: float, done: int, total: int):
+        self.documents[name] = round(seconds, 4)
+        self.advance(done / total if total else 1.0)
+
+    def record_cache(self, name: str, hits: int, misses: int):
+        entry = self.cache.setdefault(name, {'hits': 0, 'misses': 0})
+        entry['hits'] += hits
+        entry['misses'] += misses
+
+    @property
+    def fraction(self) -> float:
+        current = self.weights.get(self._stage, 0) * self._stage_fraction if self._stage else 0.0
+        return min(self._done_weight + current, 1.0)
+
+    def eta_seconds(self) -> float | None:
+        elapsed = time.perf_counter() - self.started
+        fraction = self.fraction
+        if self.expected_seconds:
+            return max(self.expected_seconds * (1 - fraction), 0.0)
+        if fraction >= 0.05:
+            return elapsed * (1 - fraction) / fraction
+        return None
+
+    def _report(self):
+        percent = int(self.fraction * 100)
+        if self.percent_callback:
+            self.percent_callback(percent)
+        if self.progress_callback:
+            eta = self.eta_seconds()
+            suffix = f" ({percent}%, ETA {format_eta(eta)})" if eta is not None else f" ({percent}%)"
+            self.progress_callback(self._message + suffix)
+
+    def as_dict(self) -> dict:
+        stages = {s['name']: s['seconds'] for s in self.spans if s['parent'] is None}
+        cache = {
+            name: dict(counts, hit_rate=round(counts['hits'] / (counts['hits'] + counts['misses']), 3)
+                       if counts['hits'] + counts['misses'] else None)
+            for name, counts in self.cache.items()
+        }
+        slowest = sorted(self.documents.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            'report_version': REPORT_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'total_seconds': round(time.perf_counter() - self.started, 4),
+            'documents': self.document_count,
+            'stages': stages,
+            'spans': sorted(self.spans, key=lambda s: s['start']),
+            'document_seconds': self.documents,
+            'slowest_documents': [{'document': name, 'seconds': seconds} for name, seconds in slowest],
+            'cache': cache,
+            **self._memory(),
+        }
+
+    def _memory(self) -> dict:
+        """The process's lifetime peak, and how far this build raised it (0 if it stayed below an earlier peak)."""
+        peak = peak_rss_mb()
+        if peak is None:
+            return {'process_peak_rss_mb': None, 'build_peak_rss_growth_mb': None}
+        return {
+            'process_peak_rss_mb': peak,
+            'build_peak_rss_growth_mb': round(peak - (self.start_peak_rss_mb or 0), 1),
+        }
+
+def timed(profile: BuildProfile | None, name: str):
+    """profile.span(name), or a no-op when no profile is being collected."""
+    return profile.span(name) if profile else nullcontext()
+
+def write_build_report(report: dict, output_file: str | Path) -> Path:
+    path = report_path_for(output_file)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    tmp_path.replace(path)
+    logger.info(f"Build report written: {path}")
+    return path
+
+@contextmanager
+def profiler_session(kind: str | None, output_file: str | Path):
+    """Run the block under cProfile or pyinstrument and dump next to the output.
+
+    Yields a dict whose 'path' holds the dump file once the block exits (None when profiling is off).
+    """
+    result = {'path': None}
+    if not kind:
+        yield result
+        return
+    output = Path(output_file)
+    if kind == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler  # Optional dependency
+        except ImportError:
+            logger.warning("pyinstrument is not installed; falling back to cProfile")
+            kind = 'cprofile'
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield result
+            finally:
+                profiler.stop()
+                path = output.with_name(output.name + '.profile.html')
+                path.write_text(profiler.output_html(), encoding='utf-8')
+                result['path'] = str(path)
+            return
+    if kind != 'cprofile':
+        raise ValueError(f"Unknown profiler: {kind}")
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        path = output.with_name(output.name + '.prof')
+        profiler.dump_stats(str(path))
+        result['path'] = str(path)
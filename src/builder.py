@@ -0,0 +1,104 @@
+# Filename: src/builder.py
+import logging
+import time
+from .build_manifest import (
+    collect_inputs, create_build_manifest, input_fingerprint, is_up_to_date, load_build_manifest, write_build_manifest
+)
+from .build_profile import BuildProfile, load_build_report, profiler_session, write_build_report
+from .css_template import stylesheet_cache
+from .segment_renderer import SegmentedRenderer
+
+logger = logging.getLogger(__name__)
+
+def build_package(html_generator, pdf_renderer, input_folder: str, output_file: str, progress_callback=None,
+                  force: bool = False, percent_callback=None) -> dict:
+    """Run one build (HTML generation, then PDF rendering) and return a JSON-serialisable summary.
+
+    When the inputs, config, CSS and renderer versions match the manifest stored
+    with an untouched output, rendering is skipped and status is 'cached'
+    (disable with force=True or build.skip_unchanged: false).
+    Progress messages carry a percentage and an ETA based on the previous
+    build's report; percent_callback, if given, receives the bare percentage.
+    Shared by the GUI BuildThread and the headless CLI; must not import Qt.
+    """
+    config = html_generator.config
+    profile = BuildProfile(progress_callback, percent_callback, history=load_build_report(output_file))
+    with profiler_session(config.get('build.profiler') or None, output_file) as profiler:
+        summary = _build(html_generator, pdf_renderer, input_folder, output_file, force, profile)
+    if profiler['path']:
+        summary['profile'] = profiler['path']
+    if summary['status'] == 'built' and config.get('build.write_report', True):
+        report = profile.as_dict()
+        report.update(output_file=str(output_file), incremental=summary['incremental'])
+        summary['report'] = str(write_build_report(report, output_file))
+    return summary
+
+def _build(html_generator, pdf_renderer, input_folder: str, output_file: str, force: bool, profile: BuildProfile) -> dict:
+    start = time.perf_counter()
+    config = html_generator.config
+    incremental = bool(config.get('build.incremental', False))
+    if incremental and config.get('toc.enabled', False):
+        # Segments render standalone, so target-counter could not number a TOC pointing into the others
+        logger.warning("toc.enabled needs a full build; ignoring build.incremental")
+        incremental = False
+    summary = {
+        'status': 'built',
+        'input_folder': str(input_folder),
+        'output_file': str(output_file),
+        'incremental': incremental,
+    }
+
+    with profile.stage('prepare', "Checking inputs..."):
+        with profile.span('css'):
+            css_content = pdf_renderer.get_render_css()
+        with profile.span('collect_inputs'):
+            previous = load_build_manifest(output_file)
+            inputs = collect_inputs(input_folder, previous)
+            fingerprint = input_fingerprint(inputs, config.config, css_content)
+    summary['documents'] = len(inputs['documents'])
+    profile.set_document_count(summary['documents'])
+
+    if not force and config.get('build.skip_unchanged', True) and is_up_to_date(previous, fingerprint, output_file):
+        if profile.progress_callback:
+            profile.progress_callback("Output is up to date – skipped rendering.")
+        summary['status'] = 'cached'
+        summary['sha256'] = previous['output']['sha256']
+        summary['seconds'] = round(time.perf_counter() - start, 3)
+        logger.info(f"No-op build: {output_file} already matches fingerprint {fingerprint[:12]}")
+        return summary
+
+    stylesheet_hits, stylesheet_misses = stylesheet_cache.hits, stylesheet_cache.misses
+    spool = None
+    if summary['incremental']:
+        with profile.stage('html', "Generating HTML segments..."):
+            segments = html_generator.generate_segments(input_folder, profile=profile)
+            if html_generator.cross_document_links:
+                # Each segment renders standalone, so a link into another one would dangle in the merged PDF
+                doc_id, target = html_generator.cross_document_links[0]
+                logger.warning(f"{doc_id} links to another document ({target}); cross-document links need a full "
+                               "build, ignoring build.incremental")
+                summary['incremental'] = False
+                spool = html_generator.spool_html(input_folder, profile=profile)  # Every fragment is cached by now
+    if summary['incremental']:
+        with profile.stage('render', "Rendering segments..."):
+            stats = SegmentedRenderer(pdf_renderer).render(segments, output_file, profile=profile)
+        summary['sha256'] = stats.pop('sha256')
+        summary['segments'] = stats
+    else:
+        if spool is None:
+            with profile.stage('html', "Generating HTML content..."):
+                spool = html_generator.spool_html(input_folder, profile=profile)
+        with spool, profile.stage('render', "Rendering PDF..."):
+            summary['html_bytes'] = spool.size
+            summary['sha256'] = pdf_renderer.render_pdf(spool, output_file, profile.message, profile=profile)
+    profile.record_cache('stylesheets', stylesheet_cache.hits - stylesheet_hits, stylesheet_cache.misses - stylesheet_misses)
+
+    with profile.stage('finish', "Writing build manifest..."):
+        if config.get('build.write_manifest', True):
+            manifest = create_build_manifest(config.config, inputs, output_file, css_content, summary['sha256'], fingerprint)
+            summary['manifest'] = str(write_build_manifest(manifest, output_file))
+    profile.advance(1.0, "PDF build complete.")
+
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    logger.info(f"Build finished in {summary['seconds']}s ({summary['documents']} documents)")
+    return summary
@@ -0,0 +1,185 @@
+# Filename: src/chunked_renderer.py
+import gc
+import html
+import logging
+import re
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from .build_profile import timed
+from .html_spool import HTMLSpool
+
+logger = logging.getLogger(__name__)
+
+PX_TO_PT = 0.75  # WeasyPrint lays out in CSS px and writes PDF points
+TOC_START, TOC_END = '<nav id="toc">', '</nav>'
+TOC_LINK = re.compile(r'<a href="#([^"]+)">')
+
+def number_toc(html_content: str, anchors: dict) -> str | None:
+    """Give each TOC link a data-page attribute with its target's page number from anchors, which styles.txt
+    shows in place of target-counter(); None if html_content has no TOC."""
+    start = html_content.find(TOC_START)
+    if start == -1:
+        return None
+    end = html_content.find(TOC_END, start)
+    def numbered(match):
+        target = anchors.get(html.unescape(match.group(1)))
+        return match.group(0) if target is None else f'<a href="#{match.group(1)}" data-page="{target[0] + 1}">'
+    return html_content[:start] + TOC_LINK.sub(numbered, html_content[start:end]) + html_content[end:]
+
+class _CrossChunkAnchorFilter(logging.Filter):
+    """Drop WeasyPrint's 'No anchor' errors while chunks render; the merge restores those links
+    and reports the anchors that are genuinely missing."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.getMessage().startswith('No anchor #')
+
+@contextmanager
+def _quiet_cross_chunk_anchors():
+    weasyprint_logger = logging.getLogger('weasyprint')
+    anchor_filter = _CrossChunkAnchorFilter()
+    weasyprint_logger.addFilter(anchor_filter)
+    try:
+        yield
+    finally:
+        weasyprint_logger.removeFilter(anchor_filter)
+
+class ChunkedRenderer:
+    """Full builds laid out a few documents at a time, so peak memory follows the chunk, not the package.
+
+    WeasyPrint keeps the whole layout tree until a document is written. Here
+    each chunk is rendered standalone (the cover stays with the first chunk,
+    later chunks carry the running header/footer) with page numbering
+    continued from the previous chunk, written to a temporary PDF and its
+    layout released before the next one starts. The merge keeps every chunk's
+    outline and in-chunk links; links whose anchor sits in another chunk,
+    which WeasyPrint drops, are re-created from the recorded positions.
+    target-counter() only sees its own chunk, so when the first chunk holds a
+    table of contents it is laid out once more with page numbers taken from
+    every chunk's anchors.
+    """
+
+    def __init__(self, pdf_renderer, max_documents: int = 0, max_html_bytes: int = 0):
+        self.renderer = pdf_renderer
+        self.max_documents = max_documents
+        self.max_html_bytes = max_html_bytes
+
+    @classmethod
+    def from_config(cls, pdf_renderer) -> 'ChunkedRenderer | None':
+        """The configured chunked renderer, or None when build.render_chunk_* leave chunking off."""
+        config = pdf_renderer.config
+        max_documents = int(config.get('build.render_chunk_documents', 0) or 0)
+        max_html_mb = float(config.get('build.render_chunk_html_mb', 0) or 0)
+        if not max_documents and not max_html_mb:
+            return None
+        return cls(pdf_renderer, max_documents, int(max_html_mb * 1024 * 1024))
+
+    def render(self, spool: HTMLSpool, output_file: str, profile=None) -> dict:
+        """Render the spooled package chunk by chunk into output_file; returns chunk and page counts."""
+        css_content = self.renderer.get_render_css()
+        groups = spool.document_groups(self.max_documents, self.max_html_bytes)
+        running = b''.join(spool.iter_bytes(*spool.running_range)) if spool.running_range else b''
+        anchors: dict[str, tuple[int, float, float]] = {}  # name -> (page index, x, y) in PDF points
+        links: list[tuple[int, tuple, str]] = []  # (page index, rect, anchor) for links leaving their chunk
+        parts = []
+        page_offset = 0
+        with tempfile.TemporaryDirectory(prefix='mc-chunks-') as workdir, _quiet_cross_chunk_anchors():
+            for index, (start, end) in enumerate(groups):
+                if profile:
+                    profile.advance(index / len(groups), f"Rendering chunk {index + 1}/{len(groups)}...")
+                html_content = ((running if index else b'') + b''.join(spool.iter_bytes(start, end))).decode('utf-8')
+                part = Path(workdir) / f"chunk-{index:04d}.pdf"
+                page_count = self._render_chunk(html_content, css_content, page_offset, part, profile, anchors, links)
+                del html_content
+                parts.append(part)
+                page_offset += page_count
+                if index == 0:
+                    first_pages = page_count
+            if len(parts) > 1:
+                self._renumber_toc(spool, groups[0], css_content, parts[0], first_pages, anchors, profile)
+            if profile:
+                profile.advance(1.0, f"Merging {len(parts)} chunks...")
+            with timed(profile, 'merge'):
+                self._merge(parts, output_file, anchors, links)
+        logger.info(f"Chunked render: {len(parts)} chunks, {page_offset} pages, {len(links)} cross-chunk links")
+        return {'chunks': len(parts), 'pages': page_offset, 'cross_chunk_links': len(links)}
+
+    def _render_chunk(self, html_content: str, css_content: str, page_offset: int, part: Path, profile,
+                      anchors: dict | None = None, links: list | None = None) -> int:
+        """Lay out and write one chunk (recording its anchors and links if given); returns its page count."""
+        with timed(profile, 'chunk'):
+            document = self.renderer.layout_segment(html_content, css_content, page_offset, profile)
+            if anchors is not None:
+                self._collect_links(document, page_offset, anchors, links)
+            with timed(profile, 'draw'):
+                document.write_pdf(str(part))
+            page_count = len(document.pages)
+            del document
+            gc.collect()  # Layout trees are full of reference cycles; free them before the next chunk
+        return page_count
+
+    def _renumber_toc(self, spool: HTMLSpool, group: tuple[int, int], css_content: str, part: Path,
+                      page_count: int, anchors: dict, profile=None):
+        """Re-render the first chunk with TOC page numbers for headings in every chunk."""
+        html_content = number_toc(b''.join(spool.iter_bytes(*group)).decode('utf-8'), anchors)
+        if html_content is None:
+            return
+        if profile:
+            profile.message("Numbering table of contents...")
+        numbered_part = part.with_name(part.stem + '-toc.pdf')
+        if self._render_chunk(html_content, css_content, 0, numbered_part, profile) != page_count:
+            # Later chunks' page numbers and links assume the first layout
+            logger.warning("Numbered table of contents changed the first chunk's page count; keeping chunk-local numbers")
+            return
+        numbered_part.replace(part)
+
+    @staticmethod
+    def _collect_links(document, first_page: int, anchors: dict, links: list):
+        """Record this chunk's anchors and its internal links to anchors it does not contain."""
+        chunk_anchors = set()
+        for number, page in enumerate(document.pages, start=first_page):
+            for name, (x, y) in page.anchors.items():
+                chunk_anchors.add(name)
+                anchors.setdefault(name, (number, x * PX_TO_PT, (page.height - y) * PX_TO_PT))  # First one wins
+        for number, page in enumerate(document.pages, start=first_page):
+            for link_type, target, (x1, y1, x2, y2), _ in page.links:
+                if link_type == 'internal' and target not in chunk_anchors:
+                    rect = (x1 * PX_TO_PT, (page.height - y2) * PX_TO_PT, x2 * PX_TO_PT, (page.height - y1) * PX_TO_PT)
+                    links.append((number, rect, target))
+
+    @staticmethod
+    def _merge(parts: list[Path], output_file: str, anchors: dict, links: list):
+        from pypdf import PdfWriter
+        from pypdf.generic import ArrayObject, DictionaryObject, FloatObject, NameObject, NumberObject
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(str(part), import_outline=True)  # Outline, named destinations and in-chunk links
+        missing = set()
+        for page_index, rect, name in links:
+            target = anchors.get(name)
+            if target is None:
+                missing.add(name)
+                continue
+            target_page, x, y = target
+            # Built by hand as a GoTo action: pypdf's Link helper stores a page index, valid only for remote GoTo
+            writer.add_annotation(page_index, DictionaryObject({
+                NameObject('/Type'): NameObject('/Annot'),
+                NameObject('/Subtype'): NameObject('/Link'),
+                NameObject('/Rect'): ArrayObject(FloatObject(value) for value in rect),
+                NameObject('/Border'): ArrayObject([NumberObject(0)] * 3),
+                NameObject('/A'): DictionaryObject({
+                    NameObject('/S'): NameObject('/GoTo'),
+                    NameObject('/D'): ArrayObject([
+                        writer.pages[target_page].indirect_reference, NameObject('/XYZ'),
+                        FloatObject(x), FloatObject(y), NumberObject(0)
+                    ]),
+                }),
+            }))
+        if missing:
+            logger.warning(f"No anchor for internal links: {', '.join(sorted(missing))}")
+        output_path = Path(output_file)
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            writer.write(f)
+        writer.close()
+        tmp_path.replace(output_path)
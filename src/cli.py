@@ -0,0 +1,265 @@
+# Filename: src/cli.py
+import argparse
+import json
+import logging
+import os
+import sys
+import yaml
+from .config import ConfigManager
+from .order_manifest import recover_interrupted_reorder
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_BUILD_FAILED = 1
+EXIT_INVALID_INPUT = 3
+EXIT_REGRESSION = 4
+
+def parse_override(override: str) -> tuple[str, object]:
+    """Split a KEY=VALUE override; VALUE is parsed as YAML so numbers and booleans keep their type."""
+    key, sep, raw_value = override.partition('=')
+    if not sep or not key.strip():
+        raise argparse.ArgumentTypeError(f"Override must look like key.path=value: {override}")
+    return key.strip(), yaml.safe_load(raw_value) if raw_value.strip() else ''
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='mc-assembler', description='Machine Corps PDF Assembler')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('gui', help='Launch the graphical editor (default)')
+
+    build = subparsers.add_parser('build', help='Build the PDF headlessly (no Qt required)')
+    build.add_argument('--config', default='config.yaml', help='Path to config.yaml')
+    build.add_argument('--input', dest='input_folder', help='Override input_folder')
+    build.add_argument('--output', dest='output_file', help='Override output_file')
+    build.add_argument('--classification', help='Override classification marking')
+    build.add_argument('--incremental', action='store_true', help='Reuse cached per-document PDF segments')
+    build.add_argument('--force', action='store_true', help='Rebuild even if inputs are unchanged')
+    build.add_argument('--workers', type=int, help='Markdown conversion processes (0 = serial)')
+    build.add_argument('--worker', action='store_true', help='Hand the build to a running render worker')
+    build.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                       help='Also dump a profiler report next to the output')
+    build.add_argument('--watch', action='store_true', help='Rebuild incrementally whenever inputs, config or styles change')
+    build.add_argument('--variants', action='store_true', help='Build every output variant declared under variants:')
+    build.add_argument('--variant', dest='variant_names', action='append', metavar='NAME',
+                       help='Build only this variant (repeatable)')
+    build.add_argument('--set', dest='overrides', action='append', default=[], type=parse_override,
+                       metavar='KEY=VALUE', help='Override any config value, e.g. header.height=30')
+    build.add_argument('-v', '--verbose', action='store_true', help='Log progress to stderr')
+
+    worker = subparsers.add_parser('worker', help='Run a persistent render worker that keeps WeasyPrint warm')
+    worker.add_argument('--config', default='config.yaml', help='Path to config.yaml')
+    worker.add_argument('--status', action='store_true', help='Report whether a worker is running')
+    worker.add_argument('--stop', action='store_true', help='Stop the running worker')
+    worker.add_argument('-v', '--verbose', action='store_true', help='Log jobs to stderr')
+
+    bench = subparsers.add_parser('bench', help='Time every build stage on synthetic packages')
+    bench.add_argument('--scales', default='10,100,500,2000', help='Comma-separated document counts')
+    bench.add_argument('--repeat', type=int, default=1, help='Runs per scale (fastest is kept)')
+    bench.add_argument('--workers', type=int, default=0, help='Markdown conversion processes (0 = serial)')
+    bench.add_argument('--no-render', dest='render', action='store_false', help='Skip WeasyPrint layout, write and hash')
+    bench.add_argument('--output', help='Also write the JSON report to this file')
+    bench.add_argument('--baseline', help='Compare against a stored report; exit 4 on regression')
+    bench.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown vs baseline (0.25 = 25%%)')
+
+    report = subparsers.add_parser('startup-report', help='Measure module import cost with -X importtime')
+    report.add_argument('--module', default='src.gui.main_window', help='Module whose import is measured')
+    report.add_argument('--top', type=int, default=20, help='Number of slowest modules to list')
+    report.add_argument('--output', help='Also write the JSON report to this file')
+    return parser
+
+def apply_overrides(config_manager: ConfigManager, args) -> None:
+    """Apply command-line overrides to the in-memory config (never saved)."""
+    for key, value in args.overrides:
+        config_manager.set(key, value)
+    for key in ('input_folder', 'output_file', 'classification'):
+        if getattr(args, key) is not None:
+            config_manager.set(key, getattr(args, key))
+    if args.incremental:
+        config_manager.set('build.incremental', True)
+    if args.workers is not None:
+        config_manager.set('build.parallel_workers', args.workers)
+    if args.worker:
+        config_manager.set('build.use_worker', True)
+    if args.profile:
+        config_manager.set('build.profiler', args.profile)
+
+def run_build(args) -> int:
+    config_manager = ConfigManager(args.config)
+    apply_overrides(config_manager, args)
+    input_folder = config_manager.get('input_folder')
+    output_file = config_manager.get('output_file')
+    if not os.path.isdir(input_folder):
+        print(json.dumps({'status': 'error', 'error': f"Input folder does not exist: {input_folder}"}))
+        return EXIT_INVALID_INPUT
+
+    try:
+        if recover_interrupted_reorder(input_folder) is not None:
+            logger.warning("Rolled back an interrupted file reorder before building")
+    except (OSError, ValueError, KeyError) as e:
+        print(json.dumps({'status': 'error', 'error': f"Cannot recover interrupted reorder: {e}"}))
+        return EXIT_INVALID_INPUT
+
+    if args.variants or args.variant_names:
+        return run_variant_build(config_manager, args, input_folder)
+
+    if config_manager.get('build.use_worker', False) and not args.watch:
+        from .render_worker import WorkerUnavailable, submit_build
+        try:
+            print(json.dumps(submit_build(config_manager, input_folder, output_file, force=args.force)))
+            return EXIT_OK
+        except WorkerUnavailable as e:
+            logger.warning(f"{e}; building in-process")
+        except Exception as e:
+            print(json.dumps({'status': 'error', 'error': str(e)}))
+            return EXIT_BUILD_FAILED
+
+    # Heavy modules are imported only once a build is actually requested
+    from .builder import build_package
+    from .html_generator import HTMLGenerator
+    from .pdf_renderer import PDFRenderer
+
+    progress = (lambda message: print(message, file=sys.stderr)) if args.verbose else None
+    html_generator = HTMLGenerator(config_manager)
+    try:
+        if args.watch:
+            return watch_builds(config_manager, args, html_generator, progress)
+        summary = build_package(
+            html_generator, PDFRenderer(config_manager), input_folder, output_file, progress, force=args.force
+        )
+    except Exception as e:
+        logger.error(f"Headless build failed: {e}")
+        print(json.dumps({'status': 'error', 'error': str(e)}))
+        return EXIT_BUILD_FAILED
+    finally:
+        html_generator.shutdown()
+    print(json.dumps(summary))
+    return EXIT_OK
+
+def run_variant_build(config_manager: ConfigManager, args, input_folder: str) -> int:
+    """Build the declared variants in-process (the render worker and watch mode build a single output)."""
+    from .html_generator import HTMLGenerator
+    from .variants import build_variants, load_variants
+    try:
+        variants = load_variants(config_manager, args.variant_names)
+    except ValueError as e:
+        print(json.dumps({'status': 'error', 'error': str(e)}))
+        return EXIT_INVALID_INPUT
+    if not variants:
+        print(json.dumps({'status': 'error', 'error': 'No variants are declared in the config'}))
+        return EXIT_INVALID_INPUT
+
+    progress = (lambda message: print(message, file=sys.stderr)) if args.verbose else None
+    html_generator = HTMLGenerator(config_manager)
+    try:
+        summary = build_variants(html_generator, input_folder, variants, progress, force=args.force)
+    except Exception as e:
+        logger.error(f"Variant build failed: {e}")
+        print(json.dumps({'status': 'error', 'error': str(e)}))
+        return EXIT_BUILD_FAILED
+    finally:
+        html_generator.shutdown()
+    print(json.dumps(summary))
+    return EXIT_BUILD_FAILED if summary['status'] == 'error' else EXIT_OK
+
+def watch_builds(config_manager: ConfigManager, args, html_generator, progress) -> int:
+    """Build once, then rebuild incrementally after every burst of changes; prints one JSON line per build."""
+    from .builder import build_package
+    from .pdf_renderer import PDFRenderer
+    from .watcher import WatchTargets, Watcher
+
+    config_manager.set('build.incremental', True)  # Only changed or shifted documents are re-rendered
+    input_folder = config_manager.get('input_folder')
+    output_file = config_manager.get('output_file')
+    watcher = Watcher(
+        WatchTargets(input_folder, args.config),
+        debounce=config_manager.get('watch.debounce_ms', 300) / 1000,
+        poll_interval=config_manager.get('watch.poll_interval', 1.0),
+    )
+    changes = None
+    try:
+        while True:
+            try:
+                summary = build_package(html_generator, PDFRenderer(config_manager), input_folder, output_file, progress)
+            except Exception as e:
+                logger.error(f"Watch build failed: {e}")
+                summary = {'status': 'error', 'error': str(e)}
+            if changes is not None:
+                summary['changes'] = changes.as_dict()
+            print(json.dumps(summary), flush=True)
+            changes = watcher.wait_for_changes()
+            if changes.config:
+                config_manager.load_config()
+                apply_overrides(config_manager, args)
+                config_manager.set('build.incremental', True)
+            if progress:
+                progress("Changes detected, rebuilding...")
+    except KeyboardInterrupt:
+        return EXIT_OK
+    finally:
+        watcher.close()
+
+def run_worker(args) -> int:
+    from .render_worker import RenderWorker, WorkerUnavailable, create_authkey, key_path, ping, stop_worker, worker_address
+    config_manager = ConfigManager(args.config)
+    if args.status or args.stop:
+        try:
+            reply = stop_worker(config_manager) if args.stop else ping(config_manager)
+        except WorkerUnavailable as e:
+            print(json.dumps({'status': 'error', 'error': str(e)}))
+            return EXIT_BUILD_FAILED
+        print(json.dumps(reply))
+        return EXIT_OK
+    worker = RenderWorker(worker_address(config_manager), create_authkey(key_path(config_manager)))
+    worker.warm()
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return EXIT_OK
+
+def run_bench(args) -> int:
+    from .benchmark import compare_reports, load_report, run_benchmark
+    try:
+        scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+    except ValueError:
+        print(json.dumps({'status': 'error', 'error': f"Invalid --scales: {args.scales}"}))
+        return EXIT_INVALID_INPUT
+    report = run_benchmark(
+        scales, repeat=args.repeat, render=args.render, workers=args.workers,
+        progress=lambda message: print(message, file=sys.stderr)
+    )
+    code = EXIT_OK
+    if args.baseline:
+        regressions = compare_reports(report, load_report(args.baseline), args.threshold)
+        report['regressions'] = regressions
+        code = EXIT_REGRESSION if regressions else EXIT_OK
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return code
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == 'build':
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+        return run_build(args)
+    if args.command == 'worker':
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+        return run_worker(args)
+    if args.command == 'bench':
+        return run_bench(args)
+    if args.command == 'startup-report':
+        from .startup_report import collect_import_report
+        report = collect_import_report(args.module, args.top)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+        return EXIT_OK if report['ok'] else EXIT_BUILD_FAILED
+    from src.gui.main_window import main as gui_main  # Qt is loaded only for the GUI
+    return gui_main()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,68 @@
 # Filename: src/config.py
+import copy
 import os
-import re                      # <-- Added missing import
+import threading
 import yaml
 import logging
+from functools import lru_cache
 from pathlib import Path
+from .config_snapshot import SECTION_ALIASES, ConfigChange, ConfigSnapshot, diff_config
+from .css_template import CSSParams, compile_template, load_template
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=512)
+def _split_key(key: str) -> tuple[str, ...]:
+    return tuple(key.split('.'))
+
 class ConfigManager:
-    """Central configuration manager with runtime binding and persistence."""
+    """Central configuration manager with runtime binding and persistence.
+
+    Every change made through set() or load_config() (or announced with
+    commit() after editing the config dicts in place) bumps `revision` and
+    is reported to listeners as a ConfigChange naming the sections and keys
+    that changed. snapshot() returns an immutable, typed view of the current
+    revision for consumers that should only recompute what changed.
+    """
     
     DEFAULTS = {
         'input_folder': 'inputs/',
         'output_file': 'machine_corps_policy_package.pdf',
         'classification': '',
         'use_latex_fallback': False,
+        'build': {
+            'fragment_cache_mb': 64,
+            'parallel_workers': 0,
+            'incremental': False,
+            'cache_dir': '.mc_cache',
+            'write_manifest': True,
+            'skip_unchanged': True,
+            'latex_chunks': 1,
+            'html_spool_mb': 32,
+            'render_chunk_documents': 0,
+            'render_chunk_html_mb': 0,
+            'variant_workers': 2,
+            'write_report': True,
+            'profiler': '',
+            'use_worker': False,
+            'worker_address': ''
+        },
+        'watch': {
+            'debounce_ms': 300,
+            'poll_interval': 1.0,
+            'auto_build': False
+        },
+        'images': {
+            'target_dpi': 200,
+            'max_width_in': 6.5,
+            'jpeg_quality': 85
+        },
+        'variants': [],
+        'toc': {
+            'enabled': False,
+            'title': 'Table of Contents',
+            'depth': 3
+        },
         'cover': {
             'lines': [
                 {'text': 'THE MACHINE CORPS INITIATIVE', 'align': 'center', 'font': 'Times New Roman', 'size': 56, 'bold': True, 'italic': False},
@@ -48,13 +96,36 @@ class ConfigManager:
 
     def __init__(self, config_path: str = 'config.yaml'):
         self.config_path = Path(config_path)
-        self.config = self.load_config()
+        self._init_tracking()
+        self.load_config()
+
+    @classmethod
+    def from_dict(cls, config: dict, config_path: str = 'config.yaml') -> 'ConfigManager':
+        """Build a manager around an already-effective config (e.g. one sent to a render worker)."""
+        manager = cls.__new__(cls)
+        manager.config_path = Path(config_path)
+        manager._init_tracking()
+        manager.config = copy.deepcopy(config)
+        manager.commit()
+        return manager
+
+    def _init_tracking(self):
+        self.config: dict = {}
+        self.revision = 0
+        self.saved_revision = 0  # Revision last loaded from or saved to config_path
+        self._committed: dict = {}
+        self._snapshot: ConfigSnapshot | None = None
+        self._listeners = []
+        self._lock = threading.Lock()  # Preview workers take snapshots off the GUI thread
 
     def load_config(self) -> dict:
-        """Load config from YAML with defaults and validation."""
+        """Load config from YAML with defaults and validation.
+
+        The config dict is updated in place, so widgets holding its sections stay bound.
+        """
         if not self.config_path.exists():
             logger.warning("config.yaml not found – creating with defaults")
-            self.config = self.DEFAULTS.copy()
+            self._replace(copy.deepcopy(self.DEFAULTS))
             self.save_config()
             return self.config
 
@@ -62,7 +133,7 @@ class ConfigManager:
             loaded = yaml.safe_load(f) or {}
 
         # Deep merge with defaults
-        config = self.DEFAULTS.copy()
+        config = copy.deepcopy(self.DEFAULTS)
         for key, value in loaded.items():
             if isinstance(value, dict) and key in config and isinstance(config[key], dict):
                 config[key] = {**config[key], **value}
@@ -74,52 +145,123 @@ class ConfigManager:
             logger.warning("Invalid input_folder – resetting to default")
             config['input_folder'] = self.DEFAULTS['input_folder']
 
-        self.config = config
-        return config
+        self._replace(config)
+        self.saved_revision = self.revision
+        return self.config
+
+    def _replace(self, config: dict):
+        for name, value in config.items():
+            current = self.config.get(name)
+            if isinstance(current, dict) and isinstance(value, dict):
+                current.clear()
+                current.update(value)
+            else:
+                self.config[name] = value
+        for name in self.config.keys() - config.keys():
+            del self.config[name]
+        self.commit()
 
     def save_config(self):
         """Persist configuration to YAML."""
+        self.commit()
         with open(self.config_path, 'w', encoding='utf-8') as f:
             yaml.dump(self.config, f, default_flow_style=False, sort_keys=False)
+        self.saved_revision = self.revision
+
+    @property
+    def has_unsaved_changes(self) -> bool:
+        """True if edits were committed since the config was last loaded or saved."""
+        return self.revision != self.saved_revision
 
     def get(self, key: str, default=None):
         """Safe accessor for nested config values."""
-        keys = key.split('.')
+        keys = _split_key(key)
         value = self.config
         for k in keys:
             value = value.get(k, default if k == keys[-1] else {})
         return value
 
     def set(self, key: str, value):
-        """Safe setter for nested config values."""
-        keys = key.split('.')
+        """Safe setter for nested config values; notifies listeners if the value changed.
+
+        Only the set path is compared and copied (GUI fields call this on every
+        keystroke); whole sections and pending in-place edits go through commit().
+        """
+        keys = _split_key(key)
         d = self.config
         for k in keys[:-1]:
             d = d.setdefault(k, {})
         d[keys[-1]] = value
+        if len(keys) == 1 and isinstance(value, dict):
+            self.commit()
+        else:
+            self._commit_path(keys, value)
 
-    def update_css_placeholders(self, css_content: str) -> str:
-        """Apply current config values to CSS via string replacement."""
-        header_height = str(self.config['header']['height'] + 20)
-        footer_height = str(self.config['footer']['height'] + 20)
-        cover_bg = self.config['cover']['bg_color']
-        cover_padding = str(self.config['cover']['padding_top'])
-        classification = self.config['classification']
-
-        css_content = css_content.replace("margin-top: 20pt;", f"margin-top: {header_height}pt;")
-        css_content = css_content.replace("margin-bottom: 20pt;", f"margin-bottom: {footer_height}pt;")
-        css_content = css_content.replace("background: #0b2545;", f"background: {cover_bg};")
-        css_content = css_content.replace("padding-top: 180pt;", f"padding-top: {cover_padding}pt;")
-
-        if not classification:
-            # Remove entire banner block when classification is empty
-            css_content = re.sub(
-                r'/\* Classification Banners.*?@page\s*\{.*?\}\s*\}\s*/\*\s*Table of Contents',
-                '/* Table of Contents',
-                css_content,
-                flags=re.DOTALL
+    def _commit_path(self, keys: tuple[str, ...], value):
+        """commit() for a single set path, without diffing or copying the rest of the config."""
+        with self._lock:
+            committed = self._committed
+            for k in keys[:-1]:
+                committed = committed.setdefault(k, {}) if isinstance(committed, dict) else None
+            if not isinstance(committed, dict):
+                committed = None
+            elif keys[-1] in committed and committed[keys[-1]] == value:
+                return None
+        if committed is None:  # The committed config has a non-dict on this path: fall back to a full diff
+            return self.commit()
+        with self._lock:
+            committed[keys[-1]] = copy.deepcopy(value)
+            self.revision += 1
+            self._snapshot = None
+            name = keys[0]
+            change = ConfigChange(
+                self.revision, frozenset({SECTION_ALIASES.get(name, name)}),
+                frozenset({'.'.join(keys[:2])})  # Keys go down to the second level, as in diff_config
             )
-        else:
-            css_content = css_content.replace('content: "";', f'content: "{classification}";')
+        self._notify(change)
+        return change
+
+    def commit(self) -> ConfigChange | None:
+        """Record edits made since the last commit as a new revision and notify listeners.
+
+        Returns the change, or None if nothing differs from the last revision.
+        """
+        with self._lock:
+            sections, keys = diff_config(self._committed, self.config)
+            if not sections:
+                return None
+            self.revision += 1
+            self._committed = copy.deepcopy(self.config)
+            self._snapshot = None
+            change = ConfigChange(self.revision, frozenset(sections), frozenset(keys))
+        self._notify(change)
+        return change
+
+    def _notify(self, change: ConfigChange):
+        logger.debug(f"Config revision {change.revision}: {', '.join(sorted(change.keys))}")
+        for listener in list(self._listeners):
+            listener(change)
+
+    def add_listener(self, callback):
+        """Call callback(ConfigChange) after every committed change."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Immutable, typed view of the last committed revision (built once per revision)."""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = ConfigSnapshot.from_config(self._committed, self.revision)
+            return self._snapshot
+
+    def css_params(self) -> CSSParams:
+        """The config values the render CSS depends on (hashable, used as a cache key)."""
+        return self.snapshot().css_params
 
-        return css_content
\ No newline at end of file
+    def update_css_placeholders(self, css_content: str | None = None) -> str:
+        """Apply current config values to CSS (default: styles.txt) via the cached, compiled slot template."""
+        template = load_template() if css_content is None else compile_template(css_content)
+        return template.render(self.css_params())
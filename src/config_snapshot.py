@@ -0,0 +1,100 @@
+# Filename: src/config_snapshot.py
+from dataclasses import dataclass
+from typing import NamedTuple
+from .css_template import CSSParams
+
+# Top-level keys reported under a shared section name in change events
+SECTION_ALIASES = {'input_folder': 'paths', 'output_file': 'paths'}
+
+@dataclass(frozen=True, slots=True)
+class TextLine:
+    """One styled line of cover, header or footer text."""
+    text: str = ''
+    align: str = 'center'
+    font: str = 'Times New Roman'
+    size: int = 12
+    bold: bool = False
+    italic: bool = False
+
+    @classmethod
+    def from_dict(cls, line: dict) -> 'TextLine':
+        return cls(**{name: line[name] for name in cls.__slots__ if name in line})
+
+@dataclass(frozen=True, slots=True)
+class CoverConfig:
+    lines: tuple[TextLine, ...]
+    bg_color: str
+    padding_top: int
+
+@dataclass(frozen=True, slots=True)
+class RunningConfig:
+    """Running header or footer."""
+    lines: tuple[TextLine, ...]
+    height: int
+    color: str
+
+def _lines(section: dict) -> tuple[TextLine, ...]:
+    return tuple(TextLine.from_dict(line) for line in section.get('lines') or ())
+
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """Immutable, typed view of the config at one revision.
+
+    Sections are hashable, so renderers can memoise on exactly the section
+    they read: a cover edit leaves cached header output (and vice versa) valid.
+    """
+    revision: int
+    input_folder: str
+    output_file: str
+    classification: str
+    cover: CoverConfig
+    header: RunningConfig
+    footer: RunningConfig
+
+    @classmethod
+    def from_config(cls, config: dict, revision: int = 0) -> 'ConfigSnapshot':
+        cover, header, footer = config['cover'], config['header'], config['footer']
+        return cls(
+            revision=revision,
+            input_folder=config['input_folder'],
+            output_file=config['output_file'],
+            classification=config.get('classification', '') or '',
+            cover=CoverConfig(_lines(cover), cover['bg_color'], cover['padding_top']),
+            header=RunningConfig(_lines(header), header['height'], header['color']),
+            footer=RunningConfig(_lines(footer), footer['height'], footer['color']),
+        )
+
+    @property
+    def css_params(self) -> CSSParams:
+        return CSSParams(
+            header_margin=self.header.height + 20,
+            footer_margin=self.footer.height + 20,
+            cover_bg=self.cover.bg_color,
+            cover_padding=self.cover.padding_top,
+            classification=self.classification,
+        )
+
+class ConfigChange(NamedTuple):
+    """What one commit changed: section names (cover, header, footer, classification, paths, build, ...)
+    and the dotted keys beneath them (cover.bg_color, header.lines, classification)."""
+    revision: int
+    sections: frozenset
+    keys: frozenset
+
+    def touches(self, *prefixes: str) -> bool:
+        """True if any changed key is one of prefixes or lies beneath one."""
+        return any(key == prefix or key.startswith(prefix + '.') for key in self.keys for prefix in prefixes)
+
+def diff_config(old: dict, new: dict) -> tuple[set, set]:
+    """(sections, keys) that differ between two config dicts, keys down to the second level."""
+    sections, keys = set(), set()
+    for name in old.keys() | new.keys():
+        before, after = old.get(name), new.get(name)
+        if before == after:
+            continue
+        sections.add(SECTION_ALIASES.get(name, name))
+        if isinstance(before, dict) and isinstance(after, dict):
+            keys.update(f"{name}.{key}" for key in before.keys() | after.keys() if before.get(key) != after.get(key))
+        else:
+            keys.add(name)
+    return sections, keys
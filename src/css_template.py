@@ -0,0 +1,122 @@
+# Filename: src/css_template.py
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from string import Template
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+BASE_CSS_PATH = os.path.join(os.path.dirname(__file__), 'resources', 'styles.txt')
+
+BANNER_BLOCK = re.compile(
+    r'/\* Classification Banners.*?@page\s*\{.*?\}\s*\}\s*(?=/\*\s*Table of Contents)',
+    flags=re.DOTALL
+)
+
+# Literal values in styles.txt that config overrides, and the slot each becomes
+SLOTS = (
+    ("margin-top: 20pt;", "margin-top: ${header_margin}pt;"),
+    ("margin-bottom: 20pt;", "margin-bottom: ${footer_margin}pt;"),
+    ("background: #0b2545;", "background: ${cover_bg};"),
+    ("padding-top: 180pt;", "padding-top: ${cover_padding}pt;"),
+)
+
+class CSSParams(NamedTuple):
+    """The config values the stylesheet depends on; also the cache key for rendered CSS."""
+    header_margin: int
+    footer_margin: int
+    cover_bg: str
+    cover_padding: int
+    classification: str
+
+class CSSTemplate:
+    """styles.txt compiled once into a string.Template with named slots.
+
+    The classification banner block is its own slot so it can be dropped when
+    no marking is set. Rendering is a single substitute() call, memoised per
+    CSSParams value.
+    """
+
+    def __init__(self, css_source: str):
+        body = css_source.replace('$', '$$')
+        for literal, slot in SLOTS:
+            body = body.replace(literal, slot)
+        match = BANNER_BLOCK.search(body)
+        banner = ''
+        if match:
+            banner = match.group(0).replace('content: "";', 'content: "${classification}";')
+            body = body[:match.start()] + '${classification_block}' + body[match.end():]
+        self.template = Template(body)
+        self.banner_template = Template(banner)
+        self.render = lru_cache(maxsize=64)(self._render)
+
+    def _render(self, params: CSSParams) -> str:
+        classification_block = ''
+        if params.classification:
+            escaped = css_string(params.classification)
+            classification_block = self.banner_template.substitute(classification=escaped)
+        return self.template.substitute(
+            header_margin=params.header_margin,
+            footer_margin=params.footer_margin,
+            cover_bg=params.cover_bg,
+            cover_padding=params.cover_padding,
+            classification_block=classification_block,
+        )
+
+def css_string(text: str) -> str:
+    """Escape text for a double-quoted CSS string; a raw newline would end the string, so it becomes \\A."""
+    escaped = text.replace('\\', '\\\\').replace('"', '\\"')
+    return escaped.replace('\r\n', '\n').replace('\r', '\n').replace('\n', '\\A ')
+
+_templates: dict[str, tuple[int, CSSTemplate]] = {}
+_templates_lock = threading.Lock()
+
+@lru_cache(maxsize=8)
+def compile_template(css_source: str) -> CSSTemplate:
+    """The compiled template for a stylesheet's text, shared by every caller passing the same text."""
+    logger.debug("Compiled CSS template")
+    return CSSTemplate(css_source)
+
+def load_template(path: str = BASE_CSS_PATH) -> CSSTemplate:
+    """Return the compiled template for path, re-reading the file only when its mtime changes."""
+    mtime = os.stat(path).st_mtime_ns
+    with _templates_lock:
+        cached = _templates.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            template = compile_template(f.read())
+        _templates[path] = (mtime, template)
+        return template
+
+class StylesheetCache:
+    """Parsed WeasyPrint CSS objects keyed by rendered CSS text (LRU, small)."""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, css_content: str, factory):
+        """Return the parsed stylesheet for css_content, calling factory(css_content) on a miss."""
+        with self._lock:
+            stylesheet = self._entries.get(css_content)
+            if stylesheet is not None:
+                self._entries.move_to_end(css_content)
+                self.hits += 1
+                return stylesheet
+        stylesheet = factory(css_content)
+        with self._lock:
+            self.misses += 1
+            self._entries[css_content] = stylesheet
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return stylesheet
+
+stylesheet_cache = StylesheetCache()
@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 from PyQt6.QtWidgets import QListWidget, QListWidgetItem
 from PyQt6.QtCore import Qt
+from src.order_manifest import materialize_prefixes, order_manifest_for
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +17,9 @@ class FileManager:
         self.file_list_widget = None  # Store widget reference
 
     def scan_files(self):
-        """Scan for Markdown files in the input folder."""
-        return sorted([f for f in self.input_folder.glob('*.md') if f.is_file()], key=lambda f: f.name)
+        """Scan for Markdown files in the input folder, in order.yaml order when one exists."""
+        files = sorted([f for f in self.input_folder.glob('*.md') if f.is_file()], key=lambda f: f.name)
+        return order_manifest_for(self.input_folder).apply(files)
 
     def get_file_list_widget(self):
         """Create a draggable QListWidget for file reordering."""
@@ -31,30 +33,19 @@ class FileManager:
         return self.file_list_widget
 
     def reorder_files(self, parent, start, end, destination, row):
-        """Reorder physical files based on list movement (e.g., rename with numeric prefixes), handling conflicts."""
+        """Record the list order in order.yaml (one write, no renames)."""
         if not self.file_list_widget:
             logger.error("File list widget not initialized")
             return
-        # Extract current order
-        new_order = [self.file_list_widget.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.file_list_widget.count())]
-        # Rename with prefixes, avoiding conflicts
-        existing_names = set(f.name for f in self.input_folder.glob('*.md'))
-        for idx, old_path_str in enumerate(new_order):
-            old_path = Path(old_path_str)
-            base_name = re.sub(r'^\d{3}-', '', old_path.stem)
-            new_name = f"{idx:03d}-{base_name}.md"
-            # If conflict, append suffix
-            suffix = 0
-            while new_name in existing_names:
-                suffix += 1
-                new_name = f"{idx:03d}-{base_name}_{suffix}.md"
-            new_path = self.input_folder / new_name
-            if old_path_str != str(new_path):
-                logger.info(f"Renaming {old_path} to {new_path}")
-                old_path.rename(new_path)
-            existing_names.add(new_name)
+        new_order = [Path(self.file_list_widget.item(i).data(Qt.ItemDataRole.UserRole)) for i in range(self.file_list_widget.count())]
+        order_manifest_for(self.input_folder).save(new_order)
         self.files = self.scan_files()  # Refresh
 
+    def materialize_prefixes(self):
+        """Rename files with three-digit prefixes matching the current order (order.yaml is kept only if they cannot express it)."""
+        materialize_prefixes(self.files, width=3, folder=self.input_folder)
+        self.files = self.scan_files()
+
     def add_image_placeholder(self, file_path, placeholder):
         """Insert a placeholder like [[image:placeholder]] into the Markdown file."""
         try:
@@ -5,20 +5,29 @@ import logging
 from pathlib import Path
 from PyQt6.QtWidgets import QListWidget, QListWidgetItem, QMessageBox
 from PyQt6.QtCore import Qt
+from src.order_manifest import (
+    ReorderJournal, apply_renames, invert_renames, materialize_prefixes, order_manifest_for, prefixes_keep_order,
+    renamed_paths
+)
 from src.utils import discover_files  # Integrate with existing utils
 
 logger = logging.getLogger(__name__)
 
 class FileOrderManager:
-    """Manages file scanning and reordering with prefix renaming.
+    """Manages file scanning and reordering through the order.yaml manifest.
 
-    Uses src/utils.discover_files for scanning consistency.
+    Uses src/utils.discover_files for scanning consistency. A reorder is one
+    manifest write (no renames); undo swaps the previous order back in.
     """
-    def __init__(self, input_folder):
+    def __init__(self, input_folder, on_change=None):
         self.input_folder = Path(input_folder)
+        self.manifest = order_manifest_for(self.input_folder)
+        self.on_change = on_change  # Called after the reading order changes
+        self.recover_interrupted_renames()
         self.files = self.scan_files()
         self.file_list_widget = None
-        self.previous_order = []  # For basic undo
+        self.previous_order = []  # For undo (a manifest swap)
+        self.last_renames = []  # For undo after materialize_prefixes (the inverse plan)
 
     def scan_files(self):
         """Scan and sort Markdown files using utils.discover_files."""
@@ -37,64 +46,101 @@ class FileOrderManager:
         """Create draggable list widget."""
         self.file_list_widget = QListWidget()
         self.file_list_widget.setDragDropMode(QListWidget.DragDropMode.InternalMove)
-        for file in self.files:
-            item = QListWidgetItem(file.name)
-            item.setData(Qt.ItemDataRole.UserRole, str(file))
-            self.file_list_widget.addItem(item)
+        self._populate()
         self.file_list_widget.model().rowsMoved.connect(self.handle_reorder)
         return self.file_list_widget
 
     def handle_reorder(self, parent, start, end, destination, row):
-        """Rename files with prefixes on reorder, with confirmation and conflict handling.
+        """Save the dragged order to order.yaml; no files are renamed."""
+        new_order = [Path(self.file_list_widget.item(i).data(Qt.ItemDataRole.UserRole)) for i in range(self.file_list_widget.count())]
+        self._set_order(new_order)
 
-        Confirmation is post-drag due to Qt's rowsMoved signal timing.
-        Conflict resolution: Appends suffix if name exists (e.g., _1).
-        """
-        if QMessageBox.question(None, "Confirm Reorder", "Reorder complete. Apply changes by renaming files with prefixes?") != QMessageBox.StandardButton.Yes:
-            self.refresh_widget()  # Revert visual order if canceled
+    def _set_order(self, new_order: list[Path]):
+        previous = list(self.files)
+        try:
+            self.manifest.save(new_order)
+        except OSError as e:
+            logger.error(f"Saving order failed: {e}")
+            QMessageBox.critical(None, "Reorder Error", f"Failed to save {self.manifest.path}: {str(e)}")
+            self.refresh_widget()
             return
-        self.previous_order = [str(f) for f in self.files]  # Save for undo
-        new_order = [Path(self.file_list_widget.item(i).data(Qt.ItemDataRole.UserRole)) for i in range(self.file_list_widget.count())]
-        existing_names = set(f.name for f in self.input_folder.iterdir() if f.is_file())
-        for idx, old_path in enumerate(new_order):
-            try:
-                base_name = re.sub(r'^\d+-', '', old_path.stem)
-                new_name = f"{idx:02d}-{base_name}{old_path.suffix}"
-                suffix = 0
-                while new_name in existing_names:
-                    suffix += 1
-                    new_name = f"{idx:02d}-{base_name}_{suffix}{old_path.suffix}"
-                new_path = self.input_folder / new_name
-                if str(old_path) != str(new_path):
-                    logger.info(f"Renaming {old_path} to {new_path}")
-                    old_path.rename(new_path)
-                existing_names.add(new_name)
-            except (PermissionError, FileNotFoundError, OSError) as e:
-                logger.error(f"Rename failed: {e}")
-                QMessageBox.critical(None, "Rename Error", f"Failed to rename {old_path}: {str(e)}")
+        self.previous_order = [str(f) for f in previous]
         self.files = self.scan_files()
-        self.refresh_widget()
+        if self.on_change:
+            self.on_change()
 
     def refresh_widget(self):
         """Refresh the list after changes."""
         self.file_list_widget.clear()
+        self._populate()
+
+    def _populate(self):
         for file in self.files:
-            item = QListWidgetItem(file.name)
+            item = QListWidgetItem(file.relative_to(self.input_folder).as_posix())
             item.setData(Qt.ItemDataRole.UserRole, str(file))
             self.file_list_widget.addItem(item)
 
     def undo_reorder(self):
-        """Basic undo by reverting to previous order (rename back)."""
-        if not self.previous_order:
-            QMessageBox.information(None, "Undo", "No previous order to undo.")
+        """Swap the previous order back in (undoing twice redoes), or revert the last prefix renames."""
+        if self.previous_order:
+            self._set_order([Path(f) for f in self.previous_order])
+            self.refresh_widget()
             return
-        for old_path_str, new_path in zip(self.previous_order, self.files):
+        if self.last_renames:
+            inverse = invert_renames(self.last_renames)
             try:
-                if Path(old_path_str).name != new_path.name:
-                    new_path.rename(old_path_str)
-            except (PermissionError, FileNotFoundError, OSError) as e:
+                apply_renames(self.input_folder, inverse)
+                # The old names may not spell out the order on their own (it came from order.yaml): record it again
+                restored = renamed_paths(self.files, inverse)
+                if not prefixes_keep_order(restored, self.input_folder):
+                    self.manifest.save(restored)
+            except (OSError, RuntimeError) as e:
                 logger.error(f"Undo failed: {e}")
-                QMessageBox.critical(None, "Undo Error", f"Failed to undo {new_path}: {str(e)}")
+                QMessageBox.critical(None, "Undo Error", f"Failed to undo renames (folder left unchanged): {str(e)}")
+                return
+            self.last_renames = []
+            self.files = self.scan_files()
+            self.refresh_widget()
+            if self.on_change:
+                self.on_change()
+            return
+        QMessageBox.information(None, "Undo", "No previous order to undo.")
+
+    def materialize_prefixes(self):
+        """Write the current order to disk as numeric filename prefixes; order.yaml is dropped if they reproduce it."""
+        if QMessageBox.question(None, "Write Prefixes", "Rename files so their numeric prefixes match the current order?") != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            self.last_renames = materialize_prefixes(self.files, folder=self.input_folder)
+            if self.manifest.entries:
+                QMessageBox.information(
+                    None, "Write Prefixes",
+                    "The order mixes files from different folders, which prefixes alone cannot express; "
+                    f"{self.manifest.path.name} still holds the reading order."
+                )
+        except (OSError, RuntimeError) as e:
+            logger.error(f"Rename failed: {e}")
+            QMessageBox.critical(None, "Rename Error", f"Failed to rename files (folder left unchanged): {str(e)}")
+        self.previous_order = []  # Paths changed; the old order can no longer be swapped back
         self.files = self.scan_files()
         self.refresh_widget()
-        self.previous_order = []
+        if self.on_change:
+            self.on_change()
+
+    def recover_interrupted_renames(self):
+        """Offer to finish or roll back a prefix rename that a crash interrupted."""
+        journal = ReorderJournal(self.input_folder)
+        if not journal.exists():
+            return
+        answer = QMessageBox.question(
+            None, "Interrupted Reorder",
+            "A previous file rename was interrupted. Finish it (Yes) or roll it back to the original names (No)?"
+        )
+        try:
+            if answer == QMessageBox.StandardButton.Yes:
+                journal.replay()
+            else:
+                journal.rollback()
+        except (OSError, ValueError) as e:
+            logger.error(f"Reorder recovery failed: {e}")
+            QMessageBox.critical(None, "Recovery Error", f"Could not recover {journal.path}: {str(e)}")
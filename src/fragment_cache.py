@@ -0,0 +1,70 @@
+# Filename: src/fragment_cache.py
+import logging
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+
+logger = logging.getLogger(__name__)
+
+class FragmentCache:
+    """In-memory LRU cache of rendered HTML fragments keyed by content hash.
+
+    Keys combine the SHA-256 of the source text with a renderer version string,
+    so upgrading mistune or changing CustomRenderer invalidates old entries.
+    Total size is capped in characters (sizeof measures entries that are not
+    plain strings); least recently used entries go first.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()  # Preview and build threads may share a cache
+
+    @staticmethod
+    def make_key(content: str, version: str) -> str:
+        """Build a cache key from source text and renderer version."""
+        return f"{version}:{sha256(content.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str):
+        """Return the cached fragment and mark it as recently used."""
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def put(self, key: str, fragment):
+        """Store a fragment, evicting least recently used entries over the cap."""
+        size = self.sizeof(fragment)
+        if size > self.max_bytes:
+            logger.debug(f"Fragment larger than cache cap ({size} chars); not cached")
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self.sizeof(self._entries.pop(key))
+            self._entries[key] = fragment
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= self.sizeof(evicted)
+
+    def clear(self):
+        """Drop all cached fragments and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: str):
+        return key in self._entries
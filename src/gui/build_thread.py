@@ -1,31 +1,60 @@
 # Filename: src/gui/build_thread.py
 from PyQt6.QtCore import QThread, pyqtSignal
 import logging
+from src.builder import build_package
+from src.render_worker import WorkerUnavailable, submit_build
+from src.variants import build_variants
 
 logger = logging.getLogger(__name__)
 
 class BuildThread(QThread):
     """Non-blocking thread for PDF generation with progress and completion signals."""
-    
+
     progress_update = pyqtSignal(str)
+    progress_percent = pyqtSignal(int)
     finished = pyqtSignal(bool, str)  # success, message/path or error
-    
-    def __init__(self, html_generator, pdf_renderer, input_folder: str, output_file: str):
+
+    def __init__(self, html_generator, pdf_renderer, input_folder: str, output_file: str, variants=None):
         super().__init__()
         self.html_generator = html_generator
         self.pdf_renderer = pdf_renderer
         self.input_folder = input_folder
         self.output_file = output_file
+        self.variants = variants  # Variant list: build those instead of output_file
+        self.summary = None
 
     def run(self):
         try:
-            self.progress_update.emit("Generating HTML content...")
-            html_content = self.html_generator.generate_full_html(self.input_folder)
-            
-            self.progress_update.emit("Rendering PDF...")
-            self.pdf_renderer.render_pdf(html_content, self.output_file, self.progress_update.emit)
-            
+            if self.variants:
+                self._build_variants()
+                return
+            self.summary = self._build_via_worker()
+            if self.summary is None:
+                self.summary = build_package(
+                    self.html_generator, self.pdf_renderer,
+                    self.input_folder, self.output_file, self.progress_update.emit,
+                    percent_callback=self.progress_percent.emit
+                )
             self.finished.emit(True, self.output_file)
         except Exception as e:
             logger.error(f"Build failed in thread: {e}")
-            self.finished.emit(False, str(e))
\ No newline at end of file
+            self.finished.emit(False, str(e))
+
+    def _build_variants(self):
+        self.summary = build_variants(self.html_generator, self.input_folder, self.variants, self.progress_update.emit)
+        failed = [variant for variant in self.summary['variants'] if variant['status'] == 'error']
+        if failed:
+            raise RuntimeError('; '.join(f"{variant['name']}: {variant['error']}" for variant in failed))
+        self.finished.emit(True, self.summary['variants'][0]['output_file'])
+
+    def _build_via_worker(self):
+        """Hand off to a running render worker when build.use_worker is set; None means build in-process."""
+        config = self.html_generator.config
+        if not config.get('build.use_worker', False):
+            return None
+        try:
+            self.progress_update.emit("Sending build to render worker...")
+            return submit_build(config, self.input_folder, self.output_file)
+        except WorkerUnavailable as e:
+            logger.warning(f"{e}; building in-process")
+            return None
@@ -89,7 +89,7 @@ class CoverTab(QWidget):
         global_layout.addRow(padding_label, self.padding_slider)
         
         update_css_btn = QPushButton("Update CSS & Refresh Preview")
-        update_css_btn.clicked.connect(self.parent.live_preview_tab.refresh_preview)
+        update_css_btn.clicked.connect(self.parent.refresh_preview)
         global_layout.addRow(update_css_btn)
         
         save_btn = QPushButton("Save as Default")
@@ -107,10 +107,10 @@ class CoverTab(QWidget):
 
     def on_text_changed(self):
         lines = self.text_edit.toPlainText().split('\n')
-        self.cover['lines'] = [
+        self.config_manager.set('cover.lines', [
             {'text': line.strip(), 'align': 'center', 'font': 'Times New Roman', 'size': 36, 'bold': False, 'italic': False}
             for line in lines if line.strip()
-        ]
+        ])
         self.update_preview()
 
     def apply_styling(self):
@@ -121,18 +121,19 @@ class CoverTab(QWidget):
         italic = self.italic_check.isChecked()
         
         # Apply to all for simplicity (could detect selection)
-        for line in self.cover['lines']:
-            line.update({'align': selected_align, 'font': font, 'size': size, 'bold': bold, 'italic': italic})
+        self.config_manager.set('cover.lines', [
+            dict(line, align=selected_align, font=font, size=size, bold=bold, italic=italic) for line in self.cover['lines']
+        ])
         self.update_preview()
 
     def choose_bg_color(self):
         color = QColorDialog.getColor(initial=QColor(self.cover['bg_color']))
         if color.isValid():
-            self.cover['bg_color'] = color.name()
+            self.config_manager.set('cover.bg_color', color.name())
             self.update_preview()
 
     def on_padding_changed(self, value: int):
-        self.cover['padding_top'] = value
+        self.config_manager.set('cover.padding_top', value)
         self.update_preview()
 
     def update_preview(self):
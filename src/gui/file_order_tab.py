@@ -1,4 +1,5 @@
 # src/gui/file_order_tab.py
+import os
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QMessageBox, QHBoxLayout
 from src.file_order_manager import FileOrderManager
 
@@ -12,14 +13,14 @@ class FileOrderTab(QWidget):
         self.config_manager = config_manager
         self.parent = parent_window
         self.input_folder = self.parent.main_tab.get_input_folder()  # From MainTab
-        self.manager = FileOrderManager(self.input_folder)
+        self.manager = FileOrderManager(self.input_folder, on_change=self.parent.refresh_preview)
         self.layout = QVBoxLayout(self)  # Store layout for reference
         self.init_ui()
         # Connect to input folder changes
         self.parent.main_tab.input_edit.textChanged.connect(self.refresh_list)
 
     def init_ui(self):
-        self.layout.addWidget(QLabel("Drag and drop to reorder files for PDF assembly. Confirm to apply renames."))
+        self.layout.addWidget(QLabel("Drag and drop to reorder files for PDF assembly. The order is saved to order.yaml; files are not renamed."))
 
         self.file_list = self.manager.get_file_list_widget()
         self.layout.addWidget(self.file_list)
@@ -30,9 +31,14 @@ class FileOrderTab(QWidget):
         btn_layout.addWidget(refresh_btn)
 
         undo_btn = QPushButton("Undo Last Reorder")
-        undo_btn.clicked.connect(self.manager.undo_reorder)
+        undo_btn.clicked.connect(lambda: self.manager.undo_reorder())
         btn_layout.addWidget(undo_btn)
 
+        prefix_btn = QPushButton("Write Prefixes to Disk")
+        prefix_btn.setToolTip("Rename files with numeric prefixes matching the current order")
+        prefix_btn.clicked.connect(lambda: self.manager.materialize_prefixes())
+        btn_layout.addWidget(prefix_btn)
+
         self.layout.addLayout(btn_layout)
 
     def refresh_list(self):
@@ -42,7 +48,11 @@ class FileOrderTab(QWidget):
             if not os.path.isdir(new_folder):
                 QMessageBox.warning(self, "Invalid Folder", "Input folder is invalid. Using previous.")
                 return
-            self.manager = FileOrderManager(new_folder)
+            widget = self.manager.file_list_widget
+            self.manager = FileOrderManager(new_folder, on_change=self.parent.refresh_preview)
+            self.manager.file_list_widget = widget
+            widget.model().rowsMoved.disconnect()
+            widget.model().rowsMoved.connect(self.manager.handle_reorder)
         # Clear and repopulate existing widget
         self.manager.files = self.manager.scan_files()
         self.manager.refresh_widget()
@@ -92,7 +92,7 @@ class HeaderFooterTab(QWidget):
         self.header_height = QSlider(Qt.Orientation.Horizontal)
         self.header_height.setRange(10, 100)
         self.header_height.setValue(self.header['height'])
-        self.header_height.valueChanged.connect(lambda v: self.header.update({'height': v}) or self.parent.live_preview_tab.refresh_preview())
+        self.header_height.valueChanged.connect(lambda v: self.config_manager.set('header.height', v))
         height_layout.addRow("Header Height (pt):", self.header_height)
         
         header_color_btn = QPushButton("Header Text Color")
@@ -102,7 +102,7 @@ class HeaderFooterTab(QWidget):
         self.footer_height = QSlider(Qt.Orientation.Horizontal)
         self.footer_height.setRange(10, 100)
         self.footer_height.setValue(self.footer['height'])
-        self.footer_height.valueChanged.connect(lambda v: self.footer.update({'height': v}) or self.parent.live_preview_tab.refresh_preview())
+        self.footer_height.valueChanged.connect(lambda v: self.config_manager.set('footer.height', v))
         height_layout.addRow("Footer Height (pt):", self.footer_height)
         
         footer_color_btn = QPushButton("Footer Text Color")
@@ -110,7 +110,7 @@ class HeaderFooterTab(QWidget):
         height_layout.addRow(footer_color_btn)
         
         update_css_btn = QPushButton("Update CSS & Refresh Preview")
-        update_css_btn.clicked.connect(self.parent.live_preview_tab.refresh_preview)
+        update_css_btn.clicked.connect(self.parent.refresh_preview)
         height_layout.addRow(update_css_btn)
         
         save_btn = QPushButton("Save as Default")
@@ -128,39 +128,38 @@ class HeaderFooterTab(QWidget):
 
     def on_header_text_changed(self):
         lines = self.header_text.toPlainText().split('\n')
-        self.header['lines'] = [{'text': line.strip(), 'align': 'center', 'font': 'Times New Roman', 'size': 10, 'bold': False, 'italic': False} for line in lines if line.strip()]
+        self.config_manager.set('header.lines', [{'text': line.strip(), 'align': 'center', 'font': 'Times New Roman', 'size': 10, 'bold': False, 'italic': False} for line in lines if line.strip()])
 
     def on_footer_text_changed(self):
         lines = self.footer_text.toPlainText().split('\n')
-        self.footer['lines'] = [{'text': line.strip(), 'align': 'center', 'font': 'Times New Roman', 'size': 10, 'bold': False, 'italic': False} for line in lines if line.strip()]
+        self.config_manager.set('footer.lines', [{'text': line.strip(), 'align': 'center', 'font': 'Times New Roman', 'size': 10, 'bold': False, 'italic': False} for line in lines if line.strip()])
 
     def apply_to_header(self):
-        self._apply_styling(self.header['lines'])
+        self._apply_styling('header')
 
     def apply_to_footer(self):
-        self._apply_styling(self.footer['lines'])
+        self._apply_styling('footer')
 
-    def _apply_styling(self, lines):
+    def _apply_styling(self, section: str):
         align = next(k for k, v in self.align_radios.items() if v.isChecked())
         font = self.font_combo.currentText()
         size = self.size_slider.value()
         bold = self.bold_check.isChecked()
         italic = self.italic_check.isChecked()
-        for line in lines:
-            line.update({'align': align, 'font': font, 'size': size, 'bold': bold, 'italic': italic})
-        self.parent.live_preview_tab.refresh_preview()
+        self.config_manager.set(f'{section}.lines', [
+            dict(line, align=align, font=font, size=size, bold=bold, italic=italic)
+            for line in self.config_manager.get(f'{section}.lines', [])
+        ])
 
     def choose_header_color(self):
         color = QColorDialog.getColor(initial=QColor(self.header['color']))
         if color.isValid():
-            self.header['color'] = color.name()
-            self.parent.live_preview_tab.refresh_preview()
+            self.config_manager.set('header.color', color.name())
 
     def choose_footer_color(self):
         color = QColorDialog.getColor(initial=QColor(self.footer['color']))
         if color.isValid():
-            self.footer['color'] = color.name()
-            self.parent.live_preview_tab.refresh_preview()
+            self.config_manager.set('footer.color', color.name())
 
     def update_preview(self):
         header_text = "<br>".join(line['text'] for line in self.header['lines'])
@@ -1,75 +1,115 @@
 # Filename: src/gui/live_preview_tab.py
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QMessageBox
+import json
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QMessageBox, QFileDialog
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtCore import QUrl
 from src.config import ConfigManager
 from src.html_generator import HTMLGenerator
+from src.pdf_renderer import PDFRenderer
+from src.gui.preview_scheduler import PreviewScheduler
+from src.gui.preview_state import PreviewState
+from src.gui.preview_content import PreviewContent
+from src.gui.preview_scheme import SCHEME, PreviewSchemeHandler
 
 class LivePreviewTab(QWidget):
     """Live Preview tab with embedded QWebEngineView for accurate HTML/CSS rendering."""
-    
+
     def __init__(self, config_manager: ConfigManager, html_generator: HTMLGenerator, parent_window):
         super().__init__()
         self.config_manager = config_manager
         self.html_generator = html_generator
+        self.pdf_renderer = PDFRenderer(config_manager)
         self.parent = parent_window
         self.input_folder = self.parent.main_tab.get_input_folder
-        
-        self.init_ui()
-        self.refresh_preview()  # Initial load
+        self.scheduler = PreviewScheduler(html_generator, self.pdf_renderer, self.input_folder, parent=self)
+        self.scheduler.preview_ready.connect(self.on_preview_ready)
+        self.scheduler.preview_failed.connect(self.on_preview_failed)
+        self.state = PreviewState()
+        self.content = PreviewContent()
+
+        self.init_ui()  # First preview is started by the window once the tab is shown
 
     def init_ui(self):
         layout = QVBoxLayout(self)
-        
+
         top_bar = QVBoxLayout()
         title = QLabel("<h2>Live Preview – What You See Is What You Get</h2>")
         title.setStyleSheet("color: navy;")
         top_bar.addWidget(title)
-        
+
         btn_layout = QHBoxLayout()
         refresh_btn = QPushButton("Refresh Preview")
         refresh_btn.setToolTip("Re-generate HTML with current settings and reload")
-        refresh_btn.clicked.connect(self.refresh_preview)
+        refresh_btn.clicked.connect(lambda: self.refresh_preview_async(immediate=True))
         btn_layout.addWidget(refresh_btn)
-        
+
         export_html_btn = QPushButton("Export HTML for Review")
         export_html_btn.setToolTip("Save current HTML to file for external viewing")
         export_html_btn.clicked.connect(self.export_html)
         btn_layout.addWidget(export_html_btn)
-        
+
         top_bar.addLayout(btn_layout)
         layout.addLayout(top_bar)
-        
+
         self.webview = QWebEngineView()
         self.webview.setZoomFactor(1.0)
+        # Content is served on demand through mcpreview:// instead of setHtml (which caps at ~2 MB)
+        self.scheme_handler = PreviewSchemeHandler(self.content, self)
+        self.webview.page().profile().installUrlSchemeHandler(SCHEME, self.scheme_handler)
         layout.addWidget(self.webview, stretch=1)
 
     def refresh_preview(self):
-        try:
-            input_folder = self.parent.main_tab.get_input_folder()
-            if not input_folder or not os.path.isdir(input_folder):
-                self.webview.setHtml("<h3 style='color:red;'>Invalid or empty input folder</h3>")
-                return
-                
-            self.parent.update_status("Generating live preview...")
-            html_content = self.html_generator.generate_full_html(input_folder)
-            css_content = self.config_manager.update_css_placeholders(
-                self.config_manager._load_base_css() if hasattr(self.config_manager, '_load_base_css') else ""
-            )
-            full_html = f"""
-            <html>
-                <head>
-                    <style>{css_content}</style>
-                </head>
-                <body>{html_content}</body>
-            </html>
-            """
-            self.webview.setHtml(full_html, QUrl("file://"))
-            self.parent.update_status("Live preview updated")
-        except Exception as e:
-            error_html = f"<h3 style='color:red;'>Preview failed: {str(e)}</h3>"
-            self.webview.setHtml(error_html)
-            QMessageBox.critical(self, "Preview Error", str(e))
+        self.refresh_preview_async(immediate=True)
+
+    def refresh_preview_async(self, immediate: bool = False):
+        """Ask the scheduler for a preview; bursts of calls (e.g. slider drags) are coalesced."""
+        input_folder = self.input_folder()
+        if not input_folder or not os.path.isdir(input_folder):
+            self.state.reset()
+            self.webview.setHtml("<h3 style='color:red;'>Invalid or empty input folder</h3>")
+            return
+        self.parent.update_status("Generating live preview...")
+        self.scheduler.request(immediate=immediate)
+
+    def refresh_styles(self):
+        """Fast path for style-only edits: swap the stylesheet in the loaded page, no regeneration."""
+        if not self.state.loaded:
+            self.refresh_preview_async()
+            return
+        css_content = self.pdf_renderer.get_render_css()
+        update = self.state.plan(css_content, None)
+        if update.css is not None:
+            self.content.update(css_content)
+            self._reload_style()
+            self.state.commit(css_content)
+            self.parent.update_status("Live preview styles updated")
+
+    def on_preview_ready(self, css_content: str, sections: list):
+        update = self.state.plan(css_content, sections)
+        self.content.update(css_content, sections, asset_root=self.input_folder())
+        if update.reload:
+            self._load_page()
+        else:
+            if update.css is not None:
+                self._reload_style()
+            for element_id, _ in update.patches:
+                self.webview.page().runJavaScript(f"mcLoadSection({json.dumps(element_id)}, {self.content.revision});")
+        self.state.commit(css_content, sections)
+        self.parent.update_status("Live preview updated")
+
+    def _reload_style(self):
+        self.webview.page().runJavaScript(f"mcReloadStyle({self.content.revision});")
+
+    def _load_page(self):
+        """Full reload of the page skeleton, keeping the reader's scroll position."""
+        scroll = self.webview.page().scrollPosition()
+        self.webview.setUrl(QUrl(self.content.index_url(scroll.x(), scroll.y())))
+
+    def on_preview_failed(self, message: str):
+        self.state.reset()
+        self.webview.setHtml(f"<h3 style='color:red;'>Preview failed: {message}</h3>")
+        self.parent.update_status("Live preview failed")
 
     def export_html(self):
         try:
@@ -77,23 +117,15 @@ class LivePreviewTab(QWidget):
                 self, "Export HTML Preview", "preview.html", "HTML Files (*.html)"
             )
             if file_path:
-                html_content = self.html_generator.generate_full_html(self.parent.main_tab.get_input_folder())
-                css_content = self.config_manager.update_css_placeholders(
-                    self.config_manager._load_base_css() if hasattr(self.config_manager, '_load_base_css') else ""
-                )
-                full_html = f"""
-                <!DOCTYPE html>
-                <html>
-                    <head>
-                        <meta charset="utf-8">
-                        <title>Machine Corps Preview</title>
-                        <style>{css_content}</style>
-                    </head>
-                    <body>{html_content}</body>
-                </html>
-                """
+                css_content = self.pdf_renderer.get_render_css()
+                # Sections are streamed into the file, so exporting never builds a package-sized string
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(full_html)
+                    f.write(
+                        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+                        f'<title>Machine Corps Preview</title>\n<style>{css_content}</style>\n</head>\n<body>\n'
+                    )
+                    self.html_generator.write_html(self.parent.main_tab.get_input_folder(), f)
+                    f.write('\n</body>\n</html>\n')
                 QMessageBox.information(self, "Exported", f"HTML preview saved to:\n{file_path}")
         except Exception as e:
-            QMessageBox.critical(self, "Export Failed", str(e))
\ No newline at end of file
+            QMessageBox.critical(self, "Export Failed", str(e))
@@ -1,7 +1,7 @@
 # Filename: src/gui/main_tab.py
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLineEdit, QPushButton, QFileDialog,
-    QLabel, QGroupBox, QHBoxLayout, QMessageBox
+    QLabel, QGroupBox, QHBoxLayout, QMessageBox, QCheckBox
 )
 from PyQt6.QtCore import Qt
 from src.config import ConfigManager
@@ -62,8 +62,18 @@ class MainTab(QWidget):
         actions_layout.addWidget(save_btn)
         
         refresh_btn = QPushButton("Refresh Live Preview")
-        refresh_btn.clicked.connect(self.parent.live_preview_tab.refresh_preview)
+        refresh_btn.clicked.connect(self.parent.refresh_preview)
         actions_layout.addWidget(refresh_btn)
+
+        self.watch_check = QCheckBox("Watch for changes")
+        self.watch_check.setToolTip("Refresh the preview (and rebuild if watch.auto_build is set) when inputs, config or styles change")
+        self.watch_check.toggled.connect(self.parent.set_watch_enabled)
+        actions_layout.addWidget(self.watch_check)
+
+        self.variants_check = QCheckBox("Build all variants")
+        self.variants_check.setToolTip("Build every output declared under variants: in config.yaml (content is converted once) instead of the single PDF")
+        self.variants_check.setEnabled(bool(self.config_manager.get('variants')))
+        actions_layout.addWidget(self.variants_check)
         
         layout.addWidget(actions_group)
         
@@ -1,12 +1,302 @@
-# Updated src/gui/main_window.py
-# ... existing imports ...
-from src.gui.file_order_tab import FileOrderTab
+# Filename: src/gui/main_window.py
+import json
+import logging
+import os
+import sys
+from src.startup_report import StartupTimer
 
-# In __init__:
-# ... existing code ...
+STARTUP = StartupTimer()  # Created first so milestones include Qt import cost
 
-# In init_ui:
-self.file_order_tab = FileOrderTab(self.config_manager, self)
-self.tabs.addTab(self.file_order_tab, "File Order")
+from PyQt6.QtCore import Qt, QCoreApplication, QTimer, QUrl
+from PyQt6.QtGui import QDesktopServices
+from PyQt6.QtWidgets import (
+    QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QPushButton, QMessageBox, QProgressBar, QFileDialog
+)
+from src.config import ConfigManager
+from src.gui.main_tab import MainTab
 
-# Ensure input folder changes trigger refresh across tabs if needed
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+# Config keys that only feed the render CSS: the preview is restyled in place
+STYLE_KEYS = frozenset({'classification', 'cover.bg_color', 'cover.padding_top', 'header.height', 'footer.height'})
+# Sections whose other keys change the previewed HTML (PreviewState patches the cover and TOC, reloads for the rest)
+CONTENT_SECTIONS = frozenset({'cover', 'header', 'footer', 'toc'})
+
+class MainWindow(QMainWindow):
+    """Main application window; secondary tabs are built the first time they are shown."""
+
+    def __init__(self, config_manager: ConfigManager):
+        super().__init__()
+        self.config_manager = config_manager
+        self.live_preview_tab = None
+        self.cover_tab = None
+        self.header_footer_tab = None
+        self.file_order_tab = None
+        self.build_thread = None
+        self.watch_controller = None
+        self._watch_build = False  # True while a build triggered by watch mode runs (no "open PDF?" prompt)
+        self._skipped_images: dict[str, set[str]] = {}  # input folder -> placeholders the user declined to map
+        self._html_generator = None
+        self._preview_generator = None
+        self._lazy_tabs = {}  # placeholder widget -> (attribute name, factory)
+
+        self.setWindowTitle(config_manager.get('static_strings.app_title'))
+        self.resize(1200, 850)
+        self.init_ui()
+        config_manager.add_listener(self.on_config_changed)
+
+    def init_ui(self):
+        central = QWidget()
+        layout = QVBoxLayout(central)
+
+        self.tabs = QTabWidget()
+        self.main_tab = MainTab(self.config_manager, self)
+        self.tabs.addTab(self.main_tab, "Main Controls")
+        self._add_lazy_tab("Cover Editor", 'cover_tab', self._create_cover_tab)
+        self._add_lazy_tab("Header/Footer", 'header_footer_tab', self._create_header_footer_tab)
+        self._add_lazy_tab("File Order", 'file_order_tab', self._create_file_order_tab)
+        self._add_lazy_tab("Live Preview", 'live_preview_tab', self._create_live_preview_tab)
+        self.tabs.currentChanged.connect(self._ensure_tab_built)
+        layout.addWidget(self.tabs, stretch=1)
+
+        self.build_btn = QPushButton("BUILD PDF")
+        self.build_btn.setMinimumHeight(44)
+        self.build_btn.clicked.connect(self.build_pdf)
+        layout.addWidget(self.build_btn)
+
+        self.setCentralWidget(central)
+        self.build_progress = QProgressBar()
+        self.build_progress.setRange(0, 100)
+        self.build_progress.setMaximumWidth(200)
+        self.build_progress.hide()
+        self.statusBar().addPermanentWidget(self.build_progress)
+        self.update_status(self.config_manager.get('static_strings.status_ready'))
+
+    # --- Lazy tab construction -------------------------------------------------
+
+    def _add_lazy_tab(self, title: str, attribute: str, factory):
+        placeholder = QWidget()
+        QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+        self._lazy_tabs[placeholder] = (attribute, factory)
+        self.tabs.addTab(placeholder, title)
+
+    def _ensure_tab_built(self, index: int):
+        placeholder = self.tabs.widget(index)
+        if placeholder not in self._lazy_tabs:
+            return
+        attribute, factory = self._lazy_tabs.pop(placeholder)
+        widget = factory()
+        setattr(self, attribute, widget)
+        placeholder.layout().addWidget(widget)
+        logger.debug(f"Built tab {attribute} on first show")
+
+    def _create_cover_tab(self):
+        from src.gui.cover_tab import CoverTab
+        return CoverTab(self.config_manager, self)
+
+    def _create_header_footer_tab(self):
+        from src.gui.header_footer_tab import HeaderFooterTab
+        return HeaderFooterTab(self.config_manager, self)
+
+    def _create_file_order_tab(self):
+        from src.gui.file_order_tab import FileOrderTab
+        return FileOrderTab(self.config_manager, self)
+
+    def _create_live_preview_tab(self):
+        from src.gui.live_preview_tab import LivePreviewTab  # Pulls in QtWebEngine
+        tab = LivePreviewTab(self.config_manager, self.preview_generator, self)
+        tab.refresh_preview_async(immediate=True)
+        return tab
+
+    # --- Shared services -------------------------------------------------------
+
+    @property
+    def html_generator(self):
+        """Generator used for builds; created on first use to defer mistune."""
+        if self._html_generator is None:
+            from src.html_generator import HTMLGenerator
+            self._html_generator = HTMLGenerator(self.config_manager)
+        return self._html_generator
+
+    @property
+    def preview_generator(self):
+        """Separate generator for background previews, so they never contend with a build."""
+        if self._preview_generator is None:
+            from src.html_generator import HTMLGenerator
+            self._preview_generator = HTMLGenerator(self.config_manager)
+        return self._preview_generator
+
+    def refresh_preview(self, styles_only: bool = False):
+        """Refresh the live preview if it has been opened; otherwise it renders when first shown.
+
+        styles_only=True is for edits that only change the render CSS (margins,
+        cover colour/padding, classification); the page is restyled in place.
+        """
+        if self.live_preview_tab is None:
+            return
+        if styles_only:
+            self.live_preview_tab.refresh_styles()
+        else:
+            self.live_preview_tab.refresh_preview_async()
+
+    def on_config_changed(self, change):
+        """Refresh only what the changed keys feed: nothing (paths, build options), the stylesheet, or the content."""
+        if any(key.split('.')[0] in CONTENT_SECTIONS for key in change.keys - STYLE_KEYS):
+            self.refresh_preview()
+        elif change.keys & STYLE_KEYS:
+            self.refresh_preview(styles_only=True)
+
+    # --- Watch mode ------------------------------------------------------------
+
+    def set_watch_enabled(self, enabled: bool):
+        """Start or stop watching the input folder, images, config.yaml and styles.txt."""
+        if self.watch_controller is not None:
+            self.watch_controller.stop()
+            self.watch_controller.deleteLater()
+            self.watch_controller = None
+        if not enabled:
+            return
+        input_folder = self.main_tab.get_input_folder()
+        if not input_folder or not os.path.isdir(input_folder):
+            QMessageBox.warning(self, "Watch", self.config_manager.get('static_strings.error_invalid_folder'))
+            self.main_tab.watch_check.setChecked(False)
+            return
+        from src.gui.watch_controller import WatchController
+        self.watch_controller = WatchController(
+            input_folder, str(self.config_manager.config_path), self.config_manager.get('watch.debounce_ms', 300), self
+        )
+        self.watch_controller.changes_detected.connect(self.on_watch_changes)
+
+    def on_watch_changes(self, changes):
+        if changes.config:
+            self.reload_config_from_disk()
+        if not changes.config_only:
+            self.refresh_preview(styles_only=changes.styles_only)
+        if self.config_manager.get('watch.auto_build', False) and self.build_btn.isEnabled():
+            self._watch_build = True
+            self.build_pdf()
+
+    def reload_config_from_disk(self):
+        """Pick up an external config.yaml edit, unless that would discard unsaved edits made in the GUI."""
+        if self.config_manager.has_unsaved_changes:
+            answer = QMessageBox.question(
+                self, "Configuration changed",
+                "config.yaml changed on disk. Reload it and discard your unsaved changes?",
+                defaultButton=QMessageBox.StandardButton.No
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                self.update_status("config.yaml changed on disk; kept unsaved changes")
+                return
+        self.config_manager.load_config()  # Reloads in place and notifies on_config_changed
+
+    def update_status(self, message: str):
+        self.statusBar().showMessage(message)
+
+    # --- Build -----------------------------------------------------------------
+
+    def build_pdf(self):
+        input_folder = self.main_tab.get_input_folder()
+        output_file = self.main_tab.get_output_file()
+        if not input_folder or not os.path.isdir(input_folder):
+            QMessageBox.warning(self, "Build", self.config_manager.get('static_strings.error_invalid_folder'))
+            return
+        from src.gui.build_thread import BuildThread
+        from src.pdf_renderer import PDFRenderer
+        from src.variants import load_variants
+
+        variants = None
+        if self.main_tab.variants_check.isChecked():
+            try:
+                variants = load_variants(self.config_manager)
+            except ValueError as e:
+                QMessageBox.warning(self, "Build", str(e))
+                return
+        if not self._watch_build:
+            self._ask_for_unmapped_images(input_folder)
+        self.build_btn.setEnabled(False)
+        self.update_status(self.config_manager.get('static_strings.status_building'))
+        self.build_thread = BuildThread(
+            self.html_generator, PDFRenderer(self.config_manager), input_folder, output_file, variants=variants
+        )
+        self.build_thread.progress_update.connect(self.update_status)
+        self.build_thread.progress_percent.connect(self.build_progress.setValue)
+        self.build_progress.setValue(0)
+        self.build_progress.show()
+        self.build_thread.finished.connect(self.on_build_finished)
+        self.build_thread.start()
+
+    def _ask_for_unmapped_images(self, input_folder: str):
+        """Prompt (here, on the GUI thread) for every unmapped image placeholder before the build thread starts.
+
+        Choices are saved to images.yaml, so later builds never ask again; skipped ones render as markers
+        and are not asked about again this session.
+        """
+        from src.image_assets import ImageManifest, unmapped_placeholders
+        manifest = ImageManifest(input_folder)
+        skipped = self._skipped_images.setdefault(os.path.abspath(input_folder), set())
+        for placeholder in unmapped_placeholders(input_folder, manifest):
+            if placeholder in skipped:
+                continue
+            file, _ = QFileDialog.getOpenFileName(
+                self, f'Select Image for {placeholder}', input_folder, 'Images (*.png *.jpg *.jpeg *.gif *.webp *.svg)'
+            )
+            if file:
+                manifest.assign(placeholder, file)
+            else:
+                skipped.add(placeholder)
+
+    def on_build_finished(self, success: bool, message: str):
+        self.build_btn.setEnabled(True)
+        self.build_progress.hide()
+        if self._watch_build:
+            self._watch_build = False
+            self.update_status(self.config_manager.get('static_strings.status_complete') if success else f"Watch build failed: {message}")
+            return
+        if not success:
+            self.update_status(self.config_manager.get('static_strings.error_build_failed'))
+            QMessageBox.critical(self, "Build Failed", message)
+            return
+        self.update_status(self.config_manager.get('static_strings.status_complete'))
+        answer = QMessageBox.question(
+            self, self.config_manager.get('static_strings.success_pdf_built'),
+            self.config_manager.get('static_strings.confirm_open_pdf')
+        )
+        if answer == QMessageBox.StandardButton.Yes:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.abspath(message)))
+
+    def closeEvent(self, event):
+        self.config_manager.remove_listener(self.on_config_changed)
+        self.set_watch_enabled(False)
+        if self.live_preview_tab is not None:
+            self.live_preview_tab.scheduler.shutdown()
+        for generator in (self._html_generator, self._preview_generator):
+            if generator is not None:
+                generator.shutdown()
+        super().closeEvent(event)
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    STARTUP.mark('qt_imported')
+    # Lets QtWebEngine be imported after QApplication exists, so the preview tab can load lazily
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    from src.gui.preview_scheme import register_preview_scheme  # Custom schemes must exist before QApplication
+    register_preview_scheme()
+    app = QApplication(argv)
+    window = MainWindow(ConfigManager())
+    STARTUP.mark('window_constructed')
+    window.show()
+
+    def on_first_paint():
+        STARTUP.mark('first_window')
+        logger.info(f"Startup milestones (ms): {STARTUP.as_dict()}")
+        report_path = os.environ.get('MC_STARTUP_REPORT')
+        if report_path:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(STARTUP.as_dict(), f, indent=2)
+
+    QTimer.singleShot(0, on_first_paint)
+    return app.exec()
+
+if __name__ == '__main__':
+    sys.exit(main())
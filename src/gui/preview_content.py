@@ -0,0 +1,101 @@
+# Filename: src/gui/preview_content.py
+import html
+import json
+import mimetypes
+from pathlib import Path
+from urllib.parse import unquote
+
+SKELETON = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<link id="mc-render-css" rel="stylesheet" href="style.css?rev={revision}">
+<script>
+async function mcFetchSection(id, rev) {{
+    const response = await fetch('section/' + encodeURIComponent(id) + '?rev=' + rev);
+    return response.text();
+}}
+async function mcLoadSection(id, rev) {{
+    const markup = await mcFetchSection(id, rev);
+    const el = document.getElementById(id);
+    if (el) {{ el.outerHTML = markup; }}
+}}
+async function mcLoadAll(ids, rev, x, y) {{
+    const parts = await Promise.all(ids.map(id => mcFetchSection(id, rev)));
+    ids.forEach((id, i) => {{ const el = document.getElementById(id); if (el) {{ el.outerHTML = parts[i]; }} }});
+    window.scrollTo(x, y);
+}}
+function mcReloadStyle(rev) {{
+    document.getElementById('mc-render-css').href = 'style.css?rev=' + rev;
+}}
+</script>
+</head>
+<body>
+{placeholders}
+<script>mcLoadAll({ids}, {revision}, {scroll_x}, {scroll_y});</script>
+</body>
+</html>
+"""
+
+class PreviewContent:
+    """What the mcpreview:// scheme serves: a small page skeleton, the CSS, each section and local images.
+
+    Sections are kept as the generator produced them and served one request at
+    a time, so the preview never builds (or copies) a single package-sized string.
+    """
+
+    IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp'}
+
+    def __init__(self):
+        self.revision = 0
+        self.css = ''
+        self.sections: dict[str, str] = {}
+        self.asset_root: Path | None = None
+
+    def update(self, css: str, sections: list[tuple[str, str]] | None = None, asset_root: str | None = None):
+        """Replace the served content; sections=None keeps the current ones (style-only change)."""
+        self.revision += 1
+        self.css = css
+        if sections is not None:
+            self.sections = dict(sections)
+        if asset_root is not None:
+            self.asset_root = Path(asset_root).resolve()
+
+    def index_url(self, scroll_x: float = 0, scroll_y: float = 0) -> str:
+        return f"mcpreview://preview/index.html?rev={self.revision}&x={int(scroll_x)}&y={int(scroll_y)}"
+
+    def skeleton(self, scroll_x: int = 0, scroll_y: int = 0) -> str:
+        """Section ids are raw strings: escaped once here for the placeholder attributes, and URL-quoted by
+        mcFetchSection, so they match the ids the served sections carry."""
+        ids = list(self.sections)
+        placeholders = '\n'.join(f'<div id="{html.escape(element_id)}"></div>' for element_id in ids)
+        return SKELETON.format(
+            revision=self.revision, placeholders=placeholders, ids=json.dumps(ids).replace('<', '\\u003c'),
+            scroll_x=scroll_x, scroll_y=scroll_y
+        )
+
+    def resolve(self, path: str, query: dict[str, str] | None = None) -> tuple[str, bytes] | None:
+        """Map a request path to (mime type, body), or None when nothing matches."""
+        query = query or {}
+        path = unquote(path).lstrip('/')
+        if path in ('', 'index.html'):
+            scroll_x, scroll_y = int(query.get('x', 0) or 0), int(query.get('y', 0) or 0)
+            return 'text/html', self.skeleton(scroll_x, scroll_y).encode('utf-8')
+        if path == 'style.css':
+            return 'text/css', self.css.encode('utf-8')
+        if path.startswith('section/'):
+            section = self.sections.get(path[len('section/'):])
+            return None if section is None else ('text/html', section.encode('utf-8'))
+        return self._resolve_asset(path)
+
+    def _resolve_asset(self, path: str) -> tuple[str, bytes] | None:
+        """Serve image files from the input folder; refuses anything outside it."""
+        if self.asset_root is None:
+            return None
+        candidate = (self.asset_root / path).resolve()
+        if self.asset_root not in candidate.parents or candidate.suffix.lower() not in self.IMAGE_SUFFIXES:
+            return None
+        if not candidate.is_file():
+            return None
+        mime = mimetypes.guess_type(candidate.name)[0] or 'application/octet-stream'
+        return mime, candidate.read_bytes()
@@ -0,0 +1,81 @@
+# Filename: src/gui/preview_scheduler.py
+import logging
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from src.gui.preview_thread import PreviewThread
+
+logger = logging.getLogger(__name__)
+
+class PreviewScheduler(QObject):
+    """Coalesces bursts of preview requests and runs generation in a worker thread.
+
+    Every request bumps a revision counter and restarts a short debounce timer.
+    At most one job runs at a time; a newer request cancels the running job and
+    is started as soon as it stops. Only results for the latest revision are
+    emitted, so the view never flashes stale content.
+    """
+
+    preview_ready = pyqtSignal(str, list)  # render CSS, [(element id, html), ...]
+    preview_failed = pyqtSignal(str)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, html_generator, pdf_renderer, folder_provider, delay_ms: int = 150, parent=None):
+        super().__init__(parent)
+        self.html_generator = html_generator
+        self.pdf_renderer = pdf_renderer
+        self.folder_provider = folder_provider
+        self.revision = 0
+        self.current = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._launch)
+
+    def request(self, immediate: bool = False):
+        """Schedule a refresh; repeated calls within the debounce window collapse into one job."""
+        self.revision += 1
+        if self.current is not None:
+            self.current.cancel()
+        if immediate:
+            self._timer.stop()
+            self._launch()
+        else:
+            self._timer.start()
+
+    def _launch(self):
+        if self.current is not None and self.current.isRunning():
+            return  # _on_thread_finished relaunches once the cancelled job exits
+        job = PreviewThread(self.html_generator, self.pdf_renderer, self.folder_provider(), self.revision)
+        job.ready.connect(self._on_ready)
+        job.failed.connect(self._on_failed)
+        job.finished.connect(self._on_thread_finished)
+        self.current = job
+        self.busy_changed.emit(True)
+        job.start()
+
+    def _on_ready(self, revision: int, css_content: str, sections: list):
+        if revision == self.revision:
+            self.preview_ready.emit(css_content, sections)
+        else:
+            logger.debug(f"Discarding stale preview revision {revision} (latest {self.revision})")
+
+    def _on_failed(self, revision: int, message: str):
+        if revision == self.revision:
+            self.preview_failed.emit(message)
+
+    def _on_thread_finished(self):
+        finished = self.sender()
+        if finished is not self.current:
+            return
+        self.current = None
+        finished.deleteLater()
+        if finished.revision != self.revision and not self._timer.isActive():
+            self._launch()
+        else:
+            self.busy_changed.emit(False)
+
+    def shutdown(self):
+        """Stop the debounce timer and wait for any running job."""
+        self._timer.stop()
+        if self.current is not None:
+            self.current.cancel()
+            self.current.wait()
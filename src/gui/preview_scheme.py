@@ -0,0 +1,43 @@
+# Filename: src/gui/preview_scheme.py
+import logging
+from urllib.parse import parse_qsl
+from PyQt6.QtCore import QBuffer, QIODevice, QUrl
+from PyQt6.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+
+logger = logging.getLogger(__name__)
+
+SCHEME = b'mcpreview'
+
+def register_preview_scheme():
+    """Register mcpreview:// with QtWebEngine; must run before QApplication is created."""
+    scheme = QWebEngineUrlScheme(SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.LocalAccessAllowed
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+        | QWebEngineUrlScheme.Flag.FetchApiAllowed
+    )
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+class PreviewSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Answers mcpreview:// requests from a PreviewContent store."""
+
+    def __init__(self, content, parent=None):
+        super().__init__(parent)
+        self.content = content
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        url = job.requestUrl()
+        # Fully encoded, so resolve() decodes the path exactly once and '%', '#' or '?' in a section id survive
+        path = url.path(QUrl.ComponentFormattingOption.FullyEncoded)
+        resolved = self.content.resolve(path, dict(parse_qsl(url.query(QUrl.ComponentFormattingOption.FullyEncoded))))
+        if resolved is None:
+            logger.debug(f"mcpreview: no content for {url.toString()}")
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        mime, body = resolved
+        buffer = QBuffer(job)  # Owned by the job, freed when the reply completes
+        buffer.setData(body)
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(mime.encode('ascii'), buffer)
@@ -0,0 +1,61 @@
+# Filename: src/gui/preview_state.py
+from dataclasses import dataclass, field
+
+@dataclass
+class PreviewUpdate:
+    """How to bring the loaded preview page up to date."""
+    reload: bool = False
+    css: str | None = None  # New stylesheet to inject, if it changed
+    patches: list[tuple[str, str]] = field(default_factory=list)  # (element id, outer HTML)
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.reload and self.css is None and not self.patches
+
+class PreviewState:
+    """Remembers what the webview currently shows so updates can be applied as patches.
+
+    Style-only changes become a stylesheet swap; edited documents become
+    outerHTML replacements. Anything structural (documents added, removed or
+    reordered, or running header/footer edits) needs a full reload.
+    """
+
+    PATCHABLE = ('cover', 'toc')
+    PATCHABLE_PREFIX = 'doc-'
+
+    def __init__(self):
+        self.css = None
+        self.sections: dict[str, int] = {}  # element id -> hash of its HTML, in page order
+
+    @property
+    def loaded(self) -> bool:
+        return self.css is not None
+
+    def _patchable(self, element_id: str) -> bool:
+        return element_id in self.PATCHABLE or element_id.startswith(self.PATCHABLE_PREFIX)
+
+    def plan(self, css: str, sections: list[tuple[str, str]] | None) -> PreviewUpdate:
+        """Compare a new render against the loaded page; sections=None means styles only."""
+        if not self.loaded:
+            return PreviewUpdate(reload=True)
+        update = PreviewUpdate(css=css if css != self.css else None)
+        if sections is None:
+            return update
+        if [element_id for element_id, _ in sections] != list(self.sections):
+            return PreviewUpdate(reload=True)
+        for element_id, section_html in sections:
+            if hash(section_html) != self.sections[element_id]:
+                if not self._patchable(element_id):
+                    return PreviewUpdate(reload=True)
+                update.patches.append((element_id, section_html))
+        return update
+
+    def commit(self, css: str, sections: list[tuple[str, str]] | None = None):
+        """Record what the page shows after an update has been applied."""
+        self.css = css
+        if sections is not None:
+            self.sections = {element_id: hash(section_html) for element_id, section_html in sections}
+
+    def reset(self):
+        self.css = None
+        self.sections = {}
@@ -0,0 +1,43 @@
+# Filename: src/gui/preview_thread.py
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+import logging
+from src.html_generator import GenerationCancelled
+
+logger = logging.getLogger(__name__)
+
+class PreviewThread(QThread):
+    """Generates preview sections off the GUI thread and hands them back via a signal.
+
+    Each job carries the scheduler revision it was started for; cancel() asks the
+    generator to stop between documents once a newer revision supersedes it.
+    """
+
+    ready = pyqtSignal(int, str, list)  # revision, render CSS, [(element id, html), ...]
+    failed = pyqtSignal(int, str)  # revision, error message
+
+    def __init__(self, html_generator, pdf_renderer, input_folder: str, revision: int = 0):
+        super().__init__()
+        self.html_generator = html_generator
+        self.pdf_renderer = pdf_renderer
+        self.input_folder = input_folder
+        self.revision = revision
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        try:
+            sections = self.html_generator.generate_sections(self.input_folder, cancel_check=self.is_cancelled)
+            css_content = self.pdf_renderer.get_render_css()
+            if not self.is_cancelled():
+                self.ready.emit(self.revision, css_content, sections)
+        except GenerationCancelled:
+            logger.debug(f"Preview revision {self.revision} cancelled")
+        except Exception as e:
+            logger.error(f"Preview generation failed: {e}")
+            self.failed.emit(self.revision, str(e))
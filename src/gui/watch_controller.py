@@ -0,0 +1,55 @@
+# Filename: src/gui/watch_controller.py
+import logging
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from src.watcher import WatchTargets, diff_snapshots
+
+logger = logging.getLogger(__name__)
+
+class WatchController(QObject):
+    """GUI watch mode: QFileSystemWatcher (inotify on Linux) plus a debounce timer.
+
+    Raw notifications only restart the timer; when it fires the watched files
+    are re-stat'ed and diffed, and one ChangeSet is emitted for the whole burst.
+    """
+
+    changes_detected = pyqtSignal(object)  # src.watcher.ChangeSet
+
+    def __init__(self, input_folder: str, config_path: str, debounce_ms: int = 300, parent=None):
+        super().__init__(parent)
+        self.targets = WatchTargets(input_folder, config_path)
+        self._snapshot = self.targets.snapshot()
+        self._fs_watcher = QFileSystemWatcher(self)
+        self._fs_watcher.directoryChanged.connect(self._schedule)
+        self._fs_watcher.fileChanged.connect(self._schedule)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._collect)
+        self._sync_paths()
+
+    def _sync_paths(self):
+        """Watch every directory and file; atomic saves replace files, so the list is refreshed after each burst."""
+        wanted = {str(p) for p in self.targets.directories()} | {str(p) for p in self._snapshot}
+        current = set(self._fs_watcher.files()) | set(self._fs_watcher.directories())
+        if current - wanted:
+            self._fs_watcher.removePaths(sorted(current - wanted))
+        if wanted - current:
+            self._fs_watcher.addPaths(sorted(wanted - current))
+
+    def _schedule(self, _path: str):
+        self._timer.start()
+
+    def _collect(self):
+        snapshot = self.targets.snapshot()
+        changes = diff_snapshots(self.targets, self._snapshot, snapshot)
+        self._snapshot = snapshot
+        self._sync_paths()
+        if changes:
+            logger.info(f"Watch: {changes.as_dict()}")
+            self.changes_detected.emit(changes)
+
+    def stop(self):
+        self._timer.stop()
+        paths = self._fs_watcher.files() + self._fs_watcher.directories()
+        if paths:
+            self._fs_watcher.removePaths(paths)
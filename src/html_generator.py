@@ -1,35 +1,451 @@
-# Updated src/html_generator.py
-import base64
+# Filename: src/html_generator.py
+import html
+import logging
 import mistune
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from PyQt6.QtWidgets import QFileDialog
-# ... existing code ...
+from typing import NamedTuple
+from urllib.parse import unquote
+from mistune.util import safe_entity
+from .config_snapshot import CoverConfig, RunningConfig, TextLine
+from .fragment_cache import FragmentCache
+from .html_spool import HTMLSpool
+from .image_assets import PLACEHOLDER_PATTERN, ImageCache, ImageManifest
+from .utils import discover_files, document_id
+
+logger = logging.getLogger(__name__)
+
+# Cached fragments must not depend on where a document sits in the package, so heading anchors carry
+# this token until the fragment is placed, and links to other documents carry a numbered marker
+ANCHOR_TOKEN = '%mc-document%'
+XREF_MARKER = '%mc-xref-{}%'
+DOCUMENT_LINK = re.compile(r'^(?![a-zA-Z][a-zA-Z0-9+.-]*:)(?P<path>[^#?]+\.md)(?:#(?P<anchor>.*))?$')
+
+def slugify(text: str) -> str:
+    """Anchor slug for a heading or link target: 'Tariff Policy (2025)' -> 'tariff-policy-2025'."""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'section'
+
+def heading_anchor(doc_id: str, slug: str) -> str:
+    return f'h-{doc_id}--{slug}'
+
+def merge_heading_index(heading_index: list[tuple[str, tuple]], depth: int = 6) -> list[dict]:
+    """Flatten per-document (document id, headings) slices into one list of entries down to depth."""
+    return [
+        {'document': doc_id, 'level': level, 'text': text, 'anchor': heading_anchor(doc_id, slug)}
+        for doc_id, headings in heading_index
+        for level, text, slug in headings if level <= depth
+    ]
+
+class Fragment(NamedTuple):
+    """One converted document, cached as a unit so its slice of the heading index is never re-parsed."""
+    html: str
+    headings: tuple = ()  # (level, plain text, slug) per heading, in document order
+    xrefs: tuple = ()  # Link targets resolved at placement, as written ('#scope', 'annex/02-costs.md#rates')
+
 class CustomRenderer(mistune.HTMLRenderer):
-    """Custom renderer for advanced table formatting with ARIA."""
+    """Custom renderer for advanced table formatting with ARIA.
+
+    While rendering it also records the document's headings, giving each a
+    stable anchor, and its links to other Markdown documents.
+    """
+    VERSION = '4'  # Bump when rendered output changes to invalidate cached fragments
+
+    def __call__(self, tokens, state):
+        self.headings, self.xrefs, self._slugs = [], [], set()
+        return super().__call__(tokens, state)
+
+    def heading(self, text, level, **attrs):
+        plain = html.unescape(re.sub(r'<[^>]+>', '', text)).strip()
+        slug = base = slugify(plain)
+        count = 1
+        while slug in self._slugs:
+            count += 1
+            slug = f'{base}-{count}'
+        self._slugs.add(slug)
+        self.headings.append((level, plain, slug))
+        return f'<h{level} id="h-{ANCHOR_TOKEN}--{slug}">{text}</h{level}>\n'
+
+    def link(self, text, url, title=None):
+        # In-document and cross-document links are resolved once the fragment is placed and all headings are known
+        if (url.startswith('#') and len(url) > 1) or DOCUMENT_LINK.match(url):
+            href = XREF_MARKER.format(len(self.xrefs))
+            self.xrefs.append(url)
+        else:
+            return super().link(text, url, title)
+        return f'<a href="{href}"' + (f' title="{safe_entity(title)}"' if title else '') + f'>{text}</a>'
+
     def table(self, header, body):
         return f'<table role="table" aria-label="Data Table" class="custom-table" style="border: 1px solid; width: 100%;">{header}{body}</table>'
 
     def image(self, src, alt, title=None):
         return f'<img role="img" aria-label="{alt}" src="{src}" alt="{alt}"' + (f' title="{title}"' if title else '') + ' />'
 
-# In HTMLGenerator:
-def __init__(self, config_manager):
-    self.config = config_manager
-    self.markdown = mistune.create_markdown(renderer=CustomRenderer())
-
-def _convert_md_to_html(self, md_content: str) -> str:
-    md_content = re.sub(r'\[\[image:(\w+)\]\]', self.insert_image, md_content)
-    md_content = re.sub(r'<!-- PAGEBREAK -->', '<div style="page-break-before: always;"></div>', md_content)
-    return self.markdown(md_content)
-
-def insert_image(self, match):
-    """Handle image placeholder by prompting for file and embedding base64."""
-    placeholder = match.group(1)
-    file, _ = QFileDialog.getOpenFileName(None, f'Select Image for {placeholder}', '', 'Images (*.png *.jpg *.gif)')
-    if not file:
-        return f'<p>[Image placeholder: {placeholder}]</p>'
-    with open(file, 'rb') as img_file:
-        base64_img = base64.b64encode(img_file.read()).decode('utf-8')
-        mime = 'image/png' if file.endswith('.png') else 'image/jpeg'  # Simplify
-    return f'<img src="data:{mime};base64,{base64_img}" alt="{placeholder}">'
\ No newline at end of file
+# Memoised on the immutable config sections they read, so e.g. a cover edit leaves the running elements cached
+@lru_cache(maxsize=64)
+def render_lines(lines: tuple[TextLine, ...]) -> str:
+    """Render styled text lines; {page} becomes a page-counter span."""
+    rendered = []
+    for line in lines:
+        style = (
+            f"text-align: {line.align}; "
+            f"font-family: '{line.font}'; "
+            f"font-size: {line.size}pt; "
+            f"font-weight: {'bold' if line.bold else 'normal'}; "
+            f"font-style: {'italic' if line.italic else 'normal'};"
+        )
+        text = html.escape(line.text).replace('{page}', '<span class="page-number"></span>')
+        rendered.append(f'<p style="{style}">{text}</p>')
+    return ''.join(rendered)
+
+@lru_cache(maxsize=16)
+def render_cover(cover: CoverConfig) -> str:
+    return f'<div class="cover-container" id="cover">{render_lines(cover.lines)}</div>'
+
+@lru_cache(maxsize=16)
+def render_running_elements(header: RunningConfig, footer: RunningConfig) -> str:
+    return f'<div id="header">{render_lines(header.lines)}</div><div id="footer">{render_lines(footer.lines)}</div>'
+
+class GenerationCancelled(Exception):
+    """Raised when a caller's cancel_check reports that the result is no longer wanted."""
+
+_worker_markdown = None
+
+def _render_fragment(markdown, md_content: str) -> Fragment:
+    body = markdown(md_content)
+    return Fragment(body, tuple(markdown.renderer.headings), tuple(markdown.renderer.xrefs))
+
+def _convert_markdown(md_content: str) -> Fragment:
+    """Process-pool entry point: render preprocessed Markdown with a per-process parser."""
+    global _worker_markdown
+    if _worker_markdown is None:
+        _worker_markdown = mistune.create_markdown(renderer=CustomRenderer(escape=False))
+    return _render_fragment(_worker_markdown, md_content)
+
+def _convert_markdown_timed(md_content: str) -> tuple[Fragment, float]:
+    """Like _convert_markdown, also returning the conversion time measured in the worker."""
+    start = time.perf_counter()
+    fragment = _convert_markdown(md_content)
+    return fragment, time.perf_counter() - start
+
+class HTMLGenerator:
+    """Assembles cover, running header/footer and Markdown documents into one HTML body."""
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.markdown = mistune.create_markdown(renderer=CustomRenderer(escape=False))
+        self.renderer_version = f"mistune-{mistune.__version__}/custom-{CustomRenderer.VERSION}"
+        cache_mb = self.config.get('build.fragment_cache_mb', 64)
+        self.fragment_cache = FragmentCache(max_bytes=int(cache_mb * 1024 * 1024), sizeof=lambda fragment: len(fragment.html))
+        self.heading_index: list[tuple[str, tuple]] = []  # (document id, headings) from the last run, in order
+        self._executor = None
+        self._executor_workers = 0
+        self.manifest = None  # ImageManifest for the folder being generated
+        self.image_cache = ImageCache(
+            Path(self.config.get('build.cache_dir', '.mc_cache')) / 'images',
+            target_dpi=self.config.get('images.target_dpi', 200),
+            max_width_in=self.config.get('images.max_width_in', 6.5),
+            jpeg_quality=self.config.get('images.jpeg_quality', 85),
+        )
+
+    def generate_full_html(self, input_folder: str, cancel_check=None, profile=None) -> str:
+        """Build the complete HTML body for every Markdown file in the input folder.
+
+        cancel_check, if given, is polled between documents; when it returns True
+        GenerationCancelled is raised so stale preview jobs stop early. profile, a
+        BuildProfile, receives per-document conversion times and cache counts.
+        Large packages should use spool_html or write_html instead.
+        """
+        return '\n'.join(part for _, part in self.iter_sections(input_folder, cancel_check, profile))
+
+    def write_html(self, input_folder: str, out, cancel_check=None, profile=None, front_matter: bool = True):
+        """Write the same body as generate_full_html to out (anything with write(str)), one section at a time.
+
+        front_matter=False writes only the document sections (variant builds add their own cover and running elements).
+        """
+        if not front_matter:
+            self._write_sections(self.iter_document_sections(input_folder, cancel_check, profile), out)
+        elif not self.config.get('toc.enabled', False):
+            self._write_sections(self.iter_sections(input_folder, cancel_check, profile), out)
+        else:
+            # The table of contents precedes the documents it indexes, so they are spooled until it exists
+            with HTMLSpool(max_memory=int(self.config.get('build.html_spool_mb', 32) * 1024 * 1024)) as documents:
+                self._write_sections(self.iter_document_sections(input_folder, cancel_check, profile), documents)
+                self._write_sections(self.front_matter(self.heading_index), out)
+                out.write('\n')
+                if isinstance(out, HTMLSpool):
+                    out.extend(documents)
+                else:
+                    for text in documents.iter_text():
+                        out.write(text)
+
+    @staticmethod
+    def _write_sections(sections, out):
+        for index, (_, part) in enumerate(sections):
+            if index:
+                out.write('\n')
+            out.write(part)
+
+    def spool_html(self, input_folder: str, cancel_check=None, profile=None, front_matter: bool = True) -> HTMLSpool:
+        """Stream the body into an HTMLSpool that rolls over to disk past build.html_spool_mb.
+
+        The caller owns the spool and must close it.
+        """
+        spool = HTMLSpool(max_memory=int(self.config.get('build.html_spool_mb', 32) * 1024 * 1024))
+        try:
+            self.write_html(input_folder, spool, cancel_check, profile, front_matter)
+        except BaseException:
+            spool.close()
+            raise
+        return spool
+
+    def generate_sections(self, input_folder: str, cancel_check=None, profile=None) -> list[tuple[str, str]]:
+        """Return the body as (element id, html) pairs: cover, running elements, then one per document.
+
+        The live preview diffs these to patch only the sections that changed.
+        """
+        return list(self.iter_sections(input_folder, cancel_check, profile))
+
+    def iter_sections(self, input_folder: str, cancel_check=None, profile=None):
+        """Yield the (element id, html) pairs of generate_sections as each document is converted.
+
+        With toc.enabled every document is converted before the front matter is
+        yielded, since the table of contents lists their headings.
+        """
+        if not self.config.get('toc.enabled', False):
+            yield from self.front_matter()
+            yield from self.iter_document_sections(input_folder, cancel_check, profile)
+            return
+        documents = list(self.iter_document_sections(input_folder, cancel_check, profile))
+        yield from self.front_matter(self.heading_index)
+        yield from documents
+
+    def front_matter(self, heading_index: list | None = None) -> list[tuple[str, str]]:
+        """The config-dependent sections that precede the documents: cover, running header/footer and,
+        given a heading index and toc.enabled, the table of contents."""
+        sections = [('cover', self._render_cover()), ('running', self._render_running_elements())]
+        if heading_index is not None and self.config.get('toc.enabled', False):
+            sections.append(('toc', self.render_toc(heading_index)))
+        return sections
+
+    def iter_document_sections(self, input_folder: str, cancel_check=None, profile=None):
+        """Yield one (element id, html) pair per document; these depend only on the inputs, not on cover or header config.
+
+        Rebuilds heading_index from each document's cached or freshly converted slice as it goes.
+        """
+        md_files = discover_files(input_folder)
+        self._load_manifest(input_folder)
+        names = [document_id(f, input_folder) for f in md_files]
+        documents = {Path(os.path.normpath(f)): doc_id for f, doc_id in zip(md_files, names)}
+        self.heading_index = []
+        for md_file, doc_id, fragment in zip(md_files, names, self._iter_documents(md_files, cancel_check, names, profile)):
+            self.heading_index.append((doc_id, fragment.headings))
+            yield f'doc-{doc_id}', self._place_fragment(fragment, md_file, doc_id, documents)
+
+    def generate_segments(self, input_folder: str, profile=None) -> list[tuple[str, str]]:
+        """Build (name, html) pairs for incremental rendering: the cover, then one per document.
+
+        Every segment carries the running header/footer so it renders standalone.
+        Segments have no table of contents: each renders on its own, so
+        target-counter cannot reach the pages of the others. For the same
+        reason links into other documents would dangle once the segment PDFs
+        are merged; they are listed in cross_document_links as
+        (document id, link target) so the caller can build in one piece instead.
+        """
+        md_files = discover_files(input_folder)
+        self._load_manifest(input_folder)
+        names = [document_id(f, input_folder) for f in md_files]
+        documents = {Path(os.path.normpath(f)): doc_id for f, doc_id in zip(md_files, names)}
+        running = self._render_running_elements()
+        segments = [('cover', self._render_cover() + running)]
+        self.heading_index = []
+        self.cross_document_links = []
+        for md_file, doc_id, fragment in zip(md_files, names, self._iter_documents(md_files, names=names, profile=profile)):
+            self.heading_index.append((doc_id, fragment.headings))
+            self.cross_document_links.extend(
+                (doc_id, target) for target in fragment.xrefs
+                if self._linked_document(target, md_file, documents) not in (None, doc_id)
+            )
+            segments.append((doc_id, running + self._place_fragment(fragment, md_file, doc_id, documents)))
+        return segments
+
+    def merged_heading_index(self, depth: int = 6) -> list[dict]:
+        """The last run's headings across the package, in reading order, with their anchors."""
+        return merge_heading_index(self.heading_index, depth)
+
+    def render_toc(self, heading_index: list) -> str:
+        """Table of contents for the given (document id, headings) index, down to toc.depth.
+
+        Page numbers are filled in at layout time by the stylesheet's target-counter rule.
+        """
+        entries = ''.join(
+            f'<li class="toc-level-{entry["level"]}"><a href="#{html.escape(entry["anchor"])}">{html.escape(entry["text"])}</a></li>'
+            for entry in merge_heading_index(heading_index, int(self.config.get('toc.depth', 3)))
+        )
+        title = html.escape(self.config.get('toc.title', 'Table of Contents'))
+        return f'<nav id="toc"><h1>{title}</h1><ul>{entries}</ul></nav>'
+
+    def _load_manifest(self, input_folder: str):
+        if self.manifest is None or self.manifest.input_folder != Path(input_folder):
+            self.manifest = ImageManifest(input_folder)
+        else:
+            self.manifest.reload()
+
+    def _wrap_section(self, doc_id: str, body: str) -> str:
+        return f'<section class="document" id="doc-{html.escape(doc_id)}">{body}</section>'
+
+    def _place_fragment(self, fragment: Fragment, md_file: Path, doc_id: str, documents: dict[Path, str]) -> str:
+        """Give a cached fragment this document's anchors and point its links at their targets."""
+        body = self._link_fragment(fragment, doc_id, lambda target: self._resolve_document_link(target, md_file, documents))
+        return self._wrap_section(doc_id, body)
+
+    @staticmethod
+    def _link_fragment(fragment: Fragment, doc_id: str, resolve_document) -> str:
+        """Fill in the document's anchors and the recorded links' hrefs.
+
+        '#name' points at a heading only if name slugs to one of this document's
+        headings; other fragments (raw HTML ids, #toc, #cover) stay as written.
+        resolve_document maps links to other .md files.
+        """
+        body = fragment.html.replace(ANCHOR_TOKEN, html.escape(doc_id))
+        slugs = {slug for _, _, slug in fragment.headings}
+        for number, target in enumerate(fragment.xrefs):
+            if target.startswith('#'):
+                slug = slugify(unquote(target[1:]))
+                href = f'#{html.escape(heading_anchor(doc_id, slug))}' if slug in slugs else html.escape(target)
+            else:
+                href = resolve_document(target)
+            body = body.replace(XREF_MARKER.format(number), href, 1)
+        return body
+
+    @staticmethod
+    def _resolve_document_link(target: str, md_file: Path, documents: dict[Path, str]) -> str:
+        """'other.md' -> '#doc-<id>', 'other.md#heading' -> that heading's anchor; unknown files keep the original link."""
+        match = DOCUMENT_LINK.match(target)
+        target_id = HTMLGenerator._linked_document(target, md_file, documents)
+        if target_id is None:
+            logger.warning(f"{md_file.name}: link to a document outside the package: {target}")
+            return html.escape(target)
+        if match['anchor']:
+            return f"#{html.escape(heading_anchor(target_id, slugify(unquote(match['anchor']))))}"
+        return f"#doc-{html.escape(target_id)}"
+
+    @staticmethod
+    def _linked_document(target: str, md_file: Path, documents: dict[Path, str]) -> str | None:
+        """Id of the package document a link target points at, or None ('#fragment' or a file outside the package)."""
+        match = DOCUMENT_LINK.match(target)
+        if match is None:
+            return None
+        return documents.get(Path(os.path.normpath(md_file.parent / unquote(match['path']))))
+
+    def _iter_documents(self, md_files: list[Path], cancel_check=None, names: list[str] | None = None, profile=None):
+        """Yield converted document bodies in order, reading and converting one small batch at a time.
+
+        A batch is a single document when converting serially and a few per
+        worker with a process pool, so memory stays bounded by the batch rather
+        than the package. The image manifest is fingerprinted once for the run.
+        """
+        workers = int(self.config.get('build.parallel_workers', 0) or 0)
+        batch = workers * 4 if workers > 1 else 1
+        image_version = self._image_version()
+        for start in range(0, len(md_files), batch):
+            sources = [f.read_text(encoding='utf-8') for f in md_files[start:start + batch]]
+            yield from self._convert_documents(
+                sources, cancel_check, names[start:start + batch] if names else None, profile,
+                offset=start, total=len(md_files), image_version=image_version
+            )
+
+    def _image_version(self) -> str:
+        """Fragment cache version for documents with image placeholders: they also depend on the manifest and the image files."""
+        return f"{self.renderer_version}/img-{self.manifest.fingerprint() if self.manifest else ''}"
+
+    def _convert_documents(self, sources: list[str], cancel_check=None, names: list[str] | None = None,
+                           profile=None, offset: int = 0, total: int | None = None,
+                           image_version: str | None = None) -> list[Fragment]:
+        """Convert Markdown sources in order, only re-parsing those missing from the fragment cache.
+
+        offset and total place these sources within the whole package for progress reporting;
+        image_version (see _image_version) is computed here if the caller has not.
+        """
+        image_version = image_version or self._image_version()
+        keys = [FragmentCache.make_key(md, image_version if '[[image:' in md else self.renderer_version) for md in sources]
+        bodies = [self.fragment_cache.get(key) for key in keys]
+        pending = [i for i, body in enumerate(bodies) if body is None]
+        if profile:
+            profile.record_cache('fragments', len(sources) - len(pending), len(pending))
+        if not pending:
+            return bodies
+
+        # Image placeholders are resolved here, before any worker sees the Markdown: the manifest and image cache live in this process
+        prepared = [self._preprocess_markdown(sources[i]) for i in pending]
+        workers = int(self.config.get('build.parallel_workers', 0) or 0)
+        if workers > 1 and len(prepared) > 1:
+            converted = self._get_executor(workers).map(_convert_markdown_timed, prepared, chunksize=max(1, len(prepared) // (workers * 4)))
+        else:
+            converted = (self._convert_timed(md) for md in prepared)
+
+        for i, (fragment, seconds) in zip(pending, converted):
+            # Each fragment is cached as soon as it exists, so cancelled runs still warm the cache
+            bodies[i] = fragment
+            self.fragment_cache.put(keys[i], fragment)
+            if profile:
+                profile.record_document(names[i] if names else str(offset + i), seconds, offset + i + 1, total or len(sources))
+            if cancel_check and cancel_check():
+                raise GenerationCancelled()
+        return bodies
+
+    def _convert_timed(self, md_content: str) -> tuple[Fragment, float]:
+        start = time.perf_counter()
+        fragment = _render_fragment(self.markdown, md_content)
+        return fragment, time.perf_counter() - start
+
+    def _get_executor(self, workers: int) -> ProcessPoolExecutor:
+        """Return the shared process pool, recreating it if the worker count changed."""
+        if self._executor is None or self._executor_workers != workers:
+            self.shutdown()
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._executor_workers = workers
+            logger.info(f"Started Markdown conversion pool with {workers} workers")
+        return self._executor
+
+    def shutdown(self):
+        """Stop the conversion process pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._executor_workers = 0
+
+    def _render_cover(self) -> str:
+        return render_cover(self.config.snapshot().cover)
+
+    def _render_running_elements(self) -> str:
+        snapshot = self.config.snapshot()
+        return render_running_elements(snapshot.header, snapshot.footer)
+
+    def _convert_md_to_html(self, md_content: str, doc_id: str = 'document') -> str:
+        """Convert one standalone document; links to other documents keep their original targets."""
+        fragment = _render_fragment(self.markdown, self._preprocess_markdown(md_content))
+        return self._link_fragment(fragment, doc_id, html.escape)
+
+    def _preprocess_markdown(self, md_content: str) -> str:
+        """Resolve image placeholders and page breaks before Markdown parsing."""
+        md_content = PLACEHOLDER_PATTERN.sub(self.insert_image, md_content)
+        return re.sub(r'<!-- PAGEBREAK -->', '<div style="page-break-before: always;"></div>', md_content)
+
+    def insert_image(self, match):
+        """Resolve an image placeholder through the manifest and embed the cached, downscaled file.
+
+        Generation never prompts (it runs on worker threads and processes): the GUI
+        asks for unmapped placeholders before a build starts (see
+        unmapped_placeholders); any still unmapped render as a visible marker.
+        """
+        placeholder = match.group(1)
+        source = self.manifest.resolve(placeholder) if self.manifest else None
+        if source is None or not source.is_file():
+            logger.warning(f"No image mapped for placeholder '{placeholder}'")
+            return f'<p>[Image placeholder: {placeholder}]</p>'
+        processed = self.image_cache.get(source)
+        return f'<img src="{processed.resolve().as_uri()}" alt="{html.escape(placeholder)}">'
@@ -0,0 +1,157 @@
+# Filename: src/html_spool.py
+import codecs
+import tempfile
+from pathlib import Path
+
+DOCUMENT_MARKER = '<section class="document"'
+RUNNING_MARKER = '<div id="header">'
+COPY_CHUNK = 1024 * 1024
+
+def group_ranges(starts: list[int], total: int, chunks: int) -> list[tuple[int, int]]:
+    """Split [0, total) into up to `chunks` contiguous ranges of similar size, cutting only at document starts.
+
+    Anything before the first document (cover, running elements) stays with the first range.
+    """
+    if chunks <= 1 or len(starts) <= 1:
+        return [(0, total)]
+    bounds = starts[1:] + [total]
+    target = total / min(chunks, len(starts))
+    ranges, range_start = [], 0
+    for end in bounds:
+        if end - range_start >= target and len(ranges) < chunks - 1:
+            ranges.append((range_start, end))
+            range_start = end
+    if range_start < total:
+        ranges.append((range_start, total))
+    return ranges
+
+class HTMLSpool:
+    """Package HTML written section by section to a spooled temporary file.
+
+    The spool stays in memory up to max_memory bytes and rolls over to an
+    anonymous temporary file beyond that, so assembling a package holds at
+    most one section as a Python string. The byte offset of every document
+    section is recorded as it is written, letting the LaTeX fallback split the
+    package into chunks without reading it back.
+    """
+
+    def __init__(self, max_memory: int = 32 * 1024 * 1024, dir: str | None = None):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory, mode='w+b', dir=dir)
+        self.document_offsets: list[int] = []
+        self.running_range: tuple[int, int] | None = None  # Running header/footer elements
+        self.size = 0
+
+    @classmethod
+    def from_string(cls, html_content: str, max_memory: int = 32 * 1024 * 1024) -> 'HTMLSpool':
+        """Spool an already-assembled HTML string (callers that still build one)."""
+        spool = cls(max_memory)
+        data = html_content.encode('utf-8')
+        marker = DOCUMENT_MARKER.encode('utf-8')
+        position = data.find(marker)
+        while position != -1:
+            spool.document_offsets.append(position)
+            position = data.find(marker, position + 1)
+        running = data.find(RUNNING_MARKER.encode('utf-8'))
+        if running != -1:
+            first_document = spool.document_offsets[0] if spool.document_offsets else len(data)
+            spool.running_range = (running, first_document)
+        spool._file.write(data)
+        spool.size = len(data)
+        return spool
+
+    def write(self, text: str) -> int:
+        if text.startswith(DOCUMENT_MARKER):
+            self.document_offsets.append(self.size)
+        data = text.encode('utf-8')
+        self._file.seek(self.size)
+        self._file.write(data)
+        if text.startswith(RUNNING_MARKER) and self.running_range is None:
+            self.running_range = (self.size, self.size + len(data))
+        self.size += len(data)
+        return len(text)
+
+    def append_file(self, path: str | Path, document_offsets: list[int] = ()):
+        """Append HTML saved from another spool (e.g. shared document sections), shifting its document offsets."""
+        self.document_offsets.extend(self.size + offset for offset in document_offsets)
+        self._file.seek(self.size)
+        with open(path, 'rb') as f:
+            while data := f.read(COPY_CHUNK):
+                self._file.write(data)
+                self.size += len(data)
+
+    def extend(self, other: 'HTMLSpool'):
+        """Append another spool's contents, keeping its document offsets and running elements."""
+        if other.running_range and self.running_range is None:
+            self.running_range = (self.size + other.running_range[0], self.size + other.running_range[1])
+        self.document_offsets.extend(self.size + offset for offset in other.document_offsets)
+        self._file.seek(self.size)
+        for data in other.iter_bytes():
+            self._file.write(data)
+            self.size += len(data)
+
+    @property
+    def on_disk(self) -> bool:
+        """True once the spool has rolled over to its temporary file."""
+        return self._file._rolled
+
+    def reader(self):
+        """The underlying binary file, rewound; pass it to WeasyPrint as file_obj."""
+        self._file.flush()
+        self._file.seek(0)
+        return self._file
+
+    def iter_bytes(self, start: int = 0, end: int | None = None):
+        """Yield the bytes in [start, end) in bounded chunks."""
+        end = self.size if end is None else end
+        self._file.seek(start)
+        while start < end:
+            data = self._file.read(min(COPY_CHUNK, end - start))
+            if not data:
+                break
+            start += len(data)
+            yield data
+
+    def copy_to(self, binary_file, start: int = 0, end: int | None = None):
+        for data in self.iter_bytes(start, end):
+            binary_file.write(data)
+
+    def iter_text(self):
+        """Yield the contents as text in bounded chunks, never splitting a UTF-8 sequence."""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for data in self.iter_bytes():
+            yield decoder.decode(data)
+        yield decoder.decode(b'', final=True)
+
+    def read_text(self) -> str:
+        """The whole package as one string; only for small outputs and tests."""
+        return b''.join(self.iter_bytes()).decode('utf-8')
+
+    def ranges(self, chunks: int) -> list[tuple[int, int]]:
+        """Byte ranges for up to `chunks` groups of whole document sections."""
+        return group_ranges(self.document_offsets, self.size, chunks)
+
+    def document_groups(self, max_documents: int = 0, max_bytes: int = 0) -> list[tuple[int, int]]:
+        """Byte ranges of consecutive whole documents, each closed once it holds max_documents
+        documents or max_bytes bytes (0 = no limit). The first range starts at 0, so it carries the
+        cover; a single document larger than max_bytes gets a range of its own.
+        """
+        if not self.document_offsets:
+            return [(0, self.size)]
+        groups, start, count = [], 0, 0
+        for end in self.document_offsets[1:] + [self.size]:
+            count += 1
+            if (max_documents and count >= max_documents) or (max_bytes and end - start >= max_bytes):
+                groups.append((start, end))
+                start, count = end, 0
+        if start < self.size:
+            groups.append((start, self.size))
+        return groups
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'HTMLSpool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,143 @@
+# Filename: src/image_assets.py
+import io
+import logging
+import re
+import threading
+from hashlib import sha256
+from pathlib import Path
+import yaml
+from .utils import discover_files, ensure_directory
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_PATTERN = re.compile(r'\[\[image:(\w+)\]\]')
+
+class ImageManifest:
+    """Persistent [[image:name]] -> file mapping stored as images.yaml in the input folder.
+
+    Paths are stored relative to the input folder when possible so packages can move.
+    """
+
+    FILENAME = 'images.yaml'
+
+    def __init__(self, input_folder: str | Path):
+        self.input_folder = Path(input_folder)
+        self.path = self.input_folder / self.FILENAME
+        self.entries: dict[str, str] = {}
+        self._mtime = None
+        self.reload()
+
+    def reload(self):
+        """Re-read the manifest if it changed on disk."""
+        if not self.path.exists():
+            self.entries, self._mtime = {}, None
+            return
+        mtime = self.path.stat().st_mtime_ns
+        if mtime == self._mtime:
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            loaded = yaml.safe_load(f) or {}
+        self.entries = {str(k): str(v) for k, v in loaded.items()}
+        self._mtime = mtime
+
+    def resolve(self, placeholder: str) -> Path | None:
+        entry = self.entries.get(placeholder)
+        if entry is None:
+            return None
+        path = Path(entry)
+        return path if path.is_absolute() else self.input_folder / path
+
+    def assign(self, placeholder: str, file_path: str | Path):
+        """Record a placeholder mapping and save the manifest."""
+        path = Path(file_path)
+        try:
+            path = path.resolve().relative_to(self.input_folder.resolve())
+        except ValueError:
+            pass  # Outside the input folder: keep the absolute path
+        self.entries[placeholder] = path.as_posix()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            yaml.dump(self.entries, f, default_flow_style=False, sort_keys=True)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def fingerprint(self) -> str:
+        """Hash of the mappings plus each target's size/mtime, for fragment cache keys."""
+        digest = sha256()
+        for placeholder in sorted(self.entries):
+            target = self.resolve(placeholder)
+            stat = target.stat() if target.exists() else None
+            digest.update(f"{placeholder}={self.entries[placeholder]}:{stat.st_size if stat else -1}:{stat.st_mtime_ns if stat else -1}\n".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+def unmapped_placeholders(input_folder: str | Path, manifest: ImageManifest | None = None) -> list[str]:
+    """Placeholders used by the package's documents that images.yaml does not map to an existing file, in first-use order."""
+    manifest = manifest or ImageManifest(input_folder)
+    unmapped = {}
+    for md_file in discover_files(str(input_folder)):
+        for placeholder in PLACEHOLDER_PATTERN.findall(md_file.read_text(encoding='utf-8')):
+            source = manifest.resolve(placeholder)
+            if source is None or not source.is_file():
+                unmapped.setdefault(placeholder, None)
+    return list(unmapped)
+
+class ImageCache:
+    """Content-addressed store of downscaled, recompressed images.
+
+    Identical source bytes map to one processed file, so an image referenced by
+    80 documents is written, and embedded in the PDF, once.
+    """
+
+    FORMAT_MIME = {'PNG': 'image/png', 'JPEG': 'image/jpeg', 'GIF': 'image/gif', 'WEBP': 'image/webp'}
+
+    def __init__(self, cache_dir: str | Path, target_dpi: int = 200, max_width_in: float = 6.5, jpeg_quality: int = 85):
+        self.cache_dir = Path(cache_dir)
+        self.max_width_px = int(target_dpi * max_width_in)
+        self.jpeg_quality = jpeg_quality
+        self._by_source: dict[str, Path] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: str | Path) -> Path:
+        """Return the processed file for source, creating it on first use."""
+        data = Path(source).read_bytes()
+        digest = sha256(data).hexdigest()
+        key = f"{digest[:32]}-{self.max_width_px}-{self.jpeg_quality}"
+        with self._lock:
+            cached = self._by_source.get(key)
+            if cached is not None and cached.exists():
+                return cached
+            existing = next(iter(sorted(self.cache_dir.glob(f"{key}.*"))), None) if self.cache_dir.exists() else None
+            if existing is None:
+                ensure_directory(self.cache_dir)
+                body, extension = self._process(data)
+                existing = self.cache_dir / f"{key}.{extension}"
+                existing.write_bytes(body)
+                logger.info(f"Cached image {Path(source).name}: {len(data)} -> {len(body)} bytes")
+            self._by_source[key] = existing
+            return existing
+
+    def _process(self, data: bytes) -> tuple[bytes, str]:
+        """Detect the real format, downscale to the target width and recompress."""
+        from PIL import Image, UnidentifiedImageError  # Deferred: only needed when images are present
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except (UnidentifiedImageError, OSError):
+            return data, 'svg' if data.lstrip()[:5] in (b'<?xml', b'<svg ') else 'bin'
+
+        source_format = image.format
+        resized = image.width > self.max_width_px
+        if resized:
+            height = round(image.height * self.max_width_px / image.width)
+            image = image.resize((self.max_width_px, height), Image.Resampling.LANCZOS)
+
+        out = io.BytesIO()
+        has_alpha = image.mode in ('RGBA', 'LA', 'P') and ('A' in image.mode or 'transparency' in image.info)
+        if source_format == 'JPEG' or (not has_alpha and image.mode in ('RGB', 'L', 'CMYK')):
+            image.convert('RGB' if image.mode != 'L' else 'L').save(out, 'JPEG', quality=self.jpeg_quality, optimize=True)
+            extension = 'jpg'
+        else:
+            image.save(out, 'PNG', optimize=True)
+            extension = 'png'
+        # Keep the original when recompression does not help and no downscale happened
+        if not resized and len(out.getvalue()) >= len(data) and source_format in self.FORMAT_MIME:
+            return data, source_format.lower().replace('jpeg', 'jpg')
+        return out.getvalue(), extension
@@ -0,0 +1,324 @@
+# Filename: src/order_manifest.py
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+import yaml
+
+logger = logging.getLogger(__name__)
+
+class OrderManifest:
+    """Reading order stored as order.yaml in the input folder, so reordering never renames files.
+
+    Entries are document paths relative to the input folder. Documents missing
+    from the list (e.g. newly added files) follow the listed ones in prefix
+    order; entries whose file no longer exists are ignored.
+    """
+
+    FILENAME = 'order.yaml'
+
+    def __init__(self, input_folder: str | Path):
+        self.input_folder = Path(input_folder)
+        self.path = self.input_folder / self.FILENAME
+        self.entries: list[str] = []
+        self._mtime = None
+        self.reload()
+
+    def reload(self):
+        """Re-read the manifest if it changed on disk."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            self.entries, self._mtime = [], None
+            return
+        if mtime == self._mtime:
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            loaded = yaml.safe_load(f) or []
+        self.entries = [str(entry) for entry in loaded]
+        self._mtime = mtime
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.input_folder).as_posix()
+        except ValueError:
+            return path.name
+
+    def apply(self, files: list[Path]) -> list[Path]:
+        """Return files (already in prefix order) rearranged to follow the manifest."""
+        if not self.entries:
+            return files
+        position = {entry: index for index, entry in enumerate(self.entries)}
+        listed = sorted((f for f in files if self._relative(f) in position), key=lambda f: position[self._relative(f)])
+        return listed + [f for f in files if self._relative(f) not in position]
+
+    def save(self, files: list[Path]):
+        """Record a new reading order: one small atomic write, whatever moved."""
+        self.entries = [self._relative(Path(f)) for f in files]
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(self.entries, f, default_flow_style=False, allow_unicode=True)
+        tmp_path.replace(self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+        logger.info(f"Saved reading order for {len(self.entries)} documents to {self.path}")
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+        self.entries, self._mtime = [], None
+
+_manifests: dict[Path, OrderManifest] = {}
+_manifests_lock = threading.Lock()
+
+def order_manifest_for(input_folder: str | Path) -> OrderManifest:
+    """Shared, mtime-refreshed OrderManifest for a folder."""
+    folder = Path(input_folder)
+    with _manifests_lock:
+        manifest = _manifests.get(folder)
+        if manifest is None:
+            manifest = _manifests[folder] = OrderManifest(folder)
+        else:
+            manifest.reload()
+        return manifest
+
+JOURNAL_FILENAME = '.mc-reorder-journal.json'
+TEMP_SUFFIX = '.mc-reorder-tmp'
+
+def plan_prefix_renames(files: list[Path], width: int = 2) -> list[tuple[Path, Path]]:
+    """Compute the complete, ordered rename sequence that gives files prefixes matching their order.
+
+    Only files whose name changes are touched. A rename whose target is still
+    occupied by another file being renamed waits until that file has moved;
+    each cycle of such waits costs exactly one extra rename through a
+    temporary name. A target taken by a file outside the plan gets a
+    _1, _2... suffix. Nothing on disk is modified.
+    """
+    files = [Path(f) for f in files]
+    planned = set(files)
+    occupied = set(files)
+    occupied.update(sibling for folder in {f.parent for f in files} for sibling in folder.iterdir())
+    targets = {}
+    claimed = set()
+    for index, old_path in enumerate(files):
+        base_name = re.sub(r'^\d+-', '', old_path.stem)
+        new_path = old_path.parent / f"{index:0{width}d}-{base_name}{old_path.suffix}"
+        suffix = 0
+        # A target held by a file outside the plan (or already claimed) cannot be freed: pick another name
+        while new_path != old_path and (new_path in claimed or (new_path in occupied and new_path not in planned)):
+            suffix += 1
+            new_path = old_path.parent / f"{index:0{width}d}-{base_name}_{suffix}{old_path.suffix}"
+        claimed.add(new_path)
+        if new_path != old_path:
+            targets[old_path] = new_path
+
+    steps = []
+    blocked_by = {new: old for old, new in targets.items() if new in occupied}  # target -> file that must move first
+    ready = [old for old, new in targets.items() if new not in occupied]
+    pending = dict(targets)
+    while pending:
+        if not ready:
+            # Only cycles remain: park one file under a temporary name to break its cycle
+            old_path = next(iter(pending))
+            temp_path = old_path.with_name(f".{old_path.name}{TEMP_SUFFIX}")
+            steps.append((old_path, temp_path))
+            pending[temp_path] = pending.pop(old_path)
+            ready.append(temp_path)
+            freed = old_path
+        else:
+            old_path = ready.pop()
+            new_path = pending.pop(old_path)
+            steps.append((old_path, new_path))
+            freed = old_path
+        waiting = blocked_by.pop(freed, None)
+        if waiting is not None and waiting in pending:
+            ready.append(waiting)
+    return steps
+
+def _identity(path: Path) -> list[int]:
+    # The inode alone: renames preserve it, and so do edits made after a crash (which change size and mtime)
+    return [path.stat().st_ino]
+
+def _same_file(path: str | Path, identity: list[int]) -> bool:
+    try:
+        return _identity(Path(path))[0] == identity[0]  # Journals from older versions also stored size and mtime
+    except OSError:
+        return False
+
+def _write_durably(path: Path, data: dict):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(path)
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class ReorderJournal:
+    """Crash-safe record of a rename plan, written (and fsynced) before the first rename.
+
+    Each step stores the inode of the file it moves; renames preserve it, so
+    after a crash the completed prefix of the plan is found by checking which
+    targets hold their file. Recovery checks every rename before making it
+    and stops, keeping the journal, rather than overwrite a file. The journal
+    is removed once the plan has fully applied or been rolled back.
+
+    Steps hold absolute paths and may span subfolders, so there is one journal
+    per input tree: folder must be the input root, the only place recovery
+    (the CLI and FileOrderManager) looks for it.
+    """
+
+    def __init__(self, folder: str | Path):
+        self.path = Path(folder) / JOURNAL_FILENAME
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def begin(self, steps: list[tuple[Path, Path]]):
+        identities = {}
+        entries = []
+        for old_path, new_path in steps:
+            # A temp-staged file is journaled under its original identity
+            identity = identities.get(old_path) or _identity(old_path)
+            identities[new_path] = identity
+            entries.append({'from': str(old_path), 'to': str(new_path), 'id': identity})
+        _write_durably(self.path, {'steps': entries})
+
+    def load(self) -> list[dict]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)['steps']
+
+    def completed(self, entries: list[dict]) -> int:
+        """Number of leading steps already applied on disk.
+
+        A step is applied if its file sits at its target, or if the file's next
+        step (after temporary staging) is applied.
+        """
+        applied = [False] * len(entries)
+        next_applied = {}  # file identity -> applied state of that file's next step
+        for index in range(len(entries) - 1, -1, -1):
+            entry = entries[index]
+            key = entry['id'][0]
+            at_target = _same_file(entry['to'], entry['id'])
+            applied[index] = at_target or next_applied.get(key, False)
+            next_applied[key] = applied[index]
+        return next((index for index, done in enumerate(applied) if not done), len(entries))
+
+    @staticmethod
+    def _recover_step(entry: dict, source: str, target: str):
+        """Rename source to target only if source still holds the journaled file and target is free."""
+        if not _same_file(source, entry['id']):
+            raise FileNotFoundError(f"Cannot recover reorder: {source} no longer holds the file it journaled")
+        if os.path.lexists(target):  # os.rename would silently replace it on POSIX
+            raise FileExistsError(f"Cannot recover reorder: {target} already exists")
+        os.rename(source, target)
+
+    def rollback(self) -> int:
+        """Undo the applied steps, newest first; returns how many were reverted.
+
+        Raises OSError, leaving the journal in place, if the folder no longer matches it.
+        """
+        entries = self.load()
+        done = self.completed(entries)
+        for entry in reversed(entries[:done]):
+            self._recover_step(entry, entry['to'], entry['from'])
+        self.finish()
+        logger.warning(f"Rolled back {done} renames of an interrupted reorder in {self.path.parent}")
+        return done
+
+    def replay(self) -> int:
+        """Apply the remaining steps; returns how many were applied."""
+        entries = self.load()
+        remaining = entries[self.completed(entries):]
+        for entry in remaining:
+            self._recover_step(entry, entry['from'], entry['to'])
+        self.finish()
+        logger.warning(f"Finished {len(remaining)} renames of an interrupted reorder in {self.path.parent}")
+        return len(remaining)
+
+    def finish(self):
+        self.path.unlink(missing_ok=True)
+
+def apply_renames(folder: str | Path, steps: list[tuple[Path, Path]]) -> list[tuple[Path, Path]]:
+    """Journal the plan in folder (the input root, see ReorderJournal), run it, and roll everything back if any rename fails."""
+    if not steps:
+        return steps
+    journal = ReorderJournal(folder)
+    if journal.exists():
+        raise RuntimeError(f"An interrupted reorder is pending in {folder}; recover it first")
+    journal.begin(steps)
+    try:
+        for old_path, new_path in steps:
+            if os.path.lexists(new_path):  # os.rename would silently replace it on POSIX
+                raise FileExistsError(f"Rename target already exists: {new_path}")
+            os.rename(old_path, new_path)
+    except OSError:
+        journal.rollback()
+        raise
+    journal.finish()
+    logger.info(f"Applied {len(steps)} renames in {folder}")
+    return steps
+
+def recover_interrupted_reorder(folder: str | Path, replay: bool = False) -> int | None:
+    """Roll back (default) or finish a reorder a crash left half-applied; None if there was nothing to do."""
+    journal = ReorderJournal(folder)
+    if not journal.exists():
+        return None
+    return journal.replay() if replay else journal.rollback()
+
+def renamed_paths(files: list[Path], steps: list[tuple[Path, Path]]) -> list[Path]:
+    """Where each of files ends up once steps (including temporary staging) have run."""
+    where = {Path(f): Path(f) for f in files}
+    holder = {path: path for path in where}  # current path -> original file
+    for old_path, new_path in steps:
+        original = holder.pop(old_path)
+        holder[new_path] = original
+        where[original] = new_path
+    return [where[Path(f)] for f in files]
+
+def prefixes_keep_order(paths: list[Path], input_folder: str | Path) -> bool:
+    """True if paths, listed by prefix the way discover_files does without order.yaml, come back in this order.
+
+    Not the case when the order interleaves folders (a/x, b/z, a/y): files are
+    discovered one folder at a time, whatever their prefixes say.
+    """
+    from .utils import get_file_order
+    root = Path(input_folder)
+
+    def prefix_key(path: Path) -> tuple:
+        try:
+            parts = path.relative_to(root).parts
+        except ValueError:
+            parts = (path.name,)
+        return tuple(get_file_order(part) for part in parts)
+    return sorted(paths, key=prefix_key) == list(paths)
+
+def materialize_prefixes(files: list[Path], folder: str | Path, width: int = 2) -> list[tuple[Path, Path]]:
+    """Rename files so their numeric prefixes spell out the given order; returns the rename steps applied.
+
+    Files stay in their own subfolder; folder is the input root, which holds the
+    journal and order.yaml. order.yaml is dropped once the prefixes alone
+    reproduce the order; otherwise it is rewritten with the new names so the
+    order is not lost.
+    """
+    if not files:
+        return []
+    steps = plan_prefix_renames(files, width)
+    applied = apply_renames(folder, steps)
+    final = renamed_paths(files, applied)
+    manifest = order_manifest_for(folder)
+    if prefixes_keep_order(final, folder):
+        manifest.clear()
+    else:
+        logger.warning(f"Prefixes cannot express a reading order that interleaves folders; keeping {manifest.path}")
+        manifest.save(final)
+    return applied
+
+def invert_renames(steps: list[tuple[Path, Path]]) -> list[tuple[Path, Path]]:
+    """The plan that exactly undoes steps."""
+    return [(new_path, old_path) for old_path, new_path in reversed(steps)]
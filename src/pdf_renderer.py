@@ -1,89 +1,226 @@
 # Filename: src/pdf_renderer.py
 import os
+import shutil
 import subprocess
 import logging
-from weasyprint import HTML, CSS
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from .build_profile import timed
+from .chunked_renderer import ChunkedRenderer
 from .config import ConfigManager
+from .css_template import load_template, stylesheet_cache
+from .html_spool import DOCUMENT_MARKER, HTMLSpool, group_ranges
 from .utils import compute_hash
 
 logger = logging.getLogger(__name__)
 
+_font_config = None
+
+def shared_font_config():
+    """One FontConfiguration per process, so fontconfig setup and parsed fonts are reused across builds."""
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
+
+@lru_cache(maxsize=None)
+def probe_tool(name: str) -> str | None:
+    """First line of `name --version`, or None if the tool is missing; probed once per process."""
+    path = shutil.which(name)
+    if path is None:
+        return None
+    try:
+        result = subprocess.run([path, '--version'], capture_output=True, text=True, check=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return (result.stdout.splitlines() or [name])[0]
+
+def split_documents(html_content: str, chunks: int) -> list[str]:
+    """Split generated HTML into up to `chunks` contiguous groups of document sections of similar size.
+
+    Anything before the first document (cover, running elements) stays with the first group.
+    """
+    starts = []
+    position = html_content.find(DOCUMENT_MARKER)
+    while position != -1:
+        starts.append(position)
+        position = html_content.find(DOCUMENT_MARKER, position + 1)
+    return [html_content[start:end] for start, end in group_ranges(starts, len(html_content), chunks)]
+
+@contextmanager
+def _as_spool(html_content: str | HTMLSpool):
+    """Yield html_content as an HTMLSpool; a spool made here from a string is closed afterwards."""
+    if isinstance(html_content, HTMLSpool):
+        yield html_content
+        return
+    with HTMLSpool.from_string(html_content) as spool:
+        yield spool
+
+def _weasyprint_html(html_content: str | HTMLSpool):
+    """WeasyPrint document source: strings are parsed directly, spools are read from their file."""
+    from weasyprint import HTML  # Deferred: importing WeasyPrint costs ~1s of startup
+    if isinstance(html_content, HTMLSpool):
+        return HTML(file_obj=html_content.reader(), encoding='utf-8')
+    return HTML(string=html_content)
+
 class PDFRenderer:
     """Handles PDF generation with WeasyPrint primary and Pandoc/LaTeX fallback."""
     
     def __init__(self, config_manager: ConfigManager):
         self.config = config_manager
 
-    def _load_base_css(self) -> str:
-        """Load the base CSS file from resources."""
-        css_path = os.path.join(os.path.dirname(__file__), 'resources', 'styles.txt')
-        with open(css_path, 'r', encoding='utf-8') as f:
-            return f.read()
-
     def get_render_css(self) -> str:
-        """Apply current config overrides to base CSS."""
-        base_css = self._load_base_css()
-        return self.config.update_css_placeholders(base_css)
+        """Apply current config overrides to the compiled base CSS template (memoised per value set)."""
+        return load_template().render(self.config.css_params())
+
+    def get_stylesheet(self, css_content: str | None = None):
+        """Parsed WeasyPrint stylesheet, reused across builds with the same CSS."""
+        from weasyprint import CSS
+        return stylesheet_cache.get(
+            css_content or self.get_render_css(), lambda css: CSS(string=css, font_config=shared_font_config())
+        )
 
     def is_pandoc_available(self) -> bool:
-        """Check if pandoc is installed."""
-        try:
-            subprocess.run(['pandoc', '--version'], capture_output=True, check=True)
-            return True
-        except (FileNotFoundError, subprocess.CalledProcessError):
-            return False
-
-    def render_via_weasyprint(self, html_content: str, output_file: str) -> None:
-        """Primary rendering path using WeasyPrint."""
-        css_content = self.get_render_css()
-        html = HTML(string=html_content)
-        css = CSS(string=css_content)
-        html.write_pdf(output_file, stylesheets=[css])
-        logger.info("PDF rendered successfully with WeasyPrint")
-
-    def render_via_pandoc_latex(self, html_content: str, output_file: str) -> None:
-        """Fallback rendering using Pandoc → XeLaTeX."""
+        """Check that pandoc and xelatex are installed (cached per process)."""
+        return probe_tool('pandoc') is not None and probe_tool('xelatex') is not None
+
+    def render_via_weasyprint(self, html_content: str | HTMLSpool, output_file: str, profile=None) -> None:
+        """Primary rendering path using WeasyPrint; layout and drawing are timed separately.
+
+        With build.render_chunk_documents or build.render_chunk_html_mb set, the
+        package is laid out in chunks so peak memory does not grow with its length.
+        """
+        chunked = ChunkedRenderer.from_config(self)
+        if chunked is not None:
+            with _as_spool(html_content) as spool:
+                stats = chunked.render(spool, output_file, profile)
+            logger.info(f"PDF rendered successfully with WeasyPrint ({stats['pages']} pages in {stats['chunks']} chunks)")
+            return
+        with timed(profile, 'layout'):
+            document = _weasyprint_html(html_content).render(
+                stylesheets=[self.get_stylesheet()], font_config=shared_font_config()
+            )
+        with timed(profile, 'draw'):
+            document.write_pdf(output_file)
+        logger.info(f"PDF rendered successfully with WeasyPrint ({len(document.pages)} pages)")
+
+    def layout_segment(self, html_content: str, css_content: str, page_offset: int, profile=None):
+        """Lay out a standalone segment whose page numbering starts after page_offset; returns the WeasyPrint Document."""
+        from weasyprint import CSS
+        offset_css = CSS(string=f"@page :first {{ counter-reset: page {page_offset + 1}; }}")
+        with timed(profile, 'layout'):
+            return _weasyprint_html(html_content).render(
+                stylesheets=[self.get_stylesheet(css_content), offset_css], font_config=shared_font_config()
+            )
+
+    def render_segment(self, html_content: str, css_content: str, page_offset: int, output_file: str,
+                       profile=None) -> int:
+        """Render one standalone segment whose page numbering starts after page_offset; returns its page count."""
+        document = self.layout_segment(html_content, css_content, page_offset, profile)
+        with timed(profile, 'draw'):
+            document.write_pdf(output_file)
+        return len(document.pages)
+
+    def render_via_pandoc_latex(self, html_content: str | HTMLSpool, output_file: str) -> None:
+        """Fallback rendering using Pandoc → XeLaTeX.
+
+        Each build works in its own temporary directory, so concurrent fallbacks
+        never share files and nothing is left behind on failure. With
+        build.latex_chunks > 1 (0 = one per CPU) the documents are compiled as
+        parallel XeLaTeX jobs and merged; LaTeX page numbers are suppressed in
+        that mode because each chunk would restart them. Chunk files are copied
+        straight from the spool, never assembled in memory.
+        """
         if not self.is_pandoc_available():
-            raise RuntimeError("Pandoc not available for LaTeX fallback")
-        
-        css_content = self.get_render_css()
-        temp_html = 'temp.html'
-        temp_css = 'temp.css'
-        
-        with open(temp_html, 'w', encoding='utf-8') as f:
-            f.write(f'<html><head><link rel="stylesheet" href="{temp_css}"></head><body>{html_content}</body></html>')
-        with open(temp_css, 'w', encoding='utf-8') as f:
-            f.write(css_content)
-        
+            raise RuntimeError("Pandoc/XeLaTeX not available for LaTeX fallback")
+
+        with _as_spool(html_content) as spool:
+            chunk_count = self.config.get('build.latex_chunks', 1)
+            ranges = spool.ranges(chunk_count or os.cpu_count() or 1)
+            output_path = Path(output_file).resolve()
+            with tempfile.TemporaryDirectory(prefix='mc-latex-') as workdir:
+                workdir = Path(workdir)
+                css_path = workdir / 'styles.css'
+                css_path.write_text(self.get_render_css(), encoding='utf-8')
+                if len(ranges) == 1:
+                    html_path = self._write_pandoc_html(spool, ranges[0], css_path, workdir / 'document.html')
+                    self._run_pandoc(html_path, css_path, output_path)
+                else:
+                    # The spool is a single file handle, so chunks are written out before the parallel compile
+                    html_paths = [
+                        self._write_pandoc_html(spool, byte_range, css_path, workdir / f"chunk-{index:03d}.html")
+                        for index, byte_range in enumerate(ranges)
+                    ]
+                    logger.info(f"Compiling {len(ranges)} XeLaTeX chunks in parallel")
+                    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+                        parts = list(pool.map(
+                            lambda html_path: self._run_pandoc(
+                                html_path, css_path, html_path.with_suffix('.pdf'), page_numbers=False
+                            ),
+                            html_paths
+                        ))
+                    self._merge_pdfs(parts, output_path)
+        logger.info("PDF rendered successfully with Pandoc/LaTeX fallback")
+
+    def _write_pandoc_html(self, spool: HTMLSpool, byte_range: tuple[int, int], css_path: Path, html_path: Path) -> Path:
+        with open(html_path, 'wb') as f:
+            f.write(f'<html><head><link rel="stylesheet" href="{css_path.name}"></head><body>'.encode('utf-8'))
+            spool.copy_to(f, *byte_range)
+            f.write(b'</body></html>')
+        return html_path
+
+    def _run_pandoc(self, html_path: Path, css_path: Path, output_path: Path, page_numbers: bool = True) -> Path:
         cmd = [
-            'pandoc', temp_html,
+            'pandoc', str(html_path),
             '--pdf-engine=xelatex',
-            '-o', output_file,
-            '--css', temp_css,
+            '-o', str(output_path),
+            '--css', str(css_path),
             '--variable', 'geometry=letterpaper,margin=1in',
             '--variable', 'fontsize=12pt'
         ]
-        subprocess.run(cmd, check=True)
-        
-        os.remove(temp_html)
-        os.remove(temp_css)
-        logger.info("PDF rendered successfully with Pandoc/LaTeX fallback")
+        if not page_numbers:
+            cmd += ['--variable', 'pagestyle=empty']
+        result = subprocess.run(cmd, cwd=html_path.parent, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"pandoc failed for {html_path.name}: {result.stderr.strip()[-2000:]}")
+        return output_path
 
-    def render_pdf(self, html_content: str, output_file: str, progress_callback=None) -> None:
-        """Main render method with fallback logic and progress."""
+    def _merge_pdfs(self, parts: list[Path], output_path: Path) -> None:
+        from pypdf import PdfWriter
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(str(part))
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            writer.write(f)
+        writer.close()
+        tmp_path.replace(output_path)
+
+    def render_pdf(self, html_content: str | HTMLSpool, output_file: str, progress_callback=None, profile=None) -> str:
+        """Main render method with fallback logic and progress; returns the output SHA-256.
+
+        html_content may be a string or an HTMLSpool from HTMLGenerator.spool_html.
+        """
         if progress_callback:
             progress_callback("Rendering PDF...")
         try:
             if self.config.config.get('use_latex_fallback', False):
                 raise Exception("LaTeX fallback forced via config")
-            self.render_via_weasyprint(html_content, output_file)
+            self.render_via_weasyprint(html_content, output_file, profile)
         except Exception as e:
             logger.warning(f"WeasyPrint failed ({str(e)}); falling back to Pandoc/LaTeX")
             if progress_callback:
                 progress_callback("Switching to LaTeX fallback...")
-            self.render_via_pandoc_latex(html_content, output_file)
-        
-        pdf_hash = compute_hash(output_file)
+            with timed(profile, 'latex_fallback'):
+                self.render_via_pandoc_latex(html_content, output_file)
+
+        with timed(profile, 'hash'):
+            pdf_hash = compute_hash(output_file)
         logger.info(f"PDF generated: {output_file} (SHA256: {pdf_hash})")
         if progress_callback:
-            progress_callback("PDF build complete.")
\ No newline at end of file
+            progress_callback("PDF build complete.")
+        return pdf_hash
\ No newline at end of file
@@ -0,0 +1,221 @@
+# Filename: src/render_worker.py
+import logging
+import os
+import copy
+import pickle
+import secrets
+import socket
+import struct
+import sys
+import time
+from multiprocessing.connection import AuthenticationError, Client, Listener, answer_challenge, deliver_challenge
+from pathlib import Path
+from .builder import build_package
+from .config import ConfigManager
+from .html_generator import HTMLGenerator
+from .pdf_renderer import PDFRenderer, shared_font_config
+from .utils import ensure_directory
+
+logger = logging.getLogger(__name__)
+
+KEY_FILENAME = 'render-worker.key'
+REQUEST_TIMEOUT = 10.0  # Seconds a client may take to authenticate and send its request
+# Job config paths that are resolved against the client's working directory
+PATH_KEYS = (('input_folder',), ('output_file',), ('build', 'cache_dir'))
+
+class WorkerUnavailable(Exception):
+    """No render worker is listening at the configured address (callers fall back to in-process builds)."""
+
+def default_address(cache_dir: str | Path) -> str:
+    """Unix socket inside the cache dir on POSIX, a named pipe on Windows."""
+    if sys.platform == 'win32':
+        return r'\\.\pipe\mc-assembler-render'
+    return str(Path(cache_dir) / 'render-worker.sock')
+
+def worker_address(config_manager: ConfigManager) -> str:
+    return config_manager.get('build.worker_address') or default_address(config_manager.get('build.cache_dir', '.mc_cache'))
+
+def key_path(config_manager: ConfigManager) -> Path:
+    return Path(config_manager.get('build.cache_dir', '.mc_cache')) / KEY_FILENAME
+
+def create_authkey(path: Path) -> bytes:
+    """Write a fresh random key readable only by the current user; clients must present it to connect."""
+    ensure_directory(path.parent)
+    key = secrets.token_bytes(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+class RenderWorker:
+    """Long-lived build server that keeps WeasyPrint, fonts and parsed stylesheets warm.
+
+    Jobs carry the caller's effective config and working directory, so GUI
+    edits, CLI overrides and relative paths apply without the worker
+    re-reading config.yaml. Jobs run one at a time; the HTMLGenerator (and its
+    fragment cache) is reused while the build and images sections stay the
+    same. A client gets request_timeout seconds to authenticate and send its
+    request before it is dropped, so a stalled client cannot hold up others.
+    """
+
+    def __init__(self, address: str, authkey: bytes, request_timeout: float = REQUEST_TIMEOUT):
+        self.address = address
+        self.authkey = authkey
+        self.request_timeout = request_timeout
+        self.jobs = 0
+        self._config = None
+        self._generator = None
+        self._generator_key = None
+        self._running = False
+
+    def warm(self):
+        """Pay WeasyPrint's import and fontconfig setup once, before the first job arrives."""
+        start = time.perf_counter()
+        try:
+            import weasyprint  # noqa: F401
+            shared_font_config()
+        except Exception as e:
+            logger.warning(f"Render worker could not pre-load WeasyPrint: {e}")
+            return
+        logger.info(f"Render worker warmed up in {time.perf_counter() - start:.2f}s")
+
+    def serve_forever(self):
+        if not self.address.startswith('\\\\') and os.path.exists(self.address):
+            os.remove(self.address)  # Stale socket from a worker that did not exit cleanly
+        self._running = True
+        # No authkey here: Listener would run the handshake inside accept() with no timeout
+        with Listener(self.address) as listener:
+            logger.info(f"Render worker listening on {self.address}")
+            while self._running:
+                try:
+                    conn = listener.accept()
+                except OSError as e:
+                    logger.warning(f"Render worker could not accept a client: {e}")
+                    continue
+                with conn:
+                    try:
+                        self._authenticate(conn)
+                    except AuthenticationError:
+                        logger.warning("Rejected render worker client with a bad key")
+                        continue
+                    except (EOFError, OSError) as e:
+                        logger.warning(f"Render worker dropped a client during authentication: {e!r}")
+                        continue
+                    self._serve_connection(conn)
+        if self._generator:
+            self._generator.shutdown()
+        logger.info("Render worker stopped")
+
+    def _authenticate(self, conn):
+        """The handshake Listener(authkey=...) runs, with reads bounded by request_timeout."""
+        if hasattr(conn, 'fileno') and sys.platform != 'win32':
+            # SO_RCVTIMEO makes a blocked read fail with EAGAIN instead of waiting forever
+            with socket.socket(fileno=os.dup(conn.fileno())) as sock:
+                seconds = int(self.request_timeout)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO,
+                                struct.pack('ll', seconds, int((self.request_timeout - seconds) * 1_000_000)))
+        deliver_challenge(conn, self.authkey)
+        answer_challenge(conn, self.authkey)
+
+    def _serve_connection(self, conn):
+        """Answer one request; a misbehaving or idle client is logged and dropped, never stopping the worker."""
+        try:
+            if not conn.poll(self.request_timeout):
+                logger.warning(f"Dropping render worker client idle for {self.request_timeout:g}s")
+                return
+            request = conn.recv()
+            if not isinstance(request, dict):
+                logger.warning(f"Ignoring render worker request of type {type(request).__name__}")
+                conn.send({'status': 'error', 'error': 'Worker requests must be dicts'})
+                return
+            conn.send(self.handle(request))
+        except (EOFError, OSError) as e:
+            logger.warning(f"Render worker client disconnected: {e!r}")
+        except pickle.UnpicklingError as e:
+            logger.warning(f"Render worker received an unreadable request: {e}")
+        except Exception as e:
+            logger.error(f"Render worker failed to answer a request: {e!r}")
+
+    def handle(self, request: dict) -> dict:
+        op = request.get('op')
+        if op == 'ping':
+            return {'status': 'ok', 'pid': os.getpid(), 'jobs': self.jobs}
+        if op == 'shutdown':
+            self._running = False
+            return {'status': 'ok'}
+        if op == 'build':
+            try:
+                return self.run_job(request)
+            except Exception as e:
+                logger.error(f"Worker build failed: {e}")
+                return {'status': 'error', 'error': str(e)}
+        return {'status': 'error', 'error': f"Unknown worker op: {op}"}
+
+    def run_job(self, job: dict) -> dict:
+        cwd = job.get('cwd') or os.getcwd()
+        config = resolve_job_paths(job['config'], cwd)
+        generator_key = repr((config.get('build'), config.get('images')))
+        if self._generator is None or generator_key != self._generator_key:
+            if self._generator:
+                self._generator.shutdown()
+            self._config = ConfigManager.from_dict(config)
+            self._generator = HTMLGenerator(self._config)
+            self._generator_key = generator_key
+        else:
+            self._config.config = config
+            self._config.commit()  # New revision, so snapshot() (cover, header, CSS) follows the job's config
+        self.jobs += 1
+        return build_package(
+            self._generator, PDFRenderer(self._config),
+            os.path.join(cwd, job['input_folder']), os.path.join(cwd, job['output_file']), force=job.get('force', False)
+        )
+
+def resolve_job_paths(config: dict, cwd: str) -> dict:
+    """A copy of a job's config with relative PATH_KEYS made absolute against the client's working directory."""
+    config = copy.deepcopy(config)
+    for keys in PATH_KEYS:
+        section = config
+        for key in keys[:-1]:
+            section = section.get(key)
+            if not isinstance(section, dict):
+                break
+        else:
+            value = section.get(keys[-1])
+            if value and not os.path.isabs(value):
+                section[keys[-1]] = os.path.join(cwd, value)
+    return config
+
+def _request(address: str, authkey: bytes, request: dict) -> dict:
+    try:
+        conn = Client(address, authkey=authkey)
+    except (OSError, AuthenticationError) as e:
+        raise WorkerUnavailable(f"No render worker at {address}: {e}") from e
+    with conn:
+        conn.send(request)
+        return conn.recv()
+
+def _client_key(config_manager: ConfigManager) -> bytes:
+    try:
+        return key_path(config_manager).read_bytes()
+    except OSError as e:
+        raise WorkerUnavailable(f"Render worker key not found: {e}") from e
+
+def submit_build(config_manager: ConfigManager, input_folder: str, output_file: str, force: bool = False) -> dict:
+    """Hand a build to the running worker and return its summary; raises WorkerUnavailable if none is listening."""
+    reply = _request(worker_address(config_manager), _client_key(config_manager), {
+        'op': 'build',
+        'config': config_manager.config,
+        'input_folder': os.path.abspath(input_folder),
+        'output_file': os.path.abspath(output_file),
+        'force': force,
+        'cwd': os.getcwd(),
+    })
+    if reply.get('status') == 'error':
+        raise RuntimeError(reply['error'])
+    return reply
+
+def ping(config_manager: ConfigManager) -> dict:
+    return _request(worker_address(config_manager), _client_key(config_manager), {'op': 'ping'})
+
+def stop_worker(config_manager: ConfigManager) -> dict:
+    return _request(worker_address(config_manager), _client_key(config_manager), {'op': 'shutdown'})
@@ -0,0 +1,124 @@
+# Filename: src/segment_renderer.py
+import json
+import logging
+from hashlib import sha256
+from pathlib import Path
+from pypdf import PdfWriter
+from .build_profile import timed
+from .utils import compute_hash, ensure_directory
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_FORMAT_VERSION = '1'  # Bump to invalidate every cached segment
+
+class SegmentedRenderer:
+    """Incremental PDF builds: one cached PDF segment per document, stitched at the end.
+
+    Each segment is keyed on its HTML, the render CSS, the render-relevant config
+    and its starting page number. The page offset is part of the key because
+    running footers print absolute page numbers; a typo fix that keeps a
+    document's page count leaves every later segment valid.
+    """
+
+    INDEX_FILE = 'index.json'
+    RENDER_KEYS = ('classification', 'cover', 'header', 'footer')
+
+    def __init__(self, pdf_renderer, cache_dir: str | Path | None = None):
+        self.renderer = pdf_renderer
+        self.config = pdf_renderer.config
+        self.cache_dir = Path(cache_dir or self.config.get('build.cache_dir', '.mc_cache')) / 'segments'
+        self.hits = 0
+        self.misses = 0
+
+    def _config_fingerprint(self) -> str:
+        relevant = {key: self.config.config.get(key) for key in self.RENDER_KEYS}
+        return sha256(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _segment_key(self, html_content: str, css_content: str, config_hash: str, page_offset: int) -> str:
+        digest = sha256()
+        for part in (SEGMENT_FORMAT_VERSION, config_hash, css_content, str(page_offset), html_content):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _load_index(self) -> dict:
+        index_path = self.cache_dir / self.INDEX_FILE
+        if not index_path.exists():
+            return {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Segment index unreadable ({e}); rebuilding all segments")
+            return {}
+
+    def _save_index(self, index: dict):
+        index_path = self.cache_dir / self.INDEX_FILE
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        tmp_path.replace(index_path)
+
+    def render(self, segments: list[tuple[str, str]], output_file: str, progress_callback=None, profile=None) -> dict:
+        """Render changed segments, merge all segments into output_file and return build stats.
+
+        With a BuildProfile, progress goes through profile.advance (with a percentage) instead of progress_callback.
+        """
+        ensure_directory(self.cache_dir)
+        self.hits = self.misses = 0
+        css_content = self.renderer.get_render_css()
+        config_hash = self._config_fingerprint()
+        old_index = self._load_index()
+        index = {}
+        segment_paths = []
+        page_offset = 0
+
+        for position, (name, html_content) in enumerate(segments, start=1):
+            key = self._segment_key(html_content, css_content, config_hash, page_offset)
+            segment_path = self.cache_dir / f"{key}.pdf"
+            entry = old_index.get(key)
+            if entry and segment_path.exists():
+                self.hits += 1
+            else:
+                self.misses += 1
+                message = f"Rendering segment {position}/{len(segments)}: {name}"
+                if profile:
+                    profile.advance((position - 1) / len(segments), message)
+                elif progress_callback:
+                    progress_callback(message)
+                pages = self.renderer.render_segment(html_content, css_content, page_offset, str(segment_path), profile)
+                entry = {'name': name, 'pages': pages}
+            index[key] = entry
+            segment_paths.append(segment_path)
+            page_offset += entry['pages']
+
+        message = f"Stitching {len(segment_paths)} segments ({self.misses} re-rendered)..."
+        if profile:
+            profile.advance(1.0, message)
+            profile.record_cache('segments', self.hits, self.misses)
+        elif progress_callback:
+            progress_callback(message)
+        with timed(profile, 'merge'):
+            writer = PdfWriter()
+            for segment_path in segment_paths:
+                writer.append(str(segment_path), import_outline=True)
+            with open(output_file, 'wb') as f:
+                writer.write(f)
+            writer.close()
+
+        self._save_index(index)
+        self._prune(set(index))
+        logger.info(f"Incremental build: {self.misses} segments rendered, {self.hits} reused, {page_offset} pages")
+        with timed(profile, 'hash'):
+            pdf_hash = compute_hash(output_file)
+        logger.info(f"PDF generated: {output_file} (SHA256: {pdf_hash})")
+        return {'segments': len(segments), 'rendered': self.misses, 'reused': self.hits, 'pages': page_offset, 'sha256': pdf_hash}
+
+    def _prune(self, live_keys: set[str]):
+        """Delete cached segments not used by the latest build."""
+        for segment_path in self.cache_dir.glob('*.pdf'):
+            if segment_path.stem not in live_keys:
+                try:
+                    segment_path.unlink()
+                except OSError as e:
+                    logger.debug(f"Could not prune {segment_path}: {e}")
@@ -0,0 +1,53 @@
+# Filename: src/startup_report.py
+import re
+import subprocess
+import sys
+import time
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parse `python -X importtime` output into per-module timings (microseconds)."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append({
+                'module': match.group(4),
+                'self_us': int(match.group(1)),
+                'cumulative_us': int(match.group(2)),
+                'depth': (len(match.group(3)) - 1) // 2,
+            })
+    return modules
+
+def collect_import_report(module: str = 'src.gui.main_window', top: int = 20) -> dict:
+    """Import `module` in a fresh interpreter under -X importtime and summarise the cost."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    modules = parse_importtime(result.stderr)
+    top_level = [m for m in modules if m['depth'] == 0]
+    return {
+        'module': module,
+        'ok': result.returncode == 0,
+        'interpreter_wall_ms': round(wall_ms, 1),
+        'import_total_ms': round(sum(m['cumulative_us'] for m in top_level) / 1000, 1),
+        'module_count': len(modules),
+        'slowest': sorted(modules, key=lambda m: m['cumulative_us'], reverse=True)[:top],
+    }
+
+class StartupTimer:
+    """Records named startup milestones relative to process start, for time-to-first-window tracking."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.milestones: dict[str, float] = {}
+
+    def mark(self, name: str):
+        self.milestones[name] = round((time.perf_counter() - self.origin) * 1000, 1)
+
+    def as_dict(self) -> dict:
+        return dict(self.milestones)
@@ -1,33 +1,144 @@
 # Filename: src/utils.py
 import os
 import re
+import threading
+import time
+from functools import lru_cache
 from hashlib import sha256
 from pathlib import Path
+from .order_manifest import order_manifest_for
+
+ORDER_PREFIX = re.compile(r'(\d+)-')
+
+class InputIndex:
+    """Recursive os.scandir listing of Markdown files, cached per directory.
+
+    A directory is re-listed only when its own mtime changes (adding, removing
+    or renaming an entry updates it), so an unchanged tree costs one stat per
+    directory instead of one per file. Listings taken within RACY_WINDOW_NS of
+    the directory's mtime are not trusted, because coarse filesystem
+    timestamps could hide a second change in the same tick. Hidden directories
+    (e.g. .mc_cache) are skipped.
+
+    A scan also keeps each file's DirEntry stat data (size, mtime_ns), which
+    file_stats hands to build_manifest instead of a second stat per file. An
+    in-place edit does not touch its directory's mtime, though, so files in a
+    listing reused from an earlier call are stat'ed again.
+    """
+
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self):
+        # path -> (mtime, trusted, md names, subdirs, {md name: (size, mtime_ns)} as scanned)
+        self._dirs: dict[str, tuple[int, bool, list[str], list[str], dict[str, tuple[int, int]]]] = {}
+        self._lock = threading.Lock()
+        self.scans = 0
+
+    def files(self, input_folder: str | Path) -> list[Path]:
+        """All Markdown files under input_folder in hierarchical prefix order (01-economy/03-tariffs.md)."""
+        root = Path(input_folder)
+        if not root.is_dir():
+            raise ValueError(f"Input folder does not exist: {input_folder}")
+        return list(self.file_stats(input_folder, with_stats=False))
+
+    def file_stats(self, input_folder: str | Path, with_stats: bool = True) -> dict[Path, tuple[int, int] | None]:
+        """Like files(), mapping each file to its (size, mtime_ns): from this call's scan where it had one."""
+        root = Path(input_folder)
+        if not root.is_dir():
+            raise ValueError(f"Input folder does not exist: {input_folder}")
+        found = []
+        self._collect(root, (), found, with_stats)
+        found.sort(key=lambda item: item[0])
+        return {path: stat for _, path, stat in found}
+
+    def _collect(self, directory: Path, parent_key: tuple, found: list, with_stats: bool):
+        md_names, subdirs, scanned = self._listing(directory)
+        for name in md_names:
+            stat = None
+            if with_stats:
+                stat = scanned.get(name) if scanned is not None else None
+                if stat is None:
+                    st = os.stat(directory / name)
+                    stat = (st.st_size, st.st_mtime_ns)
+            found.append((parent_key + (get_file_order(name),), directory / name, stat))
+        for name in subdirs:
+            self._collect(directory / name, parent_key + (get_file_order(name),), found, with_stats)
+
+    def _listing(self, directory: Path) -> tuple[list[str], list[str], dict[str, tuple[int, int]] | None]:
+        """(md names, subdirs, stat data) with stat data only when this call scanned the directory."""
+        key = os.fspath(directory)
+        mtime = os.stat(key).st_mtime_ns
+        with self._lock:
+            cached = self._dirs.get(key)
+            if cached and cached[0] == mtime and cached[1]:
+                return cached[2], cached[3], None
+        md_names, subdirs, stats = [], [], {}
+        with os.scandir(key) as entries:
+            for entry in entries:
+                # d_type answers is_file()/is_dir() without an extra stat on most filesystems
+                if entry.name.lower().endswith('.md') and entry.is_file():
+                    md_names.append(entry.name)
+                    st = entry.stat()  # Free on Windows, one stat elsewhere; build_manifest reuses it
+                    stats[entry.name] = (st.st_size, st.st_mtime_ns)
+                elif not entry.name.startswith('.') and entry.is_dir():
+                    subdirs.append(entry.name)
+        trusted = time.time_ns() - mtime > self.RACY_WINDOW_NS
+        with self._lock:
+            self.scans += 1
+            self._dirs[key] = (mtime, trusted, md_names, subdirs, stats)
+        return md_names, subdirs, stats
+
+    def clear(self):
+        with self._lock:
+            self._dirs.clear()
+
+input_index = InputIndex()
 
 def discover_files(input_folder: str) -> list[Path]:
-    """Discover and sort Markdown files by numeric prefix (e.g., 01-, 10-)."""
-    folder = Path(input_folder)
-    if not folder.is_dir():
-        raise ValueError(f"Input folder does not exist: {input_folder}")
-    
-    md_files = [f for f in folder.iterdir() if f.suffix.lower() == '.md' and f.is_file()]
-    md_files.sort(key=lambda f: (get_file_order(f.name), f.name))
-    return md_files
+    """Discover Markdown files (including section subfolders) in reading order.
 
+    order.yaml, when present, defines the order; otherwise files sort by numeric prefix (e.g., 01-, 10-).
+    """
+    return order_manifest_for(input_folder).apply(input_index.files(input_folder))
+
+def discover_file_stats(input_folder: str) -> list[tuple[Path, tuple[int, int]]]:
+    """discover_files with each file's (size, mtime_ns), reusing the input index's scan data where it is fresh."""
+    stats = input_index.file_stats(input_folder)
+    return [(path, stats[path]) for path in order_manifest_for(input_folder).apply(list(stats))]
+
+@lru_cache(maxsize=8192)
 def get_file_order(filename: str) -> tuple[int, str]:
     """Extract numeric prefix for sorting (handles 1- to 999- gracefully)."""
-    match = re.match(r'(\d+)-', filename)
+    match = ORDER_PREFIX.match(filename)
     if match:
         return int(match.group(1)), filename
     return 999, filename
 
-def compute_hash(file_path: str | Path) -> str:
-    """Compute SHA-256 hash of a file for deterministic verification."""
+def document_id(md_file: Path, input_folder: str | Path) -> str:
+    """Stable identifier for a document: its path below input_folder without the suffix, '/' joined as '--'."""
+    try:
+        relative = md_file.relative_to(Path(input_folder))
+    except ValueError:
+        relative = Path(md_file.name)
+    return '--'.join(relative.with_suffix('').parts)
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB keeps memory flat for multi-hundred-MB PDFs
+
+def compute_hash(file_path: str | Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Compute SHA-256 hash of a file for deterministic verification, streaming in fixed-size chunks."""
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found for hashing: {file_path}")
-    with open(path, 'rb') as f:
-        return sha256(f.read()).hexdigest()
+    digest = sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
 
 def ensure_directory(path: str | Path):
     """Create directory if it doesn't exist."""
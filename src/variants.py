@@ -0,0 +1,176 @@
+# Filename: src/variants.py
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+from .build_manifest import (
+    collect_inputs, create_build_manifest, input_fingerprint, is_up_to_date, load_build_manifest, write_build_manifest
+)
+from .config import ConfigManager
+from .html_spool import HTMLSpool
+from .pdf_renderer import PDFRenderer
+
+logger = logging.getLogger(__name__)
+
+# Config sections that change what the Markdown converts to; variants share one conversion, so they cannot override them
+CONTENT_KEYS = ('input_folder', 'build', 'images')
+# Unchunked, every variant process holds a full WeasyPrint layout of the package at once
+UNCHUNKED_AUTO_WORKERS = 2
+
+class Variant(NamedTuple):
+    name: str
+    output_file: str
+    config: dict  # Effective config: the base config with the variant's overrides applied
+
+def variant_output(output_file: str, name: str) -> str:
+    """Default variant output next to the main one: package.pdf -> package-<name>.pdf."""
+    output = Path(output_file)
+    return str(output.with_name(f"{output.stem}-{name}{output.suffix}"))
+
+def load_variants(config_manager: ConfigManager, names: list[str] | None = None) -> list[Variant]:
+    """Expand the config's `variants` list (optionally only the named ones) into effective configs.
+
+    Each entry has a name, an optional output_file (default <output>-<name>.pdf)
+    and overrides: dotted keys, as for `build --set`, mapped to values.
+    """
+    variants = []
+    for entry in config_manager.get('variants') or []:
+        name = entry.get('name')
+        if not name:
+            raise ValueError("Every variant needs a name")
+        if names and name not in names:
+            continue
+        variant_config = ConfigManager.from_dict(config_manager.config)
+        variant_config.config.pop('variants', None)
+        for key, value in (entry.get('overrides') or {}).items():
+            if key.split('.')[0] in CONTENT_KEYS:
+                raise ValueError(f"Variant '{name}' overrides {key}, but variants share one conversion of the content")
+            variant_config.set(key, value)
+        output_file = entry.get('output_file') or variant_output(config_manager.get('output_file'), name)
+        variant_config.set('output_file', output_file)
+        variants.append(Variant(name, output_file, variant_config.config))
+    unknown = set(names or ()) - {variant.name for variant in variants}
+    if unknown:
+        raise ValueError(f"Unknown variants: {', '.join(sorted(unknown))}")
+    return variants
+
+def variant_worker_count(config) -> int:
+    """build.variant_workers, or for 0 (auto) one per CPU when chunked rendering bounds each process's
+    memory, else UNCHUNKED_AUTO_WORKERS."""
+    workers = int(config.get('build.variant_workers', 2) or 0)
+    if workers:
+        return workers
+    if config.get('build.render_chunk_documents', 0) or config.get('build.render_chunk_html_mb', 0):
+        return os.cpu_count() or 1
+    return UNCHUNKED_AUTO_WORKERS
+
+def _render_variant(job: dict) -> dict:
+    """Worker-process entry point: the variant's front matter (cover, running elements, TOC), then the shared documents, rendered."""
+    from .html_generator import HTMLGenerator
+    start = time.perf_counter()
+    config_manager = ConfigManager.from_dict(job['config'])
+    generator = HTMLGenerator(config_manager)
+    with HTMLSpool(max_memory=int(config_manager.get('build.html_spool_mb', 32) * 1024 * 1024)) as spool:
+        for _, part in generator.front_matter(job['heading_index']):
+            spool.write(part)
+            spool.write('\n')
+        spool.append_file(job['documents_path'], job['document_offsets'])
+        pdf_hash = PDFRenderer(config_manager).render_pdf(spool, job['output_file'])
+    return {
+        'name': job['name'], 'status': 'built', 'output_file': job['output_file'],
+        'sha256': pdf_hash, 'seconds': round(time.perf_counter() - start, 3),
+    }
+
+def _failed(job: dict, error: Exception) -> dict:
+    logger.error(f"Variant {job['name']} failed: {error}")
+    return {'name': job['name'], 'status': 'error', 'output_file': job['output_file'], 'error': str(error)}
+
+def _run_jobs(jobs: list[dict], workers: int):
+    """Yield (job, result) as variants finish; failures become status 'error' instead of aborting the others."""
+    if workers <= 1 or len(jobs) == 1:
+        for job in jobs:
+            try:
+                yield job, _render_variant(job)
+            except Exception as e:
+                yield job, _failed(job, e)
+        return
+    # spawn, not fork: the GUI calls this from a QThread, and forking a threaded Qt process is unsafe
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+        futures = {pool.submit(_render_variant, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                yield job, future.result()
+            except Exception as e:
+                yield job, _failed(job, e)
+
+def build_variants(html_generator, input_folder: str, variants: list[Variant], progress_callback=None,
+                   force: bool = False) -> dict:
+    """Build every variant from a single conversion of the content and return a JSON-serialisable summary.
+
+    Markdown is converted and images are processed once, into a shared file of
+    document sections. Each variant then adds its own cover and running
+    header/footer, applies its own CSS and renders in a separate process
+    (build.variant_workers, see variant_worker_count). Variants whose output is up to
+    date are skipped, as in build_package.
+    """
+    start = time.perf_counter()
+    config = html_generator.config
+    progress = progress_callback or (lambda message: None)
+    progress("Checking inputs...")
+    previous = {variant.name: load_build_manifest(variant.output_file) for variant in variants}
+    inputs = collect_inputs(input_folder, next((manifest for manifest in previous.values() if manifest), None))
+
+    results, jobs = {}, []
+    for variant in variants:
+        css_content = PDFRenderer(ConfigManager.from_dict(variant.config)).get_render_css()
+        fingerprint = input_fingerprint(inputs, variant.config, css_content)
+        if not force and config.get('build.skip_unchanged', True) and is_up_to_date(previous[variant.name], fingerprint, variant.output_file):
+            results[variant.name] = {
+                'name': variant.name, 'status': 'cached', 'output_file': variant.output_file,
+                'sha256': previous[variant.name]['output']['sha256'],
+            }
+            continue
+        jobs.append({
+            'name': variant.name, 'config': variant.config, 'output_file': str(variant.output_file),
+            'css_content': css_content, 'fingerprint': fingerprint,
+        })
+
+    if jobs:
+        with tempfile.TemporaryDirectory(prefix='mc-variants-') as workdir:
+            progress("Generating shared HTML content...")
+            documents_path = Path(workdir) / 'documents.html'
+            with html_generator.spool_html(input_folder, front_matter=False) as shared:
+                with open(documents_path, 'wb') as f:
+                    shared.copy_to(f)
+                offsets = shared.document_offsets
+            for job in jobs:
+                job.update(documents_path=str(documents_path), document_offsets=offsets,
+                           heading_index=html_generator.heading_index)
+
+            workers = variant_worker_count(config)
+            progress(f"Rendering {len(jobs)} variants...")
+            for done, (job, result) in enumerate(_run_jobs(jobs, workers), start=1):
+                results[job['name']] = result
+                if result['status'] == 'built' and config.get('build.write_manifest', True):
+                    manifest = create_build_manifest(
+                        job['config'], inputs, job['output_file'], job['css_content'], result['sha256'], job['fingerprint']
+                    )
+                    result['manifest'] = str(write_build_manifest(manifest, job['output_file']))
+                progress(f"Variant {job['name']} {result['status']} ({done}/{len(jobs)})")
+
+    statuses = {result['status'] for result in results.values()}
+    summary = {
+        'status': 'error' if 'error' in statuses else 'built' if 'built' in statuses else 'cached',
+        'input_folder': str(input_folder),
+        'documents': len(inputs['documents']),
+        'variants': [results[variant.name] for variant in variants],
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Variant build finished in {summary['seconds']}s ({len(jobs)} rendered, {len(variants) - len(jobs)} up to date)")
+    return summary
@@ -0,0 +1,262 @@
+# Filename: src/watcher.py
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+from .css_template import BASE_CSS_PATH
+from .image_assets import ImageManifest
+from .order_manifest import OrderManifest
+from .utils import discover_files
+
+logger = logging.getLogger(__name__)
+
+class FileState(NamedTuple):
+    size: int
+    mtime_ns: int
+    inode: int
+
+class WatchTargets:
+    """Everything a build reads: the input folder's Markdown, images.yaml and mapped images, config.yaml and styles.txt."""
+
+    def __init__(self, input_folder: str | Path, config_path: str | Path, styles_path: str | Path = BASE_CSS_PATH):
+        self.input_folder = Path(input_folder)
+        self.config_path = Path(config_path)
+        self.styles_path = Path(styles_path)
+        self._images: set[Path] = set()
+        self._documents: list[Path] = []
+
+    def snapshot(self) -> dict[Path, FileState]:
+        """Stat every watched file; missing files are simply absent."""
+        paths = [
+            self.config_path, self.styles_path,
+            self.input_folder / ImageManifest.FILENAME, self.input_folder / OrderManifest.FILENAME
+        ]
+        try:
+            self._documents = discover_files(str(self.input_folder))
+            paths.extend(self._documents)
+            manifest = ImageManifest(self.input_folder)
+            self._images = {manifest.resolve(placeholder) for placeholder in manifest.entries}
+        except (ValueError, OSError) as e:
+            logger.debug(f"Watch snapshot incomplete: {e}")
+        paths.extend(self._images)
+        states = {}
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            states[path] = FileState(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        return states
+
+    def directories(self) -> set[Path]:
+        """Directories to subscribe to; watching directories also catches atomic saves and renames."""
+        dirs = {self.input_folder, self.config_path.parent, self.styles_path.parent}
+        dirs.update(document.parent for document in self._documents)  # Section subfolders
+        dirs.update(image.parent for image in self._images)
+        return {d.resolve() for d in dirs if d.is_dir()}
+
+    def kind(self, path: Path) -> str:
+        if path == self.config_path:
+            return 'config'
+        if path == self.styles_path:
+            return 'styles'
+        if path == self.input_folder / OrderManifest.FILENAME:
+            return 'order'
+        if path.name == ImageManifest.FILENAME or path in self._images:
+            return 'image'
+        return 'document'
+
+class ChangeSet:
+    """What changed between two snapshots.
+
+    Renames (e.g. Write Prefixes) are listed apart from removals and additions
+    for reporting, but they are not cheaper to rebuild: a document's id, and so
+    every anchor in it, comes from its path, so a renamed document re-renders
+    like an edited one.
+    """
+
+    def __init__(self):
+        self.modified: list[Path] = []
+        self.added: list[Path] = []
+        self.removed: list[Path] = []
+        self.renamed: list[tuple[Path, Path]] = []
+        self.config = False
+        self.styles = False
+        self.images = False
+        self.order = False  # order.yaml changed
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.modified or self.added or self.removed or self.renamed or self.order
+            or self.config or self.styles or self.images
+        )
+
+    @property
+    def styles_only(self) -> bool:
+        return self.styles and not (
+            self.modified or self.added or self.removed or self.renamed or self.order or self.config or self.images
+        )
+
+    @property
+    def config_only(self) -> bool:
+        return self.config and not (
+            self.modified or self.added or self.removed or self.renamed or self.order or self.styles or self.images
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            'modified': [p.name for p in self.modified],
+            'added': [p.name for p in self.added],
+            'removed': [p.name for p in self.removed],
+            'renamed': [[old.name, new.name] for old, new in self.renamed],
+            'config': self.config,
+            'styles': self.styles,
+            'images': self.images,
+            'order': self.order,
+        }
+
+FLAGS = {'config': 'config', 'styles': 'styles', 'image': 'images', 'order': 'order'}
+
+def diff_snapshots(targets: WatchTargets, old: dict[Path, FileState], new: dict[Path, FileState]) -> ChangeSet:
+    changes = ChangeSet()
+    removed = [p for p in old if p not in new]
+    added = [p for p in new if p not in old]
+    for path in old.keys() & new.keys():
+        if old[path] != new[path]:
+            kind = targets.kind(path)
+            if kind == 'document':
+                changes.modified.append(path)
+            else:
+                setattr(changes, FLAGS[kind], True)
+
+    # A document that disappears while another appears with the same inode, size and mtime was renamed
+    by_identity = {(s.inode, s.size, s.mtime_ns): p for p, s in ((p, new[p]) for p in added) if s.inode}
+    for path in removed:
+        match = by_identity.pop((old[path].inode, old[path].size, old[path].mtime_ns), None)
+        if match is not None and targets.kind(match) == 'document':
+            changes.renamed.append((path, match))
+            added.remove(match)
+            continue
+        if targets.kind(path) == 'document':
+            changes.removed.append(path)
+        else:
+            setattr(changes, FLAGS[targets.kind(path)], True)
+    for path in added:
+        if targets.kind(path) == 'document':
+            changes.added.append(path)
+        else:
+            setattr(changes, FLAGS[targets.kind(path)], True)
+    for attribute in ('modified', 'added', 'removed'):
+        getattr(changes, attribute).sort()
+    changes.renamed.sort()
+    return changes
+
+class InotifyBackend:
+    """Linux inotify through libc; events are only a wake-up signal, the snapshot diff decides what changed."""
+
+    IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x002, 0x004, 0x008
+    IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x040, 0x080, 0x100, 0x200
+    IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    @classmethod
+    def available(cls) -> bool:
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: dict[Path, int] = {}
+
+    def watch(self, directories: set[Path]):
+        for directory in directories - self._watches.keys():
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd >= 0:
+                self._watches[directory] = wd
+        for directory in self._watches.keys() - directories:
+            self._libc.inotify_rm_watch(self._fd, self._watches.pop(directory))
+
+    def wait(self, timeout: float | None) -> bool:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+class PollingBackend:
+    """Portable fallback: wake every interval and let the snapshot diff find changes."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+
+    def watch(self, directories: set[Path]):
+        pass
+
+    def wait(self, timeout: float | None) -> bool:
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        return True
+
+    def close(self):
+        pass
+
+class Watcher:
+    """Blocks until watched files change, then returns one ChangeSet for the whole burst.
+
+    A burst is over once two snapshots debounce seconds apart agree, so an
+    editor's write-rename-chmod sequence or a multi-file reorder becomes a
+    single rebuild.
+    """
+
+    def __init__(self, targets: WatchTargets, debounce: float = 0.3, poll_interval: float = 1.0, backend=None):
+        self.targets = targets
+        self.debounce = debounce
+        if backend is None:
+            try:
+                backend = InotifyBackend() if InotifyBackend.available() else PollingBackend(poll_interval)
+            except OSError as e:
+                logger.warning(f"inotify unavailable ({e}); polling every {poll_interval}s")
+                backend = PollingBackend(poll_interval)
+        self.backend = backend
+        self._snapshot = targets.snapshot()
+
+    def wait_for_changes(self, timeout: float | None = None) -> ChangeSet | None:
+        """Return the next coalesced ChangeSet, or None if timeout passes without one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.backend.watch(self.targets.directories())
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self.backend.wait(remaining):
+                snapshot = self.targets.snapshot()
+                if snapshot != self._snapshot:
+                    snapshot = self._settle(snapshot)
+                    changes = diff_snapshots(self.targets, self._snapshot, snapshot)
+                    self._snapshot = snapshot
+                    if changes:
+                        return changes
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    def _settle(self, snapshot: dict[Path, FileState]) -> dict[Path, FileState]:
+        while True:
+            time.sleep(self.debounce)
+            latest = self.targets.snapshot()
+            if latest == snapshot:
+                return snapshot
+            snapshot = latest
+
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,26 @@
+# tests/test_benchmark.py
+from src.benchmark import compare_reports, generate_corpus, run_benchmark
+from src.utils import discover_files
+
+def test_generate_corpus_has_tables_images_and_breaks(tmp_path):
+    folder = generate_corpus(tmp_path / 'corpus', 12, seed=1)
+    files = discover_files(str(folder))
+    assert len(files) == 12
+    text = ''.join(f.read_text(encoding='utf-8') for f in files)
+    assert '|---|' in text and '[[image:' in text and '<!-- PAGEBREAK -->' in text
+    assert (folder / 'images' / 'figure0.png').read_bytes().startswith(b'\x89PNG')
+
+def test_run_benchmark_reports_stages(tmp_path):
+    report = run_benchmark([5], render=False, workers=2, work_dir=tmp_path)
+    entry = report['scales']['5']
+    assert set(entry['stages']) == {'discovery', 'markdown', 'css'}
+    assert set(entry['skipped']) == {'layout', 'pdf_write', 'hash'}
+    assert entry['docs_per_second'] > 0
+    assert entry['peak_rss_mb'] > 0 and entry['worker_peak_rss_mb'] > 0  # Measured in the scale's own process
+
+def test_compare_reports_flags_slow_stages():
+    baseline = {'scales': {'10': {'stages': {'markdown': 1.0, 'css': 0.001}, 'total_seconds': 1.0}}}
+    current = {'scales': {'10': {'stages': {'markdown': 1.5, 'css': 0.004}, 'total_seconds': 1.5}}}
+    regressions = compare_reports(current, baseline, threshold=0.25)
+    assert [(r['stage'], r['ratio']) for r in regressions] == [('markdown', 1.5), ('total', 1.5)]
+    assert compare_reports(current, current) == []
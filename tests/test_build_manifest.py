@@ -0,0 +1,63 @@
+# tests/test_build_manifest.py
+import json
+import os
+from src.build_manifest import (
+    collect_inputs, create_build_manifest, input_fingerprint, is_up_to_date, manifest_path_for, write_build_manifest
+)
+from src.utils import compute_hash
+
+def make_package(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / '01-a.md').write_text('# A')
+    output = tmp_path / 'package.pdf'
+    output.write_bytes(b'%PDF-1.7 fake')
+    return docs, output
+
+def test_manifest_records_inputs_and_output(tmp_path):
+    docs, output = make_package(tmp_path)
+    inputs = collect_inputs(str(docs))
+    manifest = create_build_manifest({'classification': 'CUI'}, inputs, str(output), 'body {}')
+    path = write_build_manifest(manifest, output)
+    assert path == manifest_path_for(output) == tmp_path / 'package.pdf.manifest.json'
+    saved = json.loads(path.read_text())
+    assert saved['documents'][0]['sha256'] == compute_hash(docs / '01-a.md')
+    assert saved['output']['sha256'] == compute_hash(output)
+    assert saved['config'] == {'classification': 'CUI'}
+
+def test_unchanged_files_are_not_rehashed(tmp_path, monkeypatch):
+    docs, output = make_package(tmp_path)
+    previous = {'documents': collect_inputs(str(docs))['documents']}
+    monkeypatch.setattr('src.build_manifest.compute_hash', lambda path: (_ for _ in ()).throw(AssertionError('rehashed')))
+    assert collect_inputs(str(docs), previous)['documents'] == previous['documents']
+
+def test_fingerprint_tracks_content_and_output(tmp_path):
+    docs, output = make_package(tmp_path)
+    inputs = collect_inputs(str(docs))
+    fingerprint = input_fingerprint(inputs, {}, 'css')
+    manifest = create_build_manifest({}, inputs, str(output), 'css', fingerprint=fingerprint)
+    assert is_up_to_date(manifest, fingerprint, output)
+    assert input_fingerprint(inputs, {}, 'other css') != fingerprint
+
+    (docs / '01-a.md').write_text('# A changed')
+    assert input_fingerprint(collect_inputs(str(docs), manifest), {}, 'css') != fingerprint
+
+    os.utime(output, ns=(1, 1))
+    assert not is_up_to_date(manifest, fingerprint, output)
+
+def test_fingerprint_tracks_linked_images_and_renderer_versions(tmp_path, monkeypatch):
+    docs, output = make_package(tmp_path)
+    (docs / 'images').mkdir()
+    (docs / 'images' / 'seal.png').write_bytes(b'png')
+    (docs / '01-a.md').write_text('# A\n\n![Seal](images/seal.png) ![Web](https://example.com/x.png)')
+    inputs = collect_inputs(str(docs))
+    assert list(inputs['linked_images']) == [(docs / 'images' / 'seal.png').as_posix()]
+    fingerprint = input_fingerprint(inputs, {}, 'css')
+
+    (docs / 'images' / 'seal.png').write_bytes(b'a different png')
+    assert input_fingerprint(collect_inputs(str(docs)), {}, 'css') != fingerprint
+
+    inputs = collect_inputs(str(docs))
+    fingerprint = input_fingerprint(inputs, {}, 'css')
+    monkeypatch.setattr('src.html_generator.CustomRenderer.VERSION', 'next')
+    assert input_fingerprint(inputs, {}, 'css') != fingerprint
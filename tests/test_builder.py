@@ -0,0 +1,92 @@
+# tests/test_builder.py
+import json
+import pytest
+from src.builder import build_package
+from src.config import ConfigManager
+from src.html_generator import HTMLGenerator
+from src.utils import compute_hash
+
+class FakePDFRenderer:
+    """Copies the spooled HTML bytes to the 'PDF' so builds run without WeasyPrint."""
+    def __init__(self, config):
+        self.config = config
+        self.renders = 0
+
+    def get_render_css(self):
+        return 'body {}'
+
+    def render_pdf(self, html_content, output_file, progress_callback=None, profile=None):
+        self.renders += 1
+        with open(output_file, 'wb') as f:
+            html_content.copy_to(f)
+        return compute_hash(output_file)
+
+@pytest.fixture
+def package(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / '01-a.md').write_text('# A')
+    (docs / '02-b.md').write_text('# B')
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    config.set('build.cache_dir', str(tmp_path / 'cache'))
+    return config, str(docs), str(tmp_path / 'out.pdf')
+
+def test_build_writes_summary_and_manifest(package):
+    config, docs, output = package
+    renderer = FakePDFRenderer(config)
+    summary = build_package(HTMLGenerator(config), renderer, docs, output)
+    assert summary['status'] == 'built' and summary['documents'] == 2
+    assert summary['sha256'] == compute_hash(output)
+    manifest = json.loads(open(summary['manifest'], encoding='utf-8').read())
+    assert [d['path'].rsplit('/', 1)[-1] for d in manifest['documents']] == ['01-a.md', '02-b.md']
+
+def test_unchanged_inputs_skip_rendering(package):
+    config, docs, output = package
+    renderer = FakePDFRenderer(config)
+    generator = HTMLGenerator(config)
+    build_package(generator, renderer, docs, output)
+    summary = build_package(generator, renderer, docs, output)
+    assert summary['status'] == 'cached' and renderer.renders == 1
+
+    assert build_package(generator, renderer, docs, output, force=True)['status'] == 'built'
+    config.set('classification', 'SECRET')
+    assert build_package(generator, renderer, docs, output)['status'] == 'built'
+    assert renderer.renders == 3
+
+def test_build_report_and_progress(package):
+    config, docs, output = package
+    messages, percents = [], []
+    summary = build_package(
+        HTMLGenerator(config), FakePDFRenderer(config), docs, output,
+        messages.append, percent_callback=percents.append
+    )
+    report = json.loads(open(summary['report'], encoding='utf-8').read())
+    assert set(report['stages']) == {'prepare', 'html', 'render', 'finish'}
+    assert set(report['document_seconds']) == {'01-a', '02-b'}
+    assert report['cache']['fragments'] == {'hits': 0, 'misses': 2, 'hit_rate': 0.0}
+    assert percents == sorted(percents) and percents[-1] == 100
+    assert all('%' in message for message in messages)
+    assert report['process_peak_rss_mb'] >= report['build_peak_rss_growth_mb'] >= 0
+
+    config.set('build.profiler', 'cprofile')
+    summary = build_package(HTMLGenerator(config), FakePDFRenderer(config), docs, output, force=True)
+    assert summary['profile'].endswith('.prof')
+    assert json.loads(open(summary['report'], encoding='utf-8').read())['documents'] == 2
+
+def test_toc_forces_a_full_build(package):
+    config, docs, output = package
+    config.set('build.incremental', True)
+    config.set('toc.enabled', True)
+    renderer = FakePDFRenderer(config)
+    summary = build_package(HTMLGenerator(config), renderer, docs, output)
+    assert summary['incremental'] is False and renderer.renders == 1
+    assert '<nav id="toc">' in open(output, encoding='utf-8').read()
+
+def test_cross_document_links_force_a_full_build(package, tmp_path):
+    config, docs, output = package
+    config.set('build.incremental', True)
+    (tmp_path / 'docs' / '01-a.md').write_text('# A\n\nSee [B](02-b.md#b).')
+    renderer = FakePDFRenderer(config)
+    summary = build_package(HTMLGenerator(config), renderer, docs, output)
+    assert summary['incremental'] is False and renderer.renders == 1
+    assert 'href="#h-02-b--b"' in open(output, encoding='utf-8').read()
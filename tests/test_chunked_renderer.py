@@ -0,0 +1,89 @@
+# tests/test_chunked_renderer.py
+import re
+from types import SimpleNamespace
+from pypdf import PdfReader, PdfWriter
+from src.chunked_renderer import ChunkedRenderer
+from src.config import ConfigManager
+from src.html_spool import HTMLSpool
+
+class FakeDocument:
+    """One 800px-high page per document section; each section's id is an anchor and its links are internal."""
+    def __init__(self, html_content):
+        self.pages = [
+            SimpleNamespace(height=800, anchors={doc_id: (0, 100)},
+                            links=[('internal', target, (10, 20, 110, 40), None) for target in re.findall(r'href="#([^"]+)"', body)])
+            for doc_id, body in re.findall(r'<section class="document" id="([^"]+)">(.*?)</section>', html_content)
+        ]
+
+    def write_pdf(self, path):
+        writer = PdfWriter()
+        for _ in self.pages:
+            writer.add_blank_page(600, 600)
+        writer.write(path)
+
+class FakeRenderer:
+    def __init__(self, config):
+        self.config = config
+        self.calls = []
+
+    def get_render_css(self):
+        return 'body {}'
+
+    def layout_segment(self, html_content, css_content, page_offset, profile=None):
+        self.calls.append((page_offset, html_content.startswith('<div id="cover">'), '<div id="header">' in html_content))
+        return FakeDocument(html_content)
+
+def _spool(count):
+    spool = HTMLSpool()
+    spool.write('<div id="cover">c</div>')
+    spool.write('<div id="header">h</div><div id="footer">f</div>')
+    for i in range(count):
+        link = f'<a href="#doc-{(i + 3) % count}">next</a>' if i % 2 == 0 else ''
+        spool.write(f'<section class="document" id="doc-{i}">{link}</section>')
+    return spool
+
+def test_chunks_continue_page_numbers_and_keep_cross_chunk_links(tmp_path):
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    config.set('build.render_chunk_documents', 2)
+    renderer = FakeRenderer(config)
+    output = tmp_path / 'out.pdf'
+    with _spool(5) as spool:
+        stats = ChunkedRenderer.from_config(renderer).render(spool, str(output))
+
+    assert stats == {'chunks': 3, 'pages': 5, 'cross_chunk_links': 3}
+    assert [offset for offset, _, _ in renderer.calls] == [0, 2, 4]
+    assert [cover for _, cover, _ in renderer.calls] == [True, False, False]
+    assert all(running for _, _, running in renderer.calls)
+    reader = PdfReader(str(output))
+    assert len(reader.pages) == 5
+    # doc-0 links to doc-3 (page 3): re-created as a link annotation pointing at that page
+    link = reader.pages[0]['/Annots'][0].get_object()
+    destination = link['/A']['/D']
+    assert reader.get_page_number(destination[0].get_object()) == 3
+    assert float(destination[3]) == (800 - 100) * 0.75
+
+def test_chunking_is_off_by_default_and_splits_by_size(tmp_path):
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    assert ChunkedRenderer.from_config(FakeRenderer(config)) is None
+    with _spool(4) as spool:
+        assert len(spool.document_groups()) == 1
+        assert len(spool.document_groups(max_bytes=1)) == 4
+        assert spool.document_groups(max_documents=3)[0][0] == 0
+
+def test_toc_in_first_chunk_is_renumbered_from_all_chunks(tmp_path):
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    config.set('build.render_chunk_documents', 2)
+    renderer = FakeRenderer(config)
+    layouts = []
+    layout_segment = renderer.layout_segment
+    renderer.layout_segment = lambda html_content, *args: layouts.append(html_content) or layout_segment(html_content, *args)
+    spool = HTMLSpool()
+    spool.write('<div id="cover">c</div>')
+    spool.write('<nav id="toc"><h1>Contents</h1><ul><li><a href="#doc-0">A</a></li><li><a href="#doc-3">D</a></li></ul></nav>')
+    for i in range(4):
+        spool.write(f'<section class="document" id="doc-{i}"></section>')
+    with spool:
+        stats = ChunkedRenderer.from_config(renderer).render(spool, str(tmp_path / 'out.pdf'))
+    assert stats['pages'] == 4 and len(layouts) == 3
+    assert '<a href="#doc-0" data-page="1">' in layouts[-1] and '<a href="#doc-3" data-page="4">' in layouts[-1]
+    assert 'data-page' not in layouts[0]
@@ -0,0 +1,28 @@
+# tests/test_cli.py
+import json
+import subprocess
+import sys
+import pytest
+from src.cli import build_parser, main
+
+def test_overrides_keep_yaml_types():
+    args = build_parser().parse_args(['build', '--set', 'header.height=30', '--set', 'use_latex_fallback=true'])
+    assert args.overrides == [('header.height', 30), ('use_latex_fallback', True)]
+
+def test_invalid_input_folder_exit_code(tmp_path, capsys):
+    code = main(['build', '--config', str(tmp_path / 'config.yaml'), '--input', str(tmp_path / 'missing')])
+    assert code == 3
+    assert json.loads(capsys.readouterr().out)['status'] == 'error'
+
+def test_headless_modules_do_not_import_qt():
+    code = "import sys, src.cli, src.builder, src.html_generator; print(any(m.startswith('PyQt6') for m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
+def test_corrupt_reorder_journal_is_reported_as_invalid_input(tmp_path, capsys):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / '.mc-reorder-journal.json').write_text('{not json', encoding='utf-8')
+    code = main(['build', '--config', str(tmp_path / 'config.yaml'), '--input', str(docs)])
+    assert code == 3
+    assert 'interrupted reorder' in json.loads(capsys.readouterr().out)['error']
@@ -0,0 +1,109 @@
+# tests/test_config.py
+import re
+import pytest
+from src.config import ConfigManager
+from src.css_template import BASE_CSS_PATH, load_template
+
+def legacy_update_css(config, css_content):
+    """The original chain of str.replace passes, kept as a reference for the compiled template."""
+    css_content = css_content.replace("margin-top: 20pt;", f"margin-top: {config['header']['height'] + 20}pt;")
+    css_content = css_content.replace("margin-bottom: 20pt;", f"margin-bottom: {config['footer']['height'] + 20}pt;")
+    css_content = css_content.replace("background: #0b2545;", f"background: {config['cover']['bg_color']};")
+    css_content = css_content.replace("padding-top: 180pt;", f"padding-top: {config['cover']['padding_top']}pt;")
+    if not config['classification']:
+        return re.sub(r'/\* Classification Banners.*?@page\s*\{.*?\}\s*\}\s*/\*\s*Table of Contents',
+                      '/* Table of Contents', css_content, flags=re.DOTALL)
+    return css_content.replace('content: "";', f'content: "{config["classification"]}";')
+
+@pytest.fixture
+def config_manager(tmp_path):
+    return ConfigManager(str(tmp_path / 'config.yaml'))
+
+@pytest.mark.parametrize('classification', ['', 'CUI // FOUO'])
+def test_compiled_template_matches_legacy_replacement(config_manager, classification):
+    config_manager.set('classification', classification)
+    config_manager.set('header.height', 35)
+    config_manager.set('cover.bg_color', '#123456')
+    with open(BASE_CSS_PATH, encoding='utf-8') as f:
+        base_css = f.read()
+    expected = legacy_update_css(config_manager.config, base_css)
+    assert load_template().render(config_manager.css_params()) == expected
+    assert config_manager.update_css_placeholders(base_css) == expected
+
+def test_render_is_memoised_per_params(config_manager):
+    template = load_template()
+    assert template.render(config_manager.css_params()) is template.render(config_manager.css_params())
+    assert load_template() is template
+    with open(BASE_CSS_PATH, encoding='utf-8') as f:
+        base_css = f.read()
+    assert config_manager.update_css_placeholders(base_css) is config_manager.update_css_placeholders(base_css)
+    assert config_manager.update_css_placeholders() is template.render(config_manager.css_params())
+
+def test_classification_is_escaped_as_one_css_string(config_manager):
+    config_manager.set('classification', 'SECRET "X"\nNOFORN')
+    css = config_manager.update_css_placeholders()
+    assert 'content: "SECRET \\"X\\"\\A NOFORN";' in css
+
+def test_get_handles_nested_keys(config_manager):
+    assert config_manager.get('header.height') == 20
+    config_manager.set('build.parallel_workers', 4)
+    assert config_manager.get('build.parallel_workers') == 4
+
+def test_changes_report_sections_and_bump_revision(config_manager):
+    changes = []
+    config_manager.add_listener(changes.append)
+    revision = config_manager.revision
+    config_manager.set('cover.bg_color', '#123456')
+    config_manager.set('cover.bg_color', '#123456')  # Unchanged: no event
+    config_manager.set('input_folder', 'elsewhere/')
+    assert [(c.sections, c.keys) for c in changes] == [
+        ({'cover'}, {'cover.bg_color'}), ({'paths'}, {'input_folder'})
+    ]
+    assert config_manager.revision == revision + 2 and changes[-1].revision == config_manager.revision
+
+def test_snapshot_is_immutable_and_rebuilt_only_on_change(config_manager):
+    snapshot = config_manager.snapshot()
+    assert config_manager.snapshot() is snapshot
+    with pytest.raises(AttributeError):
+        snapshot.cover.bg_color = '#000000'
+    config_manager.config['header']['height'] = 40  # In-place edits count once committed
+    assert config_manager.snapshot() is snapshot
+    assert config_manager.commit().keys == {'header.height'}
+    assert config_manager.snapshot().header.height == 40
+    assert config_manager.snapshot().cover == snapshot.cover
+    assert config_manager.css_params().header_margin == 60
+
+def test_reload_updates_sections_in_place(config_manager):
+    header = config_manager.config['header']
+    config_manager.set('header.height', 55)
+    changes = []
+    config_manager.add_listener(changes.append)
+    config_manager.load_config()  # The saved file still has the defaults
+    assert config_manager.config['header'] is header and header['height'] == 20
+    assert changes[0].touches('header') and not changes[0].touches('cover')
+
+def test_unsaved_changes_are_tracked_until_saved_or_reloaded(config_manager):
+    assert not config_manager.has_unsaved_changes
+    config_manager.set('header.height', 55)
+    assert config_manager.has_unsaved_changes
+    config_manager.save_config()
+    assert not config_manager.has_unsaved_changes
+    config_manager.config['cover']['padding_top'] = 90  # In-place edits are committed by save_config
+    config_manager.save_config()
+    assert ConfigManager(str(config_manager.config_path)).get('cover.padding_top') == 90
+    config_manager.set('header.height', 60)
+    config_manager.load_config()
+    assert not config_manager.has_unsaved_changes and config_manager.get('header.height') == 55
+
+def test_set_commits_only_its_path(config_manager, monkeypatch):
+    import src.config
+    changes = []
+    config_manager.add_listener(changes.append)
+    monkeypatch.setattr(src.config, 'diff_config', lambda *args: pytest.fail('set() diffed the whole config'))
+    config_manager.set('header.lines', [{'text': 'EDITED'}])
+    assert changes[-1].keys == {'header.lines'} and changes[-1].sections == {'header'}
+    assert config_manager.snapshot().header.lines[0].text == 'EDITED'
+    config_manager.config['header']['lines'][0]['text'] = 'mutated after set'
+    assert config_manager.snapshot().header.lines[0].text == 'EDITED'  # The committed copy is not shared
+    monkeypatch.undo()
+    assert config_manager.commit().keys == {'header.lines'}
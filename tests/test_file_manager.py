@@ -1,19 +1,27 @@
 # tests/test_file_manager.py
+import os
 import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtWidgets import QApplication
 from src.file_manager import FileManager
 
-def test_scan_files(tmp_path):
+@pytest.fixture(scope='module')
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+def test_scan_files(qapp, tmp_path):
     (tmp_path / '001-test.md').touch()
     fm = FileManager(str(tmp_path))
     assert len(fm.files) == 1
 
-def test_reorder_files(tmp_path):
-    fm = FileManager(str(tmp_path))
+def test_reorder_files(qapp, tmp_path):
     (tmp_path / 'file1.md').touch()
     (tmp_path / 'file2.md').touch()
-    fm.files = [tmp_path / 'file1.md', tmp_path / 'file2.md']
-    # Simulate reorder (swap)
-    fm.reorder_files(None, 0, 0, None, 1)  # Mock signal params
-    new_files = fm.scan_files()
-    assert new_files[0].name.startswith('000-')
-    assert new_files[1].name.startswith('001-')
\ No newline at end of file
+    fm = FileManager(str(tmp_path))
+    widget = fm.get_file_list_widget()
+    widget.addItem(widget.takeItem(0))
+    fm.reorder_files(None, 0, 0, None, 2)
+    assert [f.name for f in fm.files] == ['file2.md', 'file1.md']
+    fm.materialize_prefixes()
+    assert [f.name for f in fm.scan_files()] == ['000-file2.md', '001-file1.md']
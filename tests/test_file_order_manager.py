@@ -1,53 +1,63 @@
 # tests/test_file_order_manager.py
-import pytest
 import os
-from pathlib import Path
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtWidgets import QApplication, QMessageBox
 from src.file_order_manager import FileOrderManager
 
-def test_scan_files(tmp_path):
+@pytest.fixture(scope='module')
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+def _move_first_to_end(fm):
+    widget = fm.file_list_widget
+    widget.addItem(widget.takeItem(0))
+    fm.handle_reorder(None, 0, 0, None, widget.count())
+
+def test_scan_files(qapp, tmp_path):
     (tmp_path / '01-test.md').touch()
     fm = FileOrderManager(str(tmp_path))
     assert len(fm.files) == 1
     assert fm.files[0].name == '01-test.md'
 
-def test_handle_reorder(tmp_path, monkeypatch):
-    fm = FileOrderManager(str(tmp_path))
-    file1 = tmp_path / 'file1.md'
-    file2 = tmp_path / 'file2.md'
-    file1.touch()
-    file2.touch()
-    fm.files = [file1, file2]
+def test_handle_reorder_writes_manifest_only(qapp, tmp_path):
+    (tmp_path / 'file1.md').touch()
+    (tmp_path / 'file2.md').touch()
+    changes = []
+    fm = FileOrderManager(str(tmp_path), on_change=lambda: changes.append(True))
     fm.get_file_list_widget()
-    # Simulate reorder (swap)
-    monkeypatch.setattr(QMessageBox, 'question', lambda *args: QMessageBox.StandardButton.Yes)
-    fm.handle_reorder(None, 0, 0, None, 1)
-    new_files = fm.scan_files()
-    assert new_files[0].name == '00-file2.md'  # After swap
-    assert new_files[1].name == '01-file1.md'
+    _move_first_to_end(fm)
+    assert [f.name for f in fm.scan_files()] == ['file2.md', 'file1.md']
+    assert (tmp_path / 'file1.md').exists() and (tmp_path / 'order.yaml').exists()
+    assert changes == [True]
 
-def test_undo_reorder(tmp_path):
+def test_undo_reorder_swaps_manifest(qapp, tmp_path):
+    (tmp_path / 'file1.md').touch()
+    (tmp_path / 'file2.md').touch()
     fm = FileOrderManager(str(tmp_path))
-    file1 = tmp_path / '00-file.md'
-    file1.touch()
-    fm.files = [file1]
-    fm.previous_order = [str(tmp_path / 'original.md')]
+    fm.get_file_list_widget()
+    _move_first_to_end(fm)
     fm.undo_reorder()
-    assert (tmp_path / 'original.md').exists()
-    assert not file1.exists()
+    assert [f.name for f in fm.files] == ['file1.md', 'file2.md']
+    fm.undo_reorder()  # Undo again = redo
+    assert [f.name for f in fm.files] == ['file2.md', 'file1.md']
 
-def test_empty_folder(tmp_path):
+def test_empty_folder(qapp, tmp_path):
     fm = FileOrderManager(str(tmp_path))
     assert fm.files == []
 
-def test_conflict_rename(tmp_path):
+def test_materialize_prefixes(qapp, tmp_path, monkeypatch):
+    (tmp_path / '00-file.md').write_text('first', encoding='utf-8')
+    (tmp_path / 'file.md').write_text('second', encoding='utf-8')
     fm = FileOrderManager(str(tmp_path))
-    file1 = tmp_path / '00-file.md'
-    file2 = tmp_path / 'file.md'
-    file1.touch()
-    file2.touch()
-    fm.files = [file2, file1]
     fm.get_file_list_widget()
+    _move_first_to_end(fm)
     monkeypatch.setattr(QMessageBox, 'question', lambda *args: QMessageBox.StandardButton.Yes)
-    fm.handle_reorder(None, 0, 0, None, 1)  # Attempt reorder causing conflict
-    new_files = [f.name for f in fm.scan_files()]
-    assert '00-file_1.md' in new_files or similar  # Check for suffix
+    fm.materialize_prefixes()
+    assert [f.name for f in fm.files] == ['00-file.md', '01-file.md']  # 00-file.md is freed before file.md takes it
+    assert len(fm.last_renames) == 2
+    assert not (tmp_path / 'order.yaml').exists()
+    fm.undo_reorder()
+    assert (tmp_path / '00-file.md').read_text(encoding='utf-8') == 'first'
+    assert (tmp_path / 'file.md').read_text(encoding='utf-8') == 'second'
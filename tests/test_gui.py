@@ -0,0 +1,83 @@
+# tests/test_gui.py
+import os
+import sys
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtWidgets import QApplication
+from src.config import ConfigManager
+
+@pytest.fixture(scope='module')
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+def test_secondary_tabs_are_built_on_first_show(qapp, tmp_path):
+    from src.gui.main_window import MainWindow
+    window = MainWindow(ConfigManager(str(tmp_path / 'config.yaml')))
+    assert window.cover_tab is None and window.live_preview_tab is None
+    assert 'PyQt6.QtWebEngineWidgets' not in sys.modules
+    window.tabs.setCurrentIndex(1)
+    assert window.cover_tab is not None
+    window.refresh_preview()  # No-op until the preview tab exists
+
+class CountingGenerator:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_sections(self, input_folder, cancel_check=None):
+        self.calls += 1
+        return [('doc-a', f'<p>run {self.calls}</p>')]
+
+class StaticCSS:
+    def get_render_css(self):
+        return ''
+
+def test_preview_scheduler_coalesces_bursts(qapp, tmp_path):
+    from PyQt6.QtCore import QEventLoop, QTimer
+    from src.gui.preview_scheduler import PreviewScheduler
+    generator = CountingGenerator()
+    scheduler = PreviewScheduler(generator, StaticCSS(), lambda: str(tmp_path), delay_ms=20)
+    results = []
+    loop = QEventLoop()
+    scheduler.preview_ready.connect(lambda css, sections: results.append(sections) or loop.quit())
+    for _ in range(25):
+        scheduler.request()
+    QTimer.singleShot(5000, loop.quit)
+    loop.exec()
+    scheduler.shutdown()
+    assert generator.calls == 1
+    assert results == [[('doc-a', '<p>run 1</p>')]]
+
+def test_watch_controller_emits_one_changeset(qapp, tmp_path):
+    from PyQt6.QtCore import QEventLoop, QTimer
+    from src.gui.watch_controller import WatchController
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    (inputs / '01-a.md').write_text('# A', encoding='utf-8')
+    (tmp_path / 'config.yaml').write_text('{}', encoding='utf-8')
+    controller = WatchController(str(inputs), str(tmp_path / 'config.yaml'), debounce_ms=50)
+    received = []
+    loop = QEventLoop()
+    controller.changes_detected.connect(lambda changes: received.append(changes) or loop.quit())
+    (inputs / '01-a.md').write_text('# A, edited', encoding='utf-8')
+    (inputs / '02-b.md').write_text('# B', encoding='utf-8')
+    QTimer.singleShot(3000, loop.quit)
+    loop.exec()
+    controller.stop()
+    assert len(received) == 1
+    assert received[0].as_dict()['added'] == ['02-b.md']
+
+def test_skipped_image_placeholders_are_asked_about_once(qapp, tmp_path, monkeypatch):
+    from PyQt6.QtWidgets import QFileDialog
+    from src.gui.main_window import MainWindow
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / '01-a.md').write_text('[[image:seal]]')
+    window = MainWindow(ConfigManager(str(tmp_path / 'config.yaml')))
+    asked = []
+    monkeypatch.setattr(QFileDialog, 'getOpenFileName', lambda parent, title, *args: (asked.append(title), ('', ''))[1])
+    window._ask_for_unmapped_images(str(docs))
+    window._ask_for_unmapped_images(str(docs))
+    (docs / '02-b.md').write_text('[[image:logo]]')
+    window._ask_for_unmapped_images(str(docs))
+    assert asked == ['Select Image for seal', 'Select Image for logo']
@@ -0,0 +1,119 @@
+# tests/test_html_generator.py
+import pytest
+from src.config import ConfigManager
+from src.fragment_cache import FragmentCache
+from src.html_generator import HTMLGenerator
+
+@pytest.fixture
+def generator(tmp_path):
+    return HTMLGenerator(ConfigManager(str(tmp_path / 'config.yaml')))
+
+def test_generate_full_html_orders_documents(tmp_path, generator):
+    (tmp_path / '02-second.md').write_text('# Second')
+    (tmp_path / '01-first.md').write_text('# First')
+    html = generator.generate_full_html(str(tmp_path))
+    assert html.index('First') < html.index('Second')
+    assert 'class="cover-container"' in html
+
+def test_unchanged_documents_hit_fragment_cache(tmp_path, generator, monkeypatch):
+    (tmp_path / '01-a.md').write_text('# A')
+    (tmp_path / '02-b.md').write_text('# B')
+    generator.generate_full_html(str(tmp_path))
+    calls = []
+    original = generator._preprocess_markdown
+    monkeypatch.setattr(generator, '_preprocess_markdown', lambda md: calls.append(md) or original(md))
+    (tmp_path / '02-b.md').write_text('# B edited')
+    html = generator.generate_full_html(str(tmp_path))
+    assert calls == ['# B edited']
+    assert 'B edited' in html
+
+def test_parallel_conversion_matches_serial(tmp_path, generator):
+    for i in range(6):
+        (tmp_path / f'{i:02d}-doc.md').write_text(f'# Doc {i}\n\n- item\n\n<!-- PAGEBREAK -->\n\nText {i}')
+    serial = generator.generate_full_html(str(tmp_path))
+    parallel_gen = HTMLGenerator(generator.config)
+    parallel_gen.config.set('build.parallel_workers', 2)
+    try:
+        assert parallel_gen.generate_full_html(str(tmp_path)) == serial
+    finally:
+        parallel_gen.shutdown()
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache(max_bytes=10)
+    cache.put('a', '12345')
+    cache.put('b', '12345')
+    cache.get('a')
+    cache.put('c', '12345')
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+    assert cache.current_bytes == 10
+
+def test_fragment_cache_key_includes_version():
+    assert FragmentCache.make_key('# A', 'v1') != FragmentCache.make_key('# A', 'v2')
+
+def test_spooled_html_matches_full_html(tmp_path, generator):
+    for i in range(5):
+        (tmp_path / f'{i:02d}-doc.md').write_text(f'# Doc {i}\n\n' + 'word ' * 200)
+    expected = generator.generate_full_html(str(tmp_path))
+    generator.config.set('build.html_spool_mb', 0.001)  # Roll over to disk after ~1 KB
+    with generator.spool_html(str(tmp_path)) as spool:
+        assert spool.on_disk
+        assert spool.read_text() == expected
+        assert len(spool.document_offsets) == 5
+        chunks = [b''.join(spool.iter_bytes(start, end)).decode('utf-8') for start, end in spool.ranges(2)]
+    assert len(chunks) == 2 and ''.join(chunks) == expected
+    assert chunks[1].startswith('<section class="document"')
+
+def test_headings_get_stable_anchors_and_cross_document_links_resolve(tmp_path, generator):
+    (tmp_path / '01-intro.md').write_text('# Overview\n\n## Scope\n\n## Scope\n\nSee [rates](02-costs.md#tariff-rates) and [below](#scope).')
+    (tmp_path / '02-costs.md').write_text('# Costs\n\n## Tariff *Rates*\n\nBack to [intro](01-intro.md).')
+    html = generator.generate_full_html(str(tmp_path))
+    assert '<h2 id="h-01-intro--scope">' in html and '<h2 id="h-01-intro--scope-2">' in html
+    assert 'href="#h-02-costs--tariff-rates"' in html and '<h2 id="h-02-costs--tariff-rates">' in html
+    assert 'href="#h-01-intro--scope"' in html and 'href="#doc-01-intro"' in html
+    assert [(e['anchor'], e['text']) for e in generator.merged_heading_index(2) if e['document'] == '02-costs'] == [
+        ('h-02-costs--costs', 'Costs'), ('h-02-costs--tariff-rates', 'Tariff Rates')
+    ]
+
+def test_toc_lists_headings_and_only_edited_document_is_reconverted(tmp_path, generator, monkeypatch):
+    generator.config.set('toc.enabled', True)
+    generator.config.set('toc.depth', 2)
+    (tmp_path / '01-a.md').write_text('# Alpha\n\n## Detail\n\n### Too deep')
+    (tmp_path / '02-b.md').write_text('# Beta')
+    html = generator.generate_full_html(str(tmp_path))
+    assert html.index('id="cover"') < html.index('<nav id="toc">') < html.index('<section class="document"')
+    toc = html[html.index('<nav id="toc">'):html.index('</nav>')]
+    assert '<a href="#h-01-a--detail">Detail</a>' in toc and 'Too deep' not in toc
+
+    calls = []
+    original = generator._preprocess_markdown
+    monkeypatch.setattr(generator, '_preprocess_markdown', lambda md: calls.append(md) or original(md))
+    (tmp_path / '02-b.md').write_text('# Gamma')
+    with generator.spool_html(str(tmp_path)) as spool:
+        spooled = spool.read_text()
+        assert len(spool.document_offsets) == 2
+    assert calls == ['# Gamma']
+    assert spooled == generator.generate_full_html(str(tmp_path))
+    assert '>Gamma</a>' in spooled and '>Detail</a>' in spooled and 'Beta' not in spooled
+
+def test_fragment_links_to_explicit_ids_are_left_alone(tmp_path, generator):
+    (tmp_path / '01-a.md').write_text('# Intro\n\n<a id="annex-note"></a>\n\n[note](#annex-note) [toc](#toc) [intro](#Intro)')
+    html = generator.generate_full_html(str(tmp_path))
+    assert 'href="#annex-note"' in html and 'href="#toc"' in html
+    assert 'href="#h-01-a--intro"' in html
+
+def test_section_ids_are_raw_and_escaped_once_in_markup(tmp_path, generator):
+    (tmp_path / 'Q&A "draft".md').write_text('# Q')
+    [(element_id, section)] = generator.iter_document_sections(str(tmp_path))
+    assert element_id == 'doc-Q&A "draft"'
+    assert 'id="doc-Q&amp;A &quot;draft&quot;"' in section
+
+def test_image_manifest_is_fingerprinted_once_per_run(tmp_path, generator, monkeypatch):
+    from src.image_assets import ImageManifest
+    for i in range(4):
+        (tmp_path / f'0{i}-doc.md').write_text(f'# Doc {i}\n\n[[image:seal]]')
+    calls = []
+    real_fingerprint = ImageManifest.fingerprint
+    monkeypatch.setattr(ImageManifest, 'fingerprint', lambda self: calls.append(1) or real_fingerprint(self))
+    generator.generate_full_html(str(tmp_path))
+    assert len(calls) == 1
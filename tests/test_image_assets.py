@@ -0,0 +1,55 @@
+# tests/test_image_assets.py
+import pytest
+from PIL import Image
+from src.config import ConfigManager
+from src.html_generator import HTMLGenerator
+from src.image_assets import ImageCache, ImageManifest, unmapped_placeholders
+
+def write_png(path, width=40, height=20):
+    Image.new('RGBA', (width, height), (255, 0, 0, 128)).save(path)
+
+def test_manifest_roundtrip_uses_relative_paths(tmp_path):
+    write_png(tmp_path / 'seal.png')
+    ImageManifest(tmp_path).assign('seal', tmp_path / 'seal.png')
+    manifest = ImageManifest(tmp_path)
+    assert manifest.entries == {'seal': 'seal.png'}
+    assert manifest.resolve('seal') == tmp_path / 'seal.png'
+
+def test_cache_downscales_and_dedups(tmp_path):
+    write_png(tmp_path / 'a.png', width=800, height=400)
+    (tmp_path / 'b.png').write_bytes((tmp_path / 'a.png').read_bytes())
+    cache = ImageCache(tmp_path / 'cache', target_dpi=100, max_width_in=2)
+    first, second = cache.get(tmp_path / 'a.png'), cache.get(tmp_path / 'b.png')
+    assert first == second
+    assert Image.open(first).size == (200, 100)
+    assert len(list((tmp_path / 'cache').iterdir())) == 1
+
+def test_cache_detects_real_format(tmp_path):
+    Image.new('RGB', (10, 10)).save(tmp_path / 'photo.png', 'JPEG')  # JPEG bytes with a .png name
+    processed = ImageCache(tmp_path / 'cache').get(tmp_path / 'photo.png')
+    assert processed.suffix == '.jpg'
+
+def test_mapped_placeholders_never_prompt(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    write_png(docs / 'seal.png')
+    ImageManifest(docs).assign('seal', docs / 'seal.png')
+    for i in range(3):
+        (docs / f'0{i}-doc.md').write_text('[[image:seal]]')
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    config.set('build.cache_dir', str(tmp_path / 'cache'))
+    html = HTMLGenerator(config).generate_full_html(str(docs))
+    assert html.count('<img src="file://') == 3
+    assert len(list((tmp_path / 'cache' / 'images').iterdir())) == 1
+
+def test_unmapped_placeholders_are_listed_not_prompted(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    write_png(docs / 'seal.png')
+    ImageManifest(docs).assign('seal', docs / 'seal.png')
+    (docs / '01-a.md').write_text('[[image:seal]] [[image:chart]]')
+    (docs / '02-b.md').write_text('[[image:chart]] [[image:map]]')
+    assert unmapped_placeholders(docs) == ['chart', 'map']
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    config.set('build.cache_dir', str(tmp_path / 'cache'))
+    assert '[Image placeholder: map]' in HTMLGenerator(config).generate_full_html(str(docs))
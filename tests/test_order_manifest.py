@@ -0,0 +1,130 @@
+# tests/test_order_manifest.py
+import os
+import pytest
+from src.order_manifest import (
+    JOURNAL_FILENAME, TEMP_SUFFIX, OrderManifest, ReorderJournal, apply_renames, materialize_prefixes, plan_prefix_renames,
+    recover_interrupted_reorder
+)
+from src.utils import discover_files
+
+def _touch(folder, *names):
+    for name in names:
+        (folder / name).write_text(name, encoding='utf-8')
+
+def test_discover_files_follows_order_yaml(tmp_path):
+    _touch(tmp_path, '01-a.md', '02-b.md', '03-c.md')
+    OrderManifest(tmp_path).save([tmp_path / '03-c.md', tmp_path / '01-a.md'])
+    _touch(tmp_path, '00-new.md')
+    assert [f.name for f in discover_files(str(tmp_path))] == ['03-c.md', '01-a.md', '00-new.md', '02-b.md']
+
+def test_reorder_renames_nothing(tmp_path):
+    _touch(tmp_path, '01-a.md', '02-b.md')
+    before = sorted(p.name for p in tmp_path.iterdir())
+    OrderManifest(tmp_path).save([tmp_path / '02-b.md', tmp_path / '01-a.md'])
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(before + ['order.yaml'])
+
+def test_materialize_prefixes_writes_the_order(tmp_path):
+    _touch(tmp_path, '01-a.md', '02-b.md', 'c.md')
+    renames = materialize_prefixes([tmp_path / 'c.md', tmp_path / '01-a.md', tmp_path / '02-b.md'], tmp_path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['00-c.md', '01-a.md', '02-b.md']
+    assert renames == [(tmp_path / 'c.md', tmp_path / '00-c.md')]
+
+def test_plan_touches_only_changed_prefixes(tmp_path):
+    names = [f'{i:02d}-doc{i}.md' for i in range(50)]
+    _touch(tmp_path, *names)
+    files = [tmp_path / name for name in names]
+    files.insert(10, files.pop(40))  # Move one document up
+    steps = plan_prefix_renames(files)
+    assert len(steps) == 31  # Only docs 10..40 change prefix
+    apply_renames(tmp_path, steps)
+    assert [p.name for p in discover_files(str(tmp_path))][10:12] == ['10-doc40.md', '11-doc10.md']
+    assert not (tmp_path / JOURNAL_FILENAME).exists()
+
+def test_swap_uses_temporary_name(tmp_path):
+    _touch(tmp_path, '00-a.md', '01-a.md')
+    steps = plan_prefix_renames([tmp_path / '01-a.md', tmp_path / '00-a.md'])
+    assert len(steps) == 3
+    apply_renames(tmp_path, steps)
+    assert (tmp_path / '00-a.md').read_text(encoding='utf-8') == '01-a.md'
+
+def test_failed_rename_rolls_back(tmp_path, monkeypatch):
+    _touch(tmp_path, 'a.md', 'b.md', 'c.md')
+    steps = plan_prefix_renames([tmp_path / 'c.md', tmp_path / 'b.md', tmp_path / 'a.md'])
+    real_rename = os.rename
+    calls = []
+    def flaky_rename(src, dst):
+        calls.append(src)
+        if len(calls) == 2:
+            raise PermissionError("share went away")
+        real_rename(src, dst)
+    monkeypatch.setattr(os, 'rename', flaky_rename)
+    with pytest.raises(PermissionError):
+        apply_renames(tmp_path, steps)
+    monkeypatch.setattr(os, 'rename', real_rename)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a.md', 'b.md', 'c.md']
+
+def test_interrupted_plan_can_be_replayed_or_rolled_back(tmp_path):
+    _touch(tmp_path, '00-a.md', '01-b.md', '02-c.md')
+    files = [tmp_path / '02-c.md', tmp_path / '00-a.md', tmp_path / '01-b.md']
+    steps = plan_prefix_renames(files)
+    ReorderJournal(tmp_path).begin(steps)
+    for old_path, new_path in steps[:2]:  # Crash after two renames
+        os.rename(old_path, new_path)
+    assert recover_interrupted_reorder(tmp_path, replay=True) == len(steps) - 2
+    assert [p.read_text(encoding='utf-8') for p in discover_files(str(tmp_path))] == ['02-c.md', '00-a.md', '01-b.md']
+
+    steps = plan_prefix_renames([tmp_path / '01-a.md', tmp_path / '02-b.md', tmp_path / '00-c.md'])
+    ReorderJournal(tmp_path).begin(steps)
+    os.rename(*steps[0])
+    assert recover_interrupted_reorder(tmp_path) == 1
+    assert [p.read_text(encoding='utf-8') for p in discover_files(str(tmp_path))] == ['02-c.md', '00-a.md', '01-b.md']
+    assert recover_interrupted_reorder(tmp_path) is None
+
+def test_recovery_refuses_to_overwrite_a_file_edited_after_the_crash(tmp_path):
+    _touch(tmp_path, '00-a.md', '01-b.md')
+    steps = plan_prefix_renames([tmp_path / '01-b.md', tmp_path / '00-a.md'])
+    ReorderJournal(tmp_path).begin(steps)
+    for step in steps[:2]:
+        os.rename(*step)
+    steps[1][1].write_text('edited after the crash, much longer than before', encoding='utf-8')
+    steps[0][0].write_text('new file in the way', encoding='utf-8')
+    with pytest.raises(FileExistsError):
+        recover_interrupted_reorder(tmp_path)
+    assert ReorderJournal(tmp_path).exists()
+    contents = {p.read_text(encoding='utf-8') for p in tmp_path.glob('*.md')}
+    assert {'edited after the crash, much longer than before', 'new file in the way'} <= contents
+
+def test_order_interleaving_folders_survives_materialize(tmp_path):
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+    _touch(tmp_path / 'a', 'x.md', 'y.md')
+    _touch(tmp_path / 'b', 'z.md')
+    order = [tmp_path / 'a' / 'x.md', tmp_path / 'b' / 'z.md', tmp_path / 'a' / 'y.md']
+    OrderManifest(tmp_path).save(order)
+    assert [p.read_text(encoding='utf-8') for p in discover_files(str(tmp_path))] == ['x.md', 'z.md', 'y.md']
+    materialize_prefixes(discover_files(str(tmp_path)), folder=tmp_path)
+    assert (tmp_path / 'order.yaml').exists()  # a/00-x, b/01-z, a/02-y would list as x, y, z
+    assert [p.read_text(encoding='utf-8') for p in discover_files(str(tmp_path))] == ['x.md', 'z.md', 'y.md']
+
+    OrderManifest(tmp_path).save([tmp_path / 'a' / '02-y.md', tmp_path / 'a' / '00-x.md', tmp_path / 'b' / '01-z.md'])
+    materialize_prefixes(discover_files(str(tmp_path)), folder=tmp_path)
+    assert not (tmp_path / 'order.yaml').exists()
+    assert [p.read_text(encoding='utf-8') for p in discover_files(str(tmp_path))] == ['y.md', 'x.md', 'z.md']
+
+def test_crash_in_a_plan_spanning_two_folders_recovers_from_the_root_journal(tmp_path):
+    for folder in ('01-a', '02-b'):
+        (tmp_path / folder).mkdir()
+        _touch(tmp_path / folder, '00-p.md', '01-q.md', '02-r.md')
+    order = [tmp_path / folder / name for folder in ('01-a', '02-b') for name in ('02-r.md', '01-q.md', '00-p.md')]
+    expected = [p.read_text(encoding='utf-8') for p in order]
+    steps = plan_prefix_renames(order)
+    assert {old.parent for old, _ in steps} == {tmp_path / '01-a', tmp_path / '02-b'}
+    for replay in (False, True):
+        ReorderJournal(tmp_path).begin(steps)
+        crash_at = next(i for i, (old, _) in enumerate(steps) if old.parent.name == '02-b') + 1
+        for step in steps[:crash_at]:  # Crash after the first rename in the second folder
+            os.rename(*step)
+        assert recover_interrupted_reorder(tmp_path, replay=replay) == (len(steps) - crash_at if replay else crash_at)
+        assert not (tmp_path / JOURNAL_FILENAME).exists()
+        assert not list(tmp_path.rglob(f'*{TEMP_SUFFIX}'))
+    assert [p.read_text(encoding='utf-8') for p in discover_files(str(tmp_path))] == expected
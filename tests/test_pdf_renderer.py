@@ -0,0 +1,50 @@
+# tests/test_pdf_renderer.py
+from pathlib import Path
+from pypdf import PdfReader, PdfWriter
+from src import pdf_renderer
+from src.config import ConfigManager
+from src.pdf_renderer import PDFRenderer, probe_tool, split_documents
+
+def _html(count):
+    cover = '<div id="cover">c</div>'
+    return cover + ''.join(f'<section class="document" id="doc-{i}">{"x" * 100}</section>' for i in range(count))
+
+def test_split_documents_keeps_order_and_cover():
+    html = _html(6)
+    chunks = split_documents(html, 3)
+    assert len(chunks) == 3
+    assert ''.join(chunks) == html
+    assert chunks[0].startswith('<div id="cover">')
+    assert split_documents(html, 1) == [html]
+
+def test_probe_tool_is_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(pdf_renderer.shutil, 'which', lambda name: calls.append(name))
+    probe_tool.cache_clear()
+    assert probe_tool('pandoc') is None
+    assert probe_tool('pandoc') is None
+    assert calls == ['pandoc']
+    probe_tool.cache_clear()
+
+def test_chunked_fallback_runs_in_private_dirs(tmp_path, monkeypatch):
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    config.set('build.latex_chunks', 3)
+    renderer = PDFRenderer(config)
+    monkeypatch.setattr(renderer, 'is_pandoc_available', lambda: True)
+    workdirs = set()
+
+    def fake_pandoc(html_path, css_path, output_path, page_numbers=True):
+        assert html_path.read_text(encoding='utf-8').endswith('</section></body></html>')
+        workdirs.add(html_path.parent)
+        writer = PdfWriter()
+        writer.add_blank_page(612, 792)
+        writer.write(str(output_path))
+        return output_path
+    monkeypatch.setattr(renderer, '_run_pandoc', fake_pandoc)
+
+    output = tmp_path / 'out.pdf'
+    renderer.render_via_pandoc_latex(_html(6), str(output))
+    assert len(PdfReader(str(output)).pages) == 3
+    assert len(workdirs) == 1
+    assert not any(Path(d).exists() for d in workdirs)
+    assert not (Path.cwd() / 'temp.html').exists()
@@ -0,0 +1,36 @@
+# tests/test_preview_content.py
+from src.gui.preview_content import PreviewContent
+
+def test_serves_skeleton_sections_and_css():
+    content = PreviewContent()
+    content.update('body { color: red; }', [('cover', '<div id="cover">C</div>'), ('doc-a', '<section id="doc-a">A</section>')])
+    mime, body = content.resolve('/index.html', {'x': '0', 'y': '120'})
+    assert mime == 'text/html'
+    assert b'<div id="doc-a"></div>' in body and b'mcLoadAll(["cover", "doc-a"], 1, 0, 120)' in body
+    assert content.resolve('/style.css') == ('text/css', b'body { color: red; }')
+    assert content.resolve('/section/doc-a') == ('text/html', b'<section id="doc-a">A</section>')
+    assert content.resolve('/section/missing') is None
+
+def test_style_only_update_keeps_sections():
+    content = PreviewContent()
+    content.update('a', [('doc-a', 'A')])
+    content.update('b')
+    assert content.revision == 2 and content.sections == {'doc-a': 'A'}
+
+def test_assets_are_confined_to_input_folder(tmp_path):
+    (tmp_path / 'inputs' / 'images').mkdir(parents=True)
+    (tmp_path / 'inputs' / 'images' / 'seal.png').write_bytes(b'png')
+    (tmp_path / 'secret.png').write_bytes(b'secret')
+    content = PreviewContent()
+    content.update('', [], asset_root=str(tmp_path / 'inputs'))
+    assert content.resolve('/images/seal.png') == ('image/png', b'png')
+    assert content.resolve('/../secret.png') is None
+    assert content.resolve('/01-doc.md') is None
+
+def test_section_ids_survive_html_and_url_special_characters():
+    content = PreviewContent()
+    content.update('', [('doc-Q&A #1?%41', '<section>Q</section>')])
+    _, body = content.resolve('/index.html')
+    assert b'<div id="doc-Q&amp;A #1?%41"></div>' in body and b'["doc-Q&A #1?%41"]' in body
+    # What mcFetchSection requests after encodeURIComponent
+    assert content.resolve('/section/doc-Q%26A%20%231%3F%2541') == ('text/html', b'<section>Q</section>')
@@ -0,0 +1,29 @@
+# tests/test_preview_state.py
+from src.gui.preview_state import PreviewState
+
+SECTIONS = [('cover', '<div id="cover">C</div>'), ('running', '<div id="header"></div>'), ('doc-a', 'A'), ('doc-b', 'B')]
+
+def loaded_state():
+    state = PreviewState()
+    state.commit('css-1', SECTIONS)
+    return state
+
+def test_first_render_reloads():
+    assert PreviewState().plan('css', SECTIONS).reload
+
+def test_style_only_change_swaps_css():
+    update = loaded_state().plan('css-2', None)
+    assert not update.reload and update.css == 'css-2' and update.patches == []
+
+def test_edited_document_is_patched():
+    sections = SECTIONS[:3] + [('doc-b', 'B edited')]
+    update = loaded_state().plan('css-1', sections)
+    assert update.patches == [('doc-b', 'B edited')] and update.css is None
+
+def test_structural_changes_reload():
+    state = loaded_state()
+    assert state.plan('css-1', SECTIONS[:3]).reload
+    assert state.plan('css-1', [SECTIONS[0], ('running', 'new header')] + SECTIONS[2:]).reload
+
+def test_unchanged_render_is_noop():
+    assert loaded_state().plan('css-1', SECTIONS).is_noop
@@ -0,0 +1,67 @@
+# tests/test_render_worker.py
+import os
+import threading
+from multiprocessing.connection import Client
+import pytest
+from src import render_worker
+from src.config import ConfigManager
+from src.render_worker import RenderWorker, WorkerUnavailable, create_authkey, key_path, ping, stop_worker, submit_build
+
+@pytest.fixture
+def config(tmp_path):
+    manager = ConfigManager(str(tmp_path / 'config.yaml'))
+    manager.set('build.cache_dir', str(tmp_path / 'cache'))
+    return manager
+
+def test_submit_without_worker_raises(config):
+    with pytest.raises(WorkerUnavailable):
+        submit_build(config, 'inputs', 'out.pdf')
+
+def test_worker_runs_jobs_and_reuses_generator(config, tmp_path, monkeypatch):
+    generators = []
+    def fake_build(html_generator, pdf_renderer, input_folder, output_file, force=False):
+        generators.append(html_generator)
+        return {'status': 'built', 'input_folder': input_folder, 'output_file': output_file,
+                'classification': html_generator.config.snapshot().classification}
+    monkeypatch.setattr(render_worker, 'build_package', fake_build)
+
+    worker = RenderWorker(render_worker.worker_address(config), create_authkey(key_path(config)), request_timeout=0.3)
+    thread = threading.Thread(target=worker.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            ping(config)
+            break
+        except WorkerUnavailable:
+            threading.Event().wait(0.02)
+
+    first = submit_build(config, str(tmp_path), str(tmp_path / 'a.pdf'))
+    config.set('classification', 'SECRET')
+    second = submit_build(config, str(tmp_path), str(tmp_path / 'b.pdf'))
+    assert first['output_file'].endswith('a.pdf')
+    assert second['classification'] == 'SECRET'
+    assert generators[0] is generators[1]
+    assert ping(config)['jobs'] == 2
+
+    # Bad clients are dropped without taking the worker down
+    address, key = render_worker.worker_address(config), key_path(config).read_bytes()
+    assert render_worker._request(address, key, ['not', 'a', 'dict'])['status'] == 'error'
+    with Client(address, authkey=key) as conn:
+        conn.send({'op': 'ping'})  # Disconnects without reading the reply
+    assert ping(config)['status'] == 'ok'
+    # Clients that stall before authenticating or before sending a request are dropped
+    with Client(address), Client(address, authkey=key):
+        assert ping(config)['status'] == 'ok'
+
+    # Relative paths resolve against the client's working directory, not the worker's
+    client_dir = tmp_path / 'client'
+    client_dir.mkdir()
+    monkeypatch.chdir(client_dir)
+    reply = submit_build(config, 'docs', 'out.pdf')
+    assert reply['input_folder'] == str(client_dir / 'docs') and reply['output_file'] == str(client_dir / 'out.pdf')
+    job_config = render_worker.resolve_job_paths({'input_folder': 'inputs/', 'build': {'cache_dir': '.mc_cache'}}, str(client_dir))
+    assert job_config == {'input_folder': os.path.join(str(client_dir), 'inputs/'), 'build': {'cache_dir': str(client_dir / '.mc_cache')}}
+
+    stop_worker(config)
+    thread.join(timeout=5)
+    assert not thread.is_alive()
@@ -0,0 +1,50 @@
+# tests/test_segment_renderer.py
+import pytest
+from pypdf import PdfReader, PdfWriter
+from src.config import ConfigManager
+from src.segment_renderer import SegmentedRenderer
+
+class FakePDFRenderer:
+    """Stands in for PDFRenderer: writes one blank page per 'page' marker in the HTML."""
+    def __init__(self, config):
+        self.config = config
+        self.rendered = []
+
+    def get_render_css(self):
+        return 'body {}'
+
+    def render_segment(self, html_content, css_content, page_offset, output_file, profile=None):
+        self.rendered.append((html_content, page_offset))
+        pages = html_content.count('page') or 1
+        writer = PdfWriter()
+        for _ in range(pages):
+            writer.add_blank_page(width=612, height=792)
+        with open(output_file, 'wb') as f:
+            writer.write(f)
+        return pages
+
+@pytest.fixture
+def renderer(tmp_path):
+    return FakePDFRenderer(ConfigManager(str(tmp_path / 'config.yaml')))
+
+def test_unchanged_segments_are_reused(tmp_path, renderer):
+    output = tmp_path / 'out.pdf'
+    segments = [('cover', 'page'), ('a', 'page page'), ('b', 'page')]
+    stats = SegmentedRenderer(renderer, tmp_path / 'cache').render(segments, str(output))
+    assert (stats['segments'], stats['rendered'], stats['reused'], stats['pages']) == (3, 3, 0, 4)
+    assert len(PdfReader(str(output)).pages) == 4
+
+    renderer.rendered.clear()
+    segments[2] = ('b', 'page edited')
+    stats = SegmentedRenderer(renderer, tmp_path / 'cache').render(segments, str(output))
+    assert stats['rendered'] == 1 and stats['reused'] == 2
+    assert renderer.rendered == [('page edited', 3)]
+
+def test_page_count_change_rerenders_following_segments(tmp_path, renderer):
+    output = tmp_path / 'out.pdf'
+    cache = tmp_path / 'cache'
+    SegmentedRenderer(renderer, cache).render([('a', 'page'), ('b', 'page')], str(output))
+    renderer.rendered.clear()
+    SegmentedRenderer(renderer, cache).render([('a', 'page page'), ('b', 'page')], str(output))
+    assert [offset for _, offset in renderer.rendered] == [0, 2]
+    assert len(list((cache / 'segments').glob('*.pdf'))) == 2
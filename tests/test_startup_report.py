@@ -0,0 +1,20 @@
+# tests/test_startup_report.py
+from src.startup_report import parse_importtime, StartupTimer
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     yaml.error\n"
+        "import time:      3000 |       3120 |   yaml\n"
+        "import time:       500 |       3620 | src.config\n"
+    )
+    modules = parse_importtime(stderr)
+    assert [m['module'] for m in modules] == ['yaml.error', 'yaml', 'src.config']
+    assert modules[2] == {'module': 'src.config', 'self_us': 500, 'cumulative_us': 3620, 'depth': 0}
+    assert modules[0]['depth'] == 2
+
+def test_startup_timer_marks_are_monotonic():
+    timer = StartupTimer()
+    timer.mark('a')
+    timer.mark('b')
+    assert timer.as_dict()['a'] <= timer.as_dict()['b']
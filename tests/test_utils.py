@@ -0,0 +1,64 @@
+# tests/test_utils.py
+import hashlib
+import os
+import pytest
+from src.utils import InputIndex, compute_hash, discover_files, document_id
+
+def test_compute_hash_streams_in_chunks(tmp_path):
+    data = bytes(range(256)) * 5000
+    path = tmp_path / 'big.bin'
+    path.write_bytes(data)
+    assert compute_hash(path, chunk_size=4096) == hashlib.sha256(data).hexdigest()
+    assert compute_hash(path) == hashlib.sha256(data).hexdigest()
+
+def test_compute_hash_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        compute_hash(tmp_path / 'missing.pdf')
+
+def test_discover_files_orders_by_prefix(tmp_path):
+    for name in ('10-ten.md', '2-two.md', 'notes.md', 'image.png'):
+        (tmp_path / name).touch()
+    assert [f.name for f in discover_files(str(tmp_path))] == ['2-two.md', '10-ten.md', 'notes.md']
+
+def test_discover_files_orders_nested_sections(tmp_path):
+    (tmp_path / '02-defense').mkdir()
+    (tmp_path / '01-economy').mkdir()
+    (tmp_path / '.mc_cache').mkdir()
+    for name in ('00-preface.md', '01-economy/10-jobs.md', '01-economy/03-tariffs.md', '02-defense/01-navy.md', '.mc_cache/x.md'):
+        (tmp_path / name).touch()
+    files = discover_files(str(tmp_path))
+    assert [f.relative_to(tmp_path).as_posix() for f in files] == [
+        '00-preface.md', '01-economy/03-tariffs.md', '01-economy/10-jobs.md', '02-defense/01-navy.md'
+    ]
+    assert document_id(files[1], tmp_path) == '01-economy--03-tariffs'
+
+def test_input_index_reuses_listing_until_directory_changes(tmp_path):
+    (tmp_path / '01-a.md').touch()
+    old = 1_000_000_000
+    os.utime(tmp_path, ns=(old, old))  # Outside the racy window, so the listing is trusted
+    index = InputIndex()
+    assert len(index.files(tmp_path)) == 1
+    assert len(index.files(tmp_path)) == 1
+    assert index.scans == 1
+    (tmp_path / '02-b.md').touch()
+    assert [f.name for f in index.files(tmp_path)] == ['01-a.md', '02-b.md']
+    assert index.scans == 2
+
+def test_input_index_reuses_scan_stats_but_restats_reused_listings(tmp_path, monkeypatch):
+    (tmp_path / '01-a.md').write_text('a')
+    old = 1_000_000_000
+    os.utime(tmp_path, ns=(old, old))
+    index = InputIndex()
+    real_stat = os.stat
+    file_stats = []
+    def counting_stat(path, *args, **kwargs):
+        if str(path).endswith('.md'):
+            file_stats.append(path)
+        return real_stat(path, *args, **kwargs)
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    assert index.file_stats(tmp_path) == {tmp_path / '01-a.md': (1, real_stat(tmp_path / '01-a.md').st_mtime_ns)}
+    assert file_stats == []  # Taken from the scan's DirEntry
+    (tmp_path / '01-a.md').write_text('edited in place')  # The directory's mtime does not change
+    os.utime(tmp_path, ns=(old, old))
+    assert index.file_stats(tmp_path)[tmp_path / '01-a.md'][0] == len('edited in place')
+    assert index.scans == 1 and len(file_stats) == 1
@@ -0,0 +1,72 @@
+# tests/test_variants.py
+import pytest
+from src.config import ConfigManager
+from src.html_generator import HTMLGenerator
+from src.pdf_renderer import PDFRenderer
+from src.utils import compute_hash
+from src.variants import UNCHUNKED_AUTO_WORKERS, build_variants, load_variants, variant_worker_count
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / '01-a.md').write_text('# A')
+    (docs / '02-b.md').write_text('# B')
+    config = ConfigManager(str(tmp_path / 'config.yaml'))
+    config.set('output_file', str(tmp_path / 'package.pdf'))
+    config.set('build.cache_dir', str(tmp_path / 'cache'))
+    config.set('build.variant_workers', 1)
+    config.set('variants', [
+        {'name': 'secret', 'overrides': {'classification': 'SECRET', 'header.lines': [{'text': 'SECRET EDITION'}]}},
+        {'name': 'public', 'output_file': str(tmp_path / 'public.pdf')},
+    ])
+    renders = []
+
+    def fake_render_pdf(self, html_content, output_file, progress_callback=None, profile=None):
+        renders.append((self.get_render_css(), html_content.read_text()))
+        with open(output_file, 'wb') as f:
+            html_content.copy_to(f)
+        return compute_hash(output_file)
+    monkeypatch.setattr(PDFRenderer, 'render_pdf', fake_render_pdf)
+    return config, str(docs), renders
+
+def test_load_variants_applies_overrides_and_rejects_content_keys(package):
+    config, _, _ = package
+    secret, public = load_variants(config)
+    assert secret.output_file.endswith('package-secret.pdf') and public.output_file.endswith('public.pdf')
+    assert secret.config['classification'] == 'SECRET' and public.config['classification'] == ''
+    assert 'variants' not in secret.config
+    assert [v.name for v in load_variants(config, ['public'])] == ['public']
+    with pytest.raises(ValueError):
+        load_variants(config, ['missing'])
+    config.set('variants', [{'name': 'bad', 'overrides': {'images.target_dpi': 72}}])
+    with pytest.raises(ValueError):
+        load_variants(config)
+
+def test_variants_share_one_conversion(package, monkeypatch):
+    config, docs, renders = package
+    generator = HTMLGenerator(config)
+    calls = []
+    original = generator._preprocess_markdown
+    monkeypatch.setattr(generator, '_preprocess_markdown', lambda md: calls.append(md) or original(md))
+
+    summary = build_variants(generator, docs, load_variants(config))
+    assert summary['status'] == 'built'
+    assert [v['status'] for v in summary['variants']] == ['built', 'built']
+    assert sorted(calls) == ['# A', '# B']
+    (secret_css, secret_html), (public_css, public_html) = renders
+    assert 'SECRET EDITION' in secret_html and 'SECRET EDITION' not in public_html
+    assert secret_css != public_css
+    assert secret_html.index('>A</h1>') < secret_html.index('>B</h1>')
+
+    assert build_variants(generator, docs, load_variants(config))['status'] == 'cached'
+    assert len(renders) == 2
+
+def test_auto_variant_workers_are_capped_unless_rendering_is_chunked(package, monkeypatch):
+    config, _, _ = package
+    monkeypatch.setattr('os.cpu_count', lambda: 16)
+    assert variant_worker_count(config) == 1
+    config.set('build.variant_workers', 0)
+    assert variant_worker_count(config) == UNCHUNKED_AUTO_WORKERS
+    config.set('build.render_chunk_documents', 50)
+    assert variant_worker_count(config) == 16
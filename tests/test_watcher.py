@@ -0,0 +1,53 @@
+# tests/test_watcher.py
+import os
+import threading
+import pytest
+from src.watcher import InotifyBackend, PollingBackend, WatchTargets, Watcher, diff_snapshots
+
+@pytest.fixture
+def targets(tmp_path):
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    (inputs / '01-intro.md').write_text('# Intro', encoding='utf-8')
+    (inputs / '02-body.md').write_text('# Body', encoding='utf-8')
+    (tmp_path / 'config.yaml').write_text('classification: ""\n', encoding='utf-8')
+    styles = tmp_path / 'styles.txt'
+    styles.write_text('body {}', encoding='utf-8')
+    return WatchTargets(inputs, tmp_path / 'config.yaml', styles)
+
+def test_rename_is_reported_as_one_change(targets):
+    before = targets.snapshot()
+    os.rename(targets.input_folder / '01-intro.md', targets.input_folder / '03-intro.md')
+    changes = diff_snapshots(targets, before, targets.snapshot())
+    assert changes and not changes.added and not changes.removed
+    assert changes.as_dict()['renamed'] == [['01-intro.md', '03-intro.md']]
+
+def test_edits_and_styles_are_classified(targets):
+    before = targets.snapshot()
+    (targets.input_folder / '02-body.md').write_text('# Body, revised', encoding='utf-8')
+    targets.styles_path.write_text('body { color: red; }', encoding='utf-8')
+    changes = diff_snapshots(targets, before, targets.snapshot())
+    assert changes.as_dict()['modified'] == ['02-body.md']
+    assert changes.styles and not changes.styles_only
+
+def test_watcher_coalesces_a_burst(targets):
+    watcher = Watcher(targets, debounce=0.1, backend=PollingBackend(0.02))
+    def burst():
+        for i in range(5):
+            (targets.input_folder / '02-body.md').write_text(f'# Body {i}', encoding='utf-8')
+            threading.Event().wait(0.01)
+        (targets.input_folder / '04-new.md').write_text('# New', encoding='utf-8')
+    threading.Thread(target=burst).start()
+    changes = watcher.wait_for_changes(timeout=5)
+    assert changes.as_dict()['modified'] == ['02-body.md']
+    assert changes.as_dict()['added'] == ['04-new.md']
+    assert watcher.wait_for_changes(timeout=0.2) is None
+
+@pytest.mark.skipif(not InotifyBackend.available(), reason="inotify is Linux-only")
+def test_inotify_backend_wakes_on_write(targets):
+    watcher = Watcher(targets, debounce=0.05)
+    assert isinstance(watcher.backend, InotifyBackend)
+    threading.Timer(0.1, lambda: targets.config_path.write_text('classification: X\n', encoding='utf-8')).start()
+    changes = watcher.wait_for_changes(timeout=5)
+    watcher.close()
+    assert changes.config